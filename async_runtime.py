@@ -0,0 +1,252 @@
+"""The app's single asyncio runtime.
+
+``AsyncRuntime`` owns one event loop running on a daemon thread; every
+piece of background I/O (logo downloads, remote playlists, stream probes,
+EPG refreshes) is submitted to it from the UI thread through a named
+``TaskGroup``.  A group caps how many of its tasks run at once (``limit``)
+and how many may be waiting or running in total (``max_pending``): past
+that, ``submit`` refuses new work instead of letting it pile up on a
+saturated loop.
+
+A task's slot is given back from the task itself once it has finished
+unwinding, not when its future is cancelled, so a group never runs more
+than ``limit`` tasks even while cancelled ones clean up.
+
+A monitor task sleeps ``lag_interval`` seconds in a loop and records how
+late it wakes up.  That lag is the time callbacks wait for the loop: when
+it grows, something is blocking the loop or it has more work than it can
+run.  The monitor also takes the loop's figures (lag percentiles, live
+tasks) on the loop thread; ``stats`` only hands out the last of them.
+
+``shutdown`` cancels every task, waits for them to unwind, runs the
+caller's cleanup coroutine (closing HTTP sessions) and only then stops the
+loop and joins the thread.
+"""
+import asyncio
+import logging
+import threading
+import time
+from collections import deque
+
+log = logging.getLogger(__name__)
+
+
+class TaskGroup:
+    """Counters and limits for one kind of background work."""
+
+    COUNTERS = ('submitted', 'rejected', 'completed', 'failed', 'cancelled')
+
+    def __init__(self, name, limit=1, max_pending=None):
+        self.name = name
+        self.limit = limit
+        self.max_pending = max_pending or limit
+        self.pending = 0
+        self.running = 0
+        self.tasks = set()
+        self.counters = dict.fromkeys(self.COUNTERS, 0)
+        self._slots = None
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Claim a pending slot from any thread; ``False`` if the group is full."""
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.counters['rejected'] += 1
+                return False
+            self.pending += 1
+            self.counters['submitted'] += 1
+            return True
+
+    def release(self, outcome):
+        with self._lock:
+            self.pending -= 1
+            self.counters[outcome] += 1
+
+    def start(self, state):
+        """Mark a submission as started; ``False`` if it was abandoned first."""
+        with self._lock:
+            if state['abandoned']:
+                return False
+            state['started'] = True
+            return True
+
+    def abandon(self, state):
+        """Mark a submission that never started; ``True`` if it had not started."""
+        with self._lock:
+            if state['started']:
+                return False
+            state['abandoned'] = True
+            return True
+
+    async def run(self, coro, state):
+        """Loop side: wait for a running slot, then run ``coro`` as part of the group.
+
+        The pending slot is released here, once the task has unwound.
+        """
+        if not self.start(state):
+            coro.close()
+            return None
+        task = asyncio.current_task()
+        self.tasks.add(task)
+        outcome = 'failed'
+        try:
+            if self._slots is None:
+                # Se crea dentro del bucle que la va a usar
+                self._slots = asyncio.Semaphore(self.limit)
+            async with self._slots:
+                self.running += 1
+                try:
+                    result = await coro
+                finally:
+                    self.running -= 1
+            outcome = 'completed'
+            return result
+        except asyncio.CancelledError:
+            outcome = 'cancelled'
+            raise
+        finally:
+            self.tasks.discard(task)
+            self.release(outcome)
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+            pending = self.pending
+        stats.update(running=self.running, waiting=max(pending - self.running, 0),
+                     limit=self.limit, max_pending=self.max_pending)
+        return stats
+
+
+class AsyncRuntime:
+    """One event loop thread shared by all background I/O of the app."""
+
+    def __init__(self, groups=None, lag_interval=0.25, lag_window=240, lag_warning=0.5):
+        self.loop = asyncio.new_event_loop()
+        self.groups = {}
+        for name, (limit, max_pending) in (groups or {}).items():
+            self.add_group(name, limit, max_pending)
+        self.lag_interval = lag_interval
+        self.lag_warning = lag_warning
+        self.lag = 0.0
+        self.lag_max = 0.0
+        self._lags = deque(maxlen=lag_window)
+        # Cifras del bucle tomadas en su propio hilo por el monitor
+        self._loop_stats = {'loop_lag': self._lag_stats(), 'tasks': 0}
+        self._monitor = None
+        self._closing = False
+        self._thread = threading.Thread(target=self._run, name='async-runtime', daemon=True)
+
+    def add_group(self, name, limit=1, max_pending=None):
+        group = self.groups[name] = TaskGroup(name, limit, max_pending)
+        return group
+
+    def start(self):
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._start_monitor(), self.loop)
+        return self
+
+    def _run(self):
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_forever()
+        finally:
+            self.loop.close()
+
+    @property
+    def running(self):
+        return self._thread.is_alive() and not self._closing
+
+    def submit(self, group_name, coro):
+        """Run ``coro`` in a group from any thread.
+
+        Returns a ``concurrent.futures.Future``, or ``None`` (and the
+        coroutine is discarded) when the group is full or the runtime is
+        shutting down.
+        """
+        group = self.groups[group_name]
+        if not self.running or not group.reserve():
+            coro.close()
+            return None
+        state = {'started': False, 'abandoned': False}
+        future = asyncio.run_coroutine_threadsafe(group.run(coro, state), self.loop)
+
+        def done(future):
+            # Si empezó, la propia tarea libera su plaza al terminar de deshacerse;
+            # si se canceló antes de empezar, la corrutina nunca llegó a ejecutarse
+            if group.abandon(state):
+                group.release('cancelled')
+                coro.close()
+
+        future.add_done_callback(done)
+        return future
+
+    def call_soon(self, callback, *args):
+        """Run a plain callback on the loop thread; ignored once shutting down."""
+        if self.running:
+            self.loop.call_soon_threadsafe(callback, *args)
+
+    async def _start_monitor(self):
+        self._monitor = asyncio.ensure_future(self._watch_lag())
+
+    async def _watch_lag(self):
+        interval = self.lag_interval
+        warned = 0
+        while True:
+            started = time.perf_counter()
+            await asyncio.sleep(interval)
+            lag = max(time.perf_counter() - started - interval, 0.0)
+            self.lag = lag
+            self.lag_max = max(self.lag_max, lag)
+            self._lags.append(lag)
+            self._loop_stats = {'loop_lag': self._lag_stats(), 'tasks': len(asyncio.all_tasks(self.loop))}
+            if lag > self.lag_warning and time.monotonic() - warned > 30:
+                warned = time.monotonic()
+                log.warning("Bucle asyncio saturado: %.0f ms de retraso", lag * 1000)
+
+    def _lag_stats(self):
+        lags = sorted(self._lags)
+        return {
+            'last': self.lag,
+            'mean': sum(lags) / len(lags) if lags else 0.0,
+            'p95': lags[int(len(lags) * 0.95)] if lags else 0.0,
+            'max': self.lag_max,
+        }
+
+    def stats(self):
+        """Per-group counters plus the loop lag (seconds) over the recent window.
+
+        Safe from any thread: the loop's figures are the last ones the
+        monitor took on the loop thread, at most ``lag_interval`` old.
+        """
+        loop_stats = self._loop_stats
+        return {
+            'groups': {name: group.stats() for name, group in self.groups.items()},
+            'loop_lag': loop_stats['loop_lag'],
+            'tasks': loop_stats['tasks'] if self._thread.is_alive() else 0,
+        }
+
+    async def _drain(self, timeout, cleanup):
+        tasks = set()
+        for group in self.groups.values():
+            tasks.update(group.tasks)
+        if self._monitor is not None:
+            tasks.add(self._monitor)
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.wait(tasks, timeout=timeout)
+        if cleanup is not None:
+            await asyncio.wait_for(cleanup(), timeout)
+        await self.loop.shutdown_asyncgens()
+
+    def shutdown(self, timeout=2.0, cleanup=None):
+        """Cancel and drain every task, await ``cleanup()`` and stop the loop thread."""
+        if not self.running:
+            return
+        self._closing = True
+        try:
+            asyncio.run_coroutine_threadsafe(self._drain(timeout, cleanup), self.loop).result(timeout * 2)
+        except Exception as e:
+            log.error("Error al detener las tareas en segundo plano: %s", e)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(timeout)
@@ -0,0 +1,7 @@
+"""Headless benchmarks for PyM3U.
+
+Run them from the repository root, e.g. ``python -m benchmarks.bench_parse``.
+``python -m benchmarks.suite`` runs the parse, search, loading and logo
+benchmarks together and writes the results to JSON;
+``python -m benchmarks.compare`` diffs two such files.
+"""
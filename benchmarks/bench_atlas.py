@@ -0,0 +1,200 @@
+"""Frame times while scrolling a list of logos, with and without the atlas.
+
+    python -m benchmarks.bench_atlas [--rows 3000] [--logos 600] [--seconds 8]
+                                     [--speed 2500] [--out FILE]
+
+Opens a kivy window with a RecycleView of rows shaped like channel cards
+(a 60dp logo and two labels) and scrolls it up and down at ``speed``
+pixels per second for ``seconds``, first with one texture per logo and then
+with the ``LogoAtlas``.  Logos go through ``ThumbnailCache.add`` exactly as
+decoded logos do in the app; they are synthetic RGBA images of varying
+sizes, so Pillow is not needed and decoding is not part of the numbers:
+what differs between the runs is texture creation, uploads and binds.
+
+``--logos`` above the cache's 300 entries keeps logos being evicted and
+uploaded again while scrolling, as a long playlist does.  Frame durations
+are taken between consecutive buffer swaps, after a one second warm-up;
+results are printed and written to JSON like the benchmark suite's.
+"""
+import argparse
+import os
+import random
+import statistics
+import time
+
+os.environ.setdefault('KIVY_NO_ARGS', '1')
+os.environ.setdefault('KIVY_NO_CONSOLELOG', '1')
+
+from kivy.config import Config
+
+# Sin límite de fps: lo que se mide es cuánto tarda cada frame
+Config.set('graphics', 'maxfps', '0')
+
+from kivy.app import App
+from kivy.clock import Clock
+from kivy.core.window import Window
+from kivy.graphics.texture import Texture
+from kivy.metrics import dp
+from kivy.uix.boxlayout import BoxLayout
+from kivy.uix.image import Image
+from kivy.uix.label import Label
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
+
+from logo_atlas import LogoAtlas
+from thumbnails import ThumbnailCache
+from benchmarks.results import write_results
+
+WARMUP = 1.0
+JANK = 1 / 30
+
+
+def percentile(values, q):
+    return values[min(int(len(values) * q), len(values) - 1)]
+
+
+def synthetic_logos(count, size, seed=0):
+    """``count`` decoded logos ``(width, height, rgba)`` that fit a ``size`` box."""
+    rng = random.Random(seed)
+    logos = []
+    for _ in range(count):
+        width = rng.randint(size // 2, size)
+        height = rng.randint(size // 3, size)
+        pixel = bytes((rng.randrange(256), rng.randrange(256), rng.randrange(256), 255))
+        logos.append((width, height, pixel * (width * height)))
+    return logos
+
+
+class LogoRow(RecycleDataViewBehavior, BoxLayout):
+    def __init__(self, **kwargs):
+        super().__init__(orientation='horizontal', spacing=dp(10), padding=dp(10), **kwargs)
+        self.image = Image(size_hint=(None, None), size=(dp(60), dp(60)))
+        self.title = Label()
+        self.subtitle = Label(font_size='12sp')
+        self.add_widget(self.image)
+        self.add_widget(self.title)
+        self.add_widget(self.subtitle)
+
+    def refresh_view_attrs(self, rv, index, data):
+        self.title.text = f'Canal {index}'
+        self.subtitle.text = f'http://streams.example.com/live/{index}.m3u8'
+        self.image.texture = rv.logo_texture(index)
+        return super().refresh_view_attrs(rv, index, data)
+
+
+class ScrollBench(App):
+    def __init__(self, args, **kwargs):
+        super().__init__(**kwargs)
+        self.args = args
+        self.size = int(dp(60))
+        self.logos = synthetic_logos(args.logos, self.size)
+        self.modes = ['texturas', 'atlas']
+        self.results = {}
+        self.frames = []
+        self.last_flip = None
+        self.started = None
+        self.direction = -1
+        self.thumbnails = None
+
+    def make_texture(self, width, height, pixels):
+        texture = Texture.create(size=(width, height), colorfmt='rgba')
+        texture.blit_buffer(pixels, colorfmt='rgba', bufferfmt='ubyte')
+        return texture
+
+    def make_page(self, width, height):
+        return Texture.create(size=(width, height), colorfmt='rgba')
+
+    def logo_texture(self, index):
+        url = index % len(self.logos)
+        texture = self.thumbnails.get(url)
+        if texture is None:
+            texture = self.thumbnails.add(url, *self.logos[url])
+        return texture
+
+    def build(self):
+        self.rv = RecycleView()
+        self.rv.logo_texture = self.logo_texture
+        self.rv.viewclass = LogoRow
+        layout = RecycleBoxLayout(orientation='vertical', size_hint_y=None,
+                                  default_size=(None, dp(80)), default_size_hint=(1, None))
+        layout.bind(minimum_height=layout.setter('height'))
+        self.rv.add_widget(layout)
+        Window.bind(on_flip=self.on_flip)
+        Clock.schedule_once(lambda dt: self.start_mode(), 0.5)
+        return self.rv
+
+    def start_mode(self):
+        mode = self.modes[len(self.results)]
+        if self.thumbnails is not None:
+            self.thumbnails.use_atlas(None)
+        atlas = LogoAtlas(self.size, self.make_page) if mode == 'atlas' else None
+        self.thumbnails = ThumbnailCache(self.size, self.make_texture, deliver=None, atlas=atlas)
+        self.rv.data = [{} for _ in range(self.args.rows)]
+        self.rv.refresh_from_data()
+        self.rv.scroll_y = 1
+        self.frames = []
+        self.last_flip = None
+        self.started = time.perf_counter()
+        self.scroll_event = Clock.schedule_interval(self.scroll, 0)
+
+    def scroll(self, dt):
+        scrollable = max(self.rv.children[0].height - self.rv.height, 1)
+        y = self.rv.scroll_y + self.direction * self.args.speed * dt / scrollable
+        if not 0 <= y <= 1:
+            self.direction = -self.direction
+            y = min(max(y, 0), 1)
+        self.rv.scroll_y = y
+        if time.perf_counter() - self.started >= WARMUP + self.args.seconds:
+            self.scroll_event.cancel()
+            self.finish_mode()
+
+    def on_flip(self, *args):
+        now = time.perf_counter()
+        if self.started is not None and now - self.started >= WARMUP and self.last_flip is not None:
+            self.frames.append(now - self.last_flip)
+        self.last_flip = now
+
+    def finish_mode(self):
+        mode = self.modes[len(self.results)]
+        frames = sorted(self.frames) or [0.0]
+        atlas = self.thumbnails.atlas
+        stats = self.thumbnails.stats
+        textures = len(self.thumbnails) if atlas is None else len(atlas.pages)
+        self.results[mode] = result = {
+            'frames': len(self.frames),
+            'frames_per_s': len(self.frames) / max(sum(self.frames), 1e-9),
+            'frame_p50_ms': statistics.median(frames) * 1000,
+            'frame_p95_ms': percentile(frames, 0.95) * 1000,
+            'frame_p99_ms': percentile(frames, 0.99) * 1000,
+            'frame_max_ms': frames[-1] * 1000,
+            'janky_frames': sum(1 for frame in frames if frame > JANK),
+            'gl_textures': textures,
+            'uploads': stats['misses'],
+            'evictions': stats['evictions'],
+        }
+        print(f'{mode:9} {result["frames"]:6} frames  p50 {result["frame_p50_ms"]:6.2f} ms'
+              f'  p95 {result["frame_p95_ms"]:6.2f} ms  p99 {result["frame_p99_ms"]:6.2f} ms'
+              f'  máx {result["frame_max_ms"]:6.1f} ms  {result["janky_frames"]} tirones'
+              f'  {textures} texturas')
+        if len(self.results) < len(self.modes):
+            Clock.schedule_once(lambda dt: self.start_mode(), 0.5)
+        else:
+            path = write_results({'atlas': {self.args.logos: self.results}}, self.args.out)
+            print(f'Resultados en {path}')
+            self.stop()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--rows', type=int, default=3000)
+    parser.add_argument('--logos', type=int, default=600, help='logos distintos en la lista')
+    parser.add_argument('--seconds', type=float, default=8)
+    parser.add_argument('--speed', type=float, default=2500, help='píxeles por segundo')
+    parser.add_argument('--out', help='fichero JSON de resultados')
+    args = parser.parse_args(argv)
+    ScrollBench(args).run()
+
+
+if __name__ == '__main__':
+    main()
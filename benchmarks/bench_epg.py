@@ -0,0 +1,76 @@
+"""XMLTV ingestion memory and now/next lookup latency.
+
+    python -m benchmarks.bench_epg [channels] [days]
+
+Compares loading a gzipped guide with ``ElementTree.parse`` (whole tree in
+memory) against the streaming ``EPGBuilder``, then times reopening the
+saved index and ``now_next`` lookups for a screenful of cards.
+"""
+import gc
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+import xml.etree.ElementTree as ET
+import gzip
+
+from epg import EPGBuilder, EPGIndex
+from benchmarks.synthetic import write_xmltv
+
+SCREEN = 8
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = build()
+    elapsed = time.perf_counter() - start
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main(argv):
+    channels = int(argv[0]) if argv else 1000
+    days = int(argv[1]) if len(argv) > 1 else 7
+    mb = 1024 * 1024
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_xmltv(os.path.join(tmp, 'guia.xml.gz'), channels, days)
+        print(f'{channels} canales, {days} días: {os.path.getsize(path) / mb:.1f} MB comprimido')
+
+        def whole_tree():
+            with gzip.open(path) as f:
+                return len(ET.parse(f).getroot())
+        _, elapsed, peak = measure(whole_tree)
+        print(f'ElementTree.parse   {elapsed:6.2f}s  pico {peak / mb:7.1f} MB')
+
+        builder, elapsed, peak = measure(lambda: EPGBuilder().feed(path))
+        print(f'EPGBuilder.feed     {elapsed:6.2f}s  pico {peak / mb:7.1f} MB  '
+              f'({builder.programmes} programas, {len(builder.titles)} títulos distintos)')
+
+        index_path = os.path.join(tmp, 'guia.epg')
+        start = time.perf_counter()
+        builder.build().save(index_path)
+        print(f'ordenar y guardar   {time.perf_counter() - start:6.2f}s  '
+              f'índice {os.path.getsize(index_path) / mb:.1f} MB')
+        del builder
+
+        start = time.perf_counter()
+        index = EPGIndex.load(index_path)
+        print(f'abrir índice        {(time.perf_counter() - start) * 1000:6.2f} ms')
+
+        rng = random.Random(0)
+        ids = [rng.choice(index.ids) for _ in range(SCREEN * 1000)]
+        now = time.time()
+        start = time.perf_counter()
+        found = sum(1 for channel_id in ids if index.now_next(channel_id, now=now)[0] is not None)
+        per_lookup = (time.perf_counter() - start) / len(ids)
+        print(f'now_next            {per_lookup * 1e6:6.2f} µs por canal '
+              f'({SCREEN} tarjetas: {per_lookup * SCREEN * 1e6:.1f} µs)  con programa: {found}/{len(ids)}')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
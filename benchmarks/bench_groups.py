@@ -0,0 +1,56 @@
+"""Grouped view: cost of the group index and of what the list materializes.
+
+    python -m benchmarks.bench_groups [count ...]
+
+For each playlist size prints the ``GroupIndex`` build time, the time to
+lay out the grouped view with everything collapsed and with one group
+open, and how many list positions (the items RecycleView binds and the
+logo scheduler walks) each layout has compared with the flat list.
+"""
+import os
+import sys
+import tempfile
+import time
+
+import m3u_parser
+from channel_groups import GroupIndex, GroupedLayout
+from channel_store import ChannelStore
+from search_index import SearchIndex
+from benchmarks.synthetic import write_playlist
+
+HEADER, ROW = object(), object()
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - start) * 1000, result
+
+
+def main(argv):
+    counts = [int(a) for a in argv] or [10_000, 100_000, 500_000]
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in counts:
+            path = write_playlist(os.path.join(tmp, f'{count}.m3u'), count)
+            store = ChannelStore(m3u_parser.iter_channels(path))
+            build_ms, index = timed(lambda: GroupIndex.build(store))
+            print(f'{count:,} canales, {len(index.order)} grupos: índice en {build_ms:.0f} ms')
+
+            expanded = set()
+            layout_ms, layout = timed(lambda: GroupedLayout(index, index.partition(store.all_rows()), expanded))
+            data_ms, data = timed(lambda: layout.data(HEADER, ROW))
+            print(f'  todo cerrado     {layout_ms + data_ms:8.2f} ms  {len(data):>9,} posiciones '
+                  f'(plana: {count:,})')
+
+            largest = max(index.order, key=lambda group_id: len(index.rows[group_id]))
+            toggle_ms, _ = timed(lambda: layout.toggle(largest))
+            data_ms, data = timed(lambda: layout.data(HEADER, ROW))
+            print(f'  un grupo abierto {toggle_ms + data_ms:8.2f} ms  {len(data):>9,} posiciones')
+
+            results = SearchIndex.build(store).search('canal 1')
+            split_ms, groups = timed(lambda: index.partition(results))
+            print(f'  búsqueda de {len(results):,} filas repartida en {len(groups)} grupos en {split_ms:.1f} ms')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
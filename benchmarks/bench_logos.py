@@ -0,0 +1,138 @@
+"""Logos per second: the old per-logo session worker versus ``LogoFetcher``.
+
+    python -m benchmarks.bench_logos [logos] [latency_ms] [distinct_urls]
+
+Starts a local ``LogoServer`` that answers every logo request with a small
+PNG after ``latency_ms`` milliseconds.  ``distinct_urls`` below ``logos``
+lets several channels share one logo URL, as real playlists do.
+
+``measure`` is the logos harness of ``benchmarks.suite``: the app's own
+download path (``LogoQueue``, its workers, ``LogoFetcher.fetch_cached`` and
+``LogoCache``) against a ``LogoServer`` that also fails some requests, then
+a second pass revalidating every cached logo.
+"""
+import asyncio
+import sys
+import tempfile
+import time
+
+import m3u_parser
+from logo_cache import LogoCache
+from logo_fetcher import LogoFetcher
+from logo_queue import LogoQueue, VISIBLE, WORKERS
+from metrics import Histogram
+from benchmarks.logo_server import LogoServer
+
+
+async def legacy(urls):
+    # Como el antiguo logo_downloader_worker: un logo tras otro, una sesión por logo
+    import aiohttp
+    done = 0
+    for url in urls:
+        async with aiohttp.ClientSession() as session:
+            async with session.get(url, timeout=aiohttp.ClientTimeout(total=10)) as response:
+                if response.status == 200 and (await response.read()).startswith(b'\x89PNG'):
+                    done += 1
+    return done
+
+
+async def pooled(urls, workers=WORKERS):
+    fetcher = LogoFetcher()
+    queue = asyncio.Queue()
+    for url in urls:
+        queue.put_nowait(url)
+    done = 0
+
+    async def worker():
+        nonlocal done
+        while not queue.empty():
+            url = queue.get_nowait()
+            if await fetcher.fetch(url):
+                done += 1
+
+    await asyncio.gather(*(worker() for _ in range(workers)))
+    await fetcher.close()
+    return done
+
+
+async def app_pass(urls, fetcher, cache):
+    """Download ``urls`` the way the app's logo workers do; return timings."""
+    queue = LogoQueue()
+    for channel_id, url in enumerate(urls):
+        queue.put(channel_id, url, VISIBLE)
+    timer = Histogram('logo_fetch_seconds')
+    done = 0
+
+    async def worker():
+        nonlocal done
+        while len(queue):
+            channel_id, url = await queue.get()
+            task = asyncio.ensure_future(fetcher.fetch_cached(cache, url, timer))
+            queue.started(channel_id, task)
+            await asyncio.wait((task,))
+            queue.finished(channel_id, task)
+            if task.result():
+                done += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(WORKERS)))
+    elapsed = time.perf_counter() - start
+    return {
+        'logos': len(urls),
+        'shown': done,
+        'shown_rate': done / max(len(urls), 1),
+        'total_ms': elapsed * 1000,
+        'logos_per_s': len(urls) / elapsed,
+        'fetch_p50_ms': (timer.quantile(0.5) or 0) * 1000,
+        'fetch_p95_ms': (timer.quantile(0.95) or 0) * 1000,
+    }
+
+
+async def measure(path, count, latency, errors):
+    """Cold and revalidating ``app_pass`` over the first ``count`` logos of ``path``."""
+    urls = []
+    for channel in m3u_parser.iter_channels(path):
+        if channel.get('logo'):
+            urls.append(channel['logo'])
+            if len(urls) == count:
+                break
+    async with LogoServer(latency=latency, jitter=latency / 2, errors=errors,
+                          missing=errors / 2, broken=errors / 4) as server:
+        base = server.url()
+        # La lista apunta a logos.example.com: se reescribe al servidor local
+        urls = [base + url[url.rindex('/'):] for url in urls]
+        fetcher = LogoFetcher(timeout=5, backoff=0.05)
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = LogoCache(tmp)
+            try:
+                cold = await app_pass(urls, fetcher, cache)
+                cold.update({f'fetch_{key}': value for key, value in fetcher.stats.items()})
+                cold['server_requests'] = server.stats['requests']
+                # Segunda pasada: todo caducado, se revalida con If-None-Match
+                for entry in cache.entries.values():
+                    entry.fetched = 0
+                requests = server.stats['requests']
+                warm = await app_pass(urls, fetcher, cache)
+                warm['server_requests'] = server.stats['requests'] - requests
+                warm['not_modified'] = server.stats['not_modified']
+            finally:
+                await fetcher.close()
+                cache.close()
+    return {'cold': cold, 'revalidate': warm}
+
+
+async def main(argv):
+    logos = int(argv[0]) if argv else 200
+    latency = (int(argv[1]) if len(argv) > 1 else 20) / 1000
+    distinct = int(argv[2]) if len(argv) > 2 else logos
+    async with LogoServer(latency) as server:
+        urls = [f'{server.url()}/{i % distinct}.png' for i in range(logos)]
+        for label, run in (('legacy', legacy), ('LogoFetcher', pooled)):
+            start = time.perf_counter()
+            done = await run(urls)
+            elapsed = time.perf_counter() - start
+            print(f'{label:12} {done} logos en {elapsed:.2f}s  ({done / elapsed:,.0f} logos/s)')
+
+
+if __name__ == '__main__':
+    asyncio.run(main(sys.argv[1:]))
@@ -0,0 +1,41 @@
+"""Memory of ``ChannelStore`` versus the old list-of-dicts playlist.
+
+    python -m benchmarks.bench_memory [count ...]
+"""
+import gc
+import os
+import sys
+import tempfile
+import tracemalloc
+
+import m3u_parser
+from channel_store import ChannelStore
+from benchmarks.synthetic import write_playlist
+
+
+def measure(build):
+    gc.collect()
+    tracemalloc.start()
+    result = build()
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, current, peak
+
+
+def main(argv):
+    counts = [int(a) for a in argv] or [10_000, 200_000]
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in counts:
+            path = write_playlist(os.path.join(tmp, f'{count}.m3u'), count)
+            dicts, dicts_mem, dicts_peak = measure(lambda: list(m3u_parser.iter_channels(path)))
+            del dicts
+            store, store_mem, store_peak = measure(lambda: ChannelStore(m3u_parser.iter_channels(path)))
+            del store
+            mb = 1024 * 1024
+            print(f'{count:>9} canales  list-of-dicts {dicts_mem / mb:7.1f} MB (pico {dicts_peak / mb:.1f})  '
+                  f'ChannelStore {store_mem / mb:7.1f} MB (pico {store_peak / mb:.1f})  '
+                  f'x{dicts_mem / store_mem:.1f}')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,60 @@
+"""Parallel chunked parsing: scaling with 1, 2, 4 and 8 worker processes.
+
+    python -m benchmarks.bench_parallel [count ...] [--workers 1,2,4,8]
+
+For each playlist size prints the single-threaded time (``iter_channels``
+into a ``ChannelStore``, what the app does for smaller files) and the time
+of ``parallel_parser.parse_parallel`` with each worker count, then the
+smallest size at which some parallel run beats the serial parser.  Results
+depend on the cores available: with one core the pool can only lose.
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import m3u_parser
+from channel_store import ChannelStore
+from parallel_parser import parse_parallel
+from benchmarks.synthetic import write_playlist
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('counts', nargs='*', type=int, default=[20_000, 100_000, 500_000, 1_000_000])
+    parser.add_argument('--workers', default='1,2,4,8')
+    args = parser.parse_args(argv)
+    workers = [int(w) for w in args.workers.split(',')]
+
+    print(f'{os.cpu_count()} CPU')
+    print(f'{"canales":>10} {"MB":>7} {"serie":>8} ' + ' '.join(f'{f"{w} proc":>8}' for w in workers))
+    crossover = None
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in args.counts:
+            path = write_playlist(os.path.join(tmp, f'{count}.m3u'), count)
+            serial, store = timed(lambda: ChannelStore(m3u_parser.iter_channels(path)))
+            times = []
+            for worker_count in workers:
+                elapsed, packed = timed(lambda: parse_parallel(path, worker_count))
+                if len(packed) != len(store) or packed.get(len(store) - 1) != store.get(len(store) - 1):
+                    raise SystemExit(f'{count} canales, {worker_count} procesos: resultado distinto')
+                times.append(elapsed)
+            size = os.path.getsize(path) / 1024 / 1024
+            print(f'{count:>10,} {size:>7.1f} {serial:>7.2f}s ' + ' '.join(f'{t:>7.2f}s' for t in times))
+            if crossover is None and min(times) < serial:
+                crossover = (count, size)
+            os.remove(path)
+    if crossover:
+        print(f'El modo paralelo gana a partir de {crossover[0]:,} canales ({crossover[1]:.0f} MB)')
+    else:
+        print('El modo paralelo no gana al parser en serie en ninguno de los tamaños probados')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,106 @@
+"""Compare ``m3u_parser.iter_channels`` with the original ``load_playlist`` loop.
+
+    python -m benchmarks.bench_parse [count ...]
+
+``measure`` is the parse harness of ``benchmarks.suite``.
+"""
+import os
+import re
+import sys
+import tempfile
+import time
+
+import m3u_parser
+from channel_store import ChannelStore
+from benchmarks.synthetic import write_playlist
+
+
+def legacy_parse_m3u_line(line):
+    # Copia de PyM3U.parse_m3u_line previa al parser compilado
+    info = {}
+    patterns = {
+        'logo': r'tvg-logo="([^"]+)"',
+        'name': r'tvg-name="([^"]+)"',
+        'group': r'group-title="([^"]+)"',
+        'id': r'tvg-id="([^"]+)"'
+    }
+    for key, pattern in patterns.items():
+        match = re.search(pattern, line)
+        if match:
+            info[key] = match.group(1)
+    if 'name' not in info:
+        name_match = re.search(r',([^,]+)$', line)
+        if name_match:
+            info['name'] = name_match.group(1).strip()
+    return info
+
+
+def legacy_load(filepath):
+    playlist = []
+    current_info = {}
+    with open(filepath, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith('#EXTINF:'):
+                current_info = legacy_parse_m3u_line(line)
+            elif line and not line.startswith('#'):
+                if current_info:
+                    current_info['url'] = line
+                    playlist.append(current_info)
+                    current_info = {}
+    return playlist
+
+
+def streaming_load(filepath, parser=None):
+    return list(m3u_parser.iter_channels(filepath, parser=parser))
+
+
+def best_of(fn, path, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn(path)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, len(result)
+
+
+def measure(path, repeat=3):
+    """Parse ``path`` end to end, per ``#EXTINF`` line and into a ``ChannelStore``."""
+    parser = m3u_parser.M3UParser()
+
+    def parse(path):
+        nonlocal parser
+        parser = m3u_parser.M3UParser()
+        return streaming_load(path, parser)
+
+    parse_s, count = best_of(parse, path, repeat)
+    with open(path, encoding='utf-8') as f:
+        extinf = [line for line in f if line.startswith('#EXTINF:')][:50_000]
+    extinf_s, _ = best_of(lambda lines: [m3u_parser.parse_extinf(line) for line in lines], extinf, repeat)
+    store_s, _ = best_of(lambda path: ChannelStore(m3u_parser.iter_channels(path)), path, repeat)
+    return {
+        'channels': count,
+        'lines': parser.lines,
+        'bytes': os.path.getsize(path),
+        'parse_ms': parse_s * 1000,
+        'channels_per_s': count / parse_s,
+        'per_10k_lines_s': parse_s * 10_000 / max(parser.lines, 1),
+        'extinf_us': extinf_s * 1_000_000 / max(len(extinf), 1),
+        'store_ms': store_s * 1000,
+    }
+
+
+def main(argv):
+    counts = [int(a) for a in argv] or [10_000, 200_000]
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in counts:
+            path = write_playlist(os.path.join(tmp, f'{count}.m3u'), count)
+            legacy, n_legacy = best_of(legacy_load, path)
+            fast, n_fast = best_of(streaming_load, path)
+            print(f'{count:>9} canales  legacy {legacy:.3f}s ({n_legacy / legacy:,.0f}/s)  '
+                  f'm3u_parser {fast:.3f}s ({n_fast / fast:,.0f}/s)  x{legacy / fast:.2f}')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,132 @@
+"""Stream health checks against a local mock IPTV server.
+
+    python -m benchmarks.bench_probe [channels] [dead_percent] [latency_ms]
+
+The mock server answers like real providers do: live TS endpoints, HLS
+master and media playlists, servers refusing ``HEAD``, 404s, empty
+manifests and streams that never answer.  The run checks that every URL
+gets the expected verdict and reports URLs per second, then re-runs through
+a ``ProbeCache`` to show that fresh results are not probed again.
+"""
+import asyncio
+import os
+import random
+import sys
+import tempfile
+import time
+
+from aiohttp import web
+
+from stream_probe import ALIVE, DEAD, ProbeCache, StreamProber
+
+MASTER = '#EXTM3U\n#EXT-X-STREAM-INF:BANDWIDTH=800000\nlow/index.m3u8\n'
+MEDIA = '#EXTM3U\n#EXT-X-TARGETDURATION:6\n#EXTINF:6.0,\nseg0.ts\n'
+
+HOSTS = [f'127.0.0.{n}' for n in range(1, 9)]
+
+# (ruta, veredicto esperado)
+KINDS = (
+    ('live/{i}.ts', ALIVE),
+    ('hls/{i}/master.m3u8', ALIVE),
+    ('nohead/{i}.ts', ALIVE),
+    ('gone/{i}.ts', DEAD),
+    ('hls/{i}/empty.m3u8', DEAD),
+    ('hang/{i}.ts', DEAD),
+)
+
+
+async def start_server(latency, timeout):
+    async def live(request):
+        await asyncio.sleep(latency)
+        return web.Response(body=b'\x47' * 1024, content_type='video/mp2t')
+
+    async def nohead(request):
+        if request.method == 'HEAD':
+            return web.Response(status=405)
+        return await live(request)
+
+    async def gone(request):
+        await asyncio.sleep(latency)
+        return web.Response(status=404)
+
+    async def hang(request):
+        await asyncio.sleep(timeout * 3)
+        return web.Response(status=200)
+
+    async def master(request):
+        await asyncio.sleep(latency)
+        return web.Response(text=MASTER, content_type='application/vnd.apple.mpegurl')
+
+    async def media(request):
+        await asyncio.sleep(latency)
+        return web.Response(text=MEDIA, content_type='application/vnd.apple.mpegurl')
+
+    async def empty(request):
+        await asyncio.sleep(latency)
+        return web.Response(text='#EXTM3U\n', content_type='application/vnd.apple.mpegurl')
+
+    app = web.Application()
+    app.router.add_route('*', '/live/{name}', live)
+    app.router.add_route('*', '/nohead/{name}', nohead)
+    app.router.add_route('*', '/gone/{name}', gone)
+    app.router.add_route('*', '/hang/{name}', hang)
+    app.router.add_get('/hls/{i}/master.m3u8', master)
+    app.router.add_get('/hls/{i}/low/index.m3u8', media)
+    app.router.add_get('/hls/{i}/empty.m3u8', empty)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, HOSTS[0], 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    # Varios "proveedores": el mismo servidor en otras direcciones de loopback,
+    # cada una con su propio límite por host
+    for host in HOSTS[1:]:
+        await web.TCPSite(runner, host, port).start()
+    return runner, port
+
+
+def make_urls(count, dead_percent, port, rng):
+    alive_kinds = [kind for kind in KINDS if kind[1] == ALIVE]
+    dead_kinds = [kind for kind in KINDS if kind[1] == DEAD]
+    expected = {}
+    for i in range(count):
+        kinds = dead_kinds if rng.random() * 100 < dead_percent else alive_kinds
+        path, verdict = rng.choice(kinds)
+        expected[f'http://{rng.choice(HOSTS)}:{port}/{path.format(i=i)}'] = verdict
+    return expected
+
+
+async def main(argv):
+    count = int(argv[0]) if argv else 2000
+    dead_percent = float(argv[1]) if len(argv) > 1 else 30
+    latency = (int(argv[2]) if len(argv) > 2 else 20) / 1000
+    timeout = 1
+    runner, port = await start_server(latency, timeout)
+    expected = make_urls(count, dead_percent, port, random.Random(0))
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = ProbeCache(os.path.join(tmp, 'probes.sqlite'))
+            prober = StreamProber(concurrency=64, per_host=8, host_rate=200, timeout=timeout)
+            start = time.perf_counter()
+            results = await prober.probe_all(expected, cache.put)
+            elapsed = time.perf_counter() - start
+            await prober.close()
+            cache.flush()
+
+            wrong = [url for url, verdict in expected.items() if results[url].state != verdict]
+            print(f'{len(results)} URLs en {elapsed:.2f}s ({len(results) / elapsed:,.0f} URLs/s)  '
+                  f'vivas {prober.stats[ALIVE]}  caídas {prober.stats[DEAD]}  errores de veredicto {len(wrong)}')
+            for url in wrong[:10]:
+                print('  ', url, results[url])
+
+            reopened = ProbeCache(os.path.join(tmp, 'probes.sqlite'))
+            print(f'caché: {len(reopened)} resultados persistidos, '
+                  f'{len(reopened.stale(expected))} pendientes de volver a comprobar')
+            reopened.close()
+            cache.close()
+    finally:
+        await runner.cleanup()
+
+
+if __name__ == '__main__':
+    asyncio.run(main(sys.argv[1:]))
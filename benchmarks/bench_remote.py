@@ -0,0 +1,110 @@
+"""Remote playlist download against a local stand-in server.
+
+    python -m benchmarks.bench_remote [count] [kbytes_per_ms]
+
+Serves a synthetic playlist from a local aiohttp server three ways (plain,
+gzip transfer encoding and as a ``.m3u.gz`` file), throttled to roughly
+``kbytes_per_ms`` so streaming matters, and honours ETag/If-Modified-Since.
+For each it reports the time to the first batch of channels, the full
+download and the cost of re-checking an unchanged playlist (a 304).
+"""
+import asyncio
+import gzip
+import hashlib
+import os
+import sys
+import tempfile
+import time
+
+from aiohttp import web
+
+from playlist_fetcher import PlaylistFetcher
+from playlist_snapshot import PlaylistSnapshots
+from channel_store import ChannelStore
+from benchmarks.synthetic import write_playlist
+
+LAST_MODIFIED = 'Wed, 01 Jan 2025 00:00:00 GMT'
+
+
+async def start_server(body, rate):
+    etag = '"%s"' % hashlib.sha1(body).hexdigest()
+    packed = gzip.compress(body)
+    piece = max(rate * 1024, 1024)
+
+    async def send(request, payload, compress):
+        if request.headers.get('If-None-Match') == etag or \
+                request.headers.get('If-Modified-Since') == LAST_MODIFIED:
+            return web.Response(status=304, headers={'ETag': etag})
+        response = web.StreamResponse(headers={'ETag': etag, 'Last-Modified': LAST_MODIFIED})
+        response.content_type = 'audio/x-mpegurl'
+        if compress:
+            response.enable_compression(web.ContentCoding.gzip)
+        else:
+            response.content_length = len(payload)
+        await response.prepare(request)
+        for start in range(0, len(payload), piece):
+            await response.write(payload[start:start + piece])
+            await asyncio.sleep(0.001)
+        await response.write_eof()
+        return response
+
+    app = web.Application()
+    app.router.add_get('/plain.m3u', lambda request: send(request, body, False))
+    app.router.add_get('/gzip.m3u', lambda request: send(request, body, True))
+    app.router.add_get('/lista.m3u.gz', lambda request: send(request, packed, False))
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, '127.0.0.1', 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    return runner, f'http://127.0.0.1:{port}'
+
+
+async def download(fetcher, url, validators=None):
+    store = ChannelStore()
+    first = None
+    start = time.perf_counter()
+
+    def on_channels(channels, received, total):
+        nonlocal first
+        if first is None:
+            first = time.perf_counter() - start
+        store.extend(channels)
+
+    response = await fetcher.fetch(url, validators, on_channels)
+    return response, store, first, time.perf_counter() - start
+
+
+async def main(argv):
+    count = int(argv[0]) if argv else 100_000
+    rate = int(argv[1]) if len(argv) > 1 else 64
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_playlist(os.path.join(tmp, 'lista.m3u'), count)
+        with open(path, 'rb') as f:
+            body = f.read()
+        snapshots = PlaylistSnapshots(tmp)
+        runner, base = await start_server(body, rate)
+        fetcher = PlaylistFetcher()
+        try:
+            for name in ('plain.m3u', 'gzip.m3u', 'lista.m3u.gz'):
+                url = f'{base}/{name}'
+                response, store, first, elapsed = await download(fetcher, url)
+                assert len(store) == count, (name, len(store))
+                snapshots.save_remote(url, store, response.etag, response.last_modified)
+
+                start = time.perf_counter()
+                again = await fetcher.fetch(url, snapshots.validators(url))
+                reopened = snapshots.load(url) if again.not_modified else None
+                check = time.perf_counter() - start
+                assert reopened is not None and len(reopened) == count
+
+                print(f'{name:13} {count} canales  primera tanda {first * 1000:7.1f} ms  '
+                      f'completa {elapsed * 1000:8.1f} ms ({count / elapsed:,.0f} canales/s)  '
+                      f'304+instantánea {check * 1000:6.1f} ms')
+        finally:
+            await fetcher.close()
+            await runner.cleanup()
+
+
+if __name__ == '__main__':
+    asyncio.run(main(sys.argv[1:]))
@@ -0,0 +1,90 @@
+"""Search latency: linear ``row_matcher`` scan versus ``SearchIndex``.
+
+    python -m benchmarks.bench_search [count ...]
+
+Prints index build time, per-query latency for both approaches and the cost
+of narrowing a query keystroke by keystroke with ``within``.  ``measure``
+is the search harness of ``benchmarks.suite``.
+"""
+import os
+import statistics
+import sys
+import tempfile
+import time
+from array import array
+
+import m3u_parser
+from channel_store import ChannelStore
+from search_index import SearchIndex, normalize, parse_query, row_matcher
+from benchmarks.synthetic import write_playlist
+
+QUERIES = ['c', 'tv', 'canal', 'sports 12', 'es |', 'hd', 'россия', 'fútbol', 'group:Deportes', 'no existe']
+TYPED = 'canal 4242'
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - start) * 1000, result
+
+
+def best_of(fn, repeat):
+    """Fastest of ``repeat`` runs in ms, and the last result."""
+    best = None
+    result = None
+    for _ in range(repeat):
+        elapsed, result = timed(fn)
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def measure(store, repeat=3):
+    """Index build, every query through the index and the scan, and typing ``TYPED``."""
+    build_ms, index = best_of(lambda: SearchIndex.build(store), repeat)
+    rows = store.all_rows()
+    indexed = []
+    scanned = []
+    queries = {}
+    for query in QUERIES:
+        key, group, tvg_id = parse_query(query)
+        key = normalize(key)
+        index_ms, found = best_of(lambda: index.search(key, None, group, tvg_id), repeat)
+        matches = row_matcher(store, key, group, tvg_id)
+        scan_ms, _ = best_of(lambda: array('I', filter(matches, rows)), 1)
+        indexed.append(index_ms)
+        scanned.append(scan_ms)
+        queries[query] = {'rows': len(found), 'index_ms': index_ms, 'scan_ms': scan_ms}
+
+    def type_query():
+        within = None
+        for size in range(1, len(TYPED) + 1):
+            within = index.search(TYPED[:size], within=within)
+        return within
+    typing_ms, _ = best_of(type_query, repeat)
+    return {
+        'index_build_ms': build_ms,
+        'query_p50_ms': statistics.median(indexed),
+        'query_max_ms': max(indexed),
+        'scan_p50_ms': statistics.median(scanned),
+        'scan_max_ms': max(scanned),
+        'typing_ms': typing_ms,
+        'queries': queries,
+    }
+
+
+def main(argv):
+    counts = [int(a) for a in argv] or [10_000, 100_000, 500_000]
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in counts:
+            path = write_playlist(os.path.join(tmp, f'{count}.m3u'), count)
+            store = ChannelStore(m3u_parser.iter_channels(path))
+            data = measure(store, repeat=1)
+            print(f'{count:,} canales: índice construido en {data["index_build_ms"]:.0f} ms')
+            for query, result in data['queries'].items():
+                print(f'  {query!r:16} {result["rows"]:>8} filas  lineal {result["scan_ms"]:8.2f} ms  '
+                      f'índice {result["index_ms"]:8.2f} ms')
+            print(f'  tecleando {TYPED!r} con within: {data["typing_ms"]:.2f} ms en total')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
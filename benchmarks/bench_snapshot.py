@@ -0,0 +1,59 @@
+"""Cold (parse) versus warm (snapshot) playlist open times.
+
+    python -m benchmarks.bench_snapshot [count ...]
+
+"First screen" is the time until the first 25 rows can be displayed; the
+full pass reads every name, as building the search index does.
+"""
+import os
+import sys
+import tempfile
+import time
+
+import m3u_parser
+from channel_store import ChannelStore
+from playlist_snapshot import PlaylistSnapshots, open_hashed
+from playlist_watcher import file_signature
+from benchmarks.synthetic import write_playlist
+
+
+def first_screen(store):
+    return [(store.display_name(row), store.url(row), store.logo(row)) for row in range(min(25, len(store)))]
+
+
+def main(argv):
+    counts = [int(a) for a in argv] or [100_000, 500_000]
+    with tempfile.TemporaryDirectory() as tmp:
+        snapshots = PlaylistSnapshots(tmp)
+        for count in counts:
+            path = write_playlist(os.path.join(tmp, f'{count}.m3u'), count)
+            size_mb = os.path.getsize(path) / 1024 / 1024
+
+            start = time.perf_counter()
+            # Como la app: firma antes de parsear y resumen de lo que se lee
+            signature = file_signature(path)
+            with open_hashed(path) as f:
+                store = ChannelStore(m3u_parser.iter_channels(f))
+                digest = f.raw.hexdigest()
+            first_screen(store)
+            cold = time.perf_counter() - start
+
+            start = time.perf_counter()
+            snapshots.save(path, store, signature, digest)
+            save = time.perf_counter() - start
+
+            start = time.perf_counter()
+            warm_store = snapshots.load(path)
+            first_screen(warm_store)
+            warm = time.perf_counter() - start
+            for _ in warm_store.names:
+                pass
+            full = time.perf_counter() - start
+
+            print(f'{count:>9} canales ({size_mb:.0f} MB)  frío {cold * 1000:8.1f} ms  '
+                  f'guardado {save * 1000:7.1f} ms  caliente {warm * 1000:6.2f} ms  '
+                  f'caliente+recorrido {full * 1000:7.1f} ms')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,117 @@
+"""Startup cost: import time of the app module and time to first frame.
+
+    python -m benchmarks.bench_startup [--runs N] [--module pym3u]
+
+Each measurement runs in a fresh interpreter.  Import time comes from
+``python -X importtime``: the total, the slowest top-level imports and
+whether any of the dependencies that should load lazily (libVLC, aiohttp,
+the file manager, dialogs) were pulled in at startup.  Time to first frame
+is measured from spawning the process until kivy has swapped the first
+frame of the app window.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# No deben cargarse hasta que el usuario haga algo que los necesite
+LAZY = ('vlc', 'aiohttp', 'kivymd.uix.filemanager', 'kivymd.uix.dialog')
+
+FIRST_FRAME = '''
+import sys, time
+from kivy.core.window import Window
+from kivy.clock import Clock
+import pym3u
+
+app = pym3u.PyM3U()
+
+def on_flip(*args):
+    print('FIRST_FRAME', time.time(), flush=True)
+    Window.unbind(on_flip=on_flip)
+    Clock.schedule_once(lambda dt: app.stop(), 0)
+
+Window.bind(on_flip=on_flip)
+app.run()
+'''
+
+
+def environment():
+    env = dict(os.environ)
+    env.update(KIVY_NO_ARGS='1', KIVY_NO_CONSOLELOG='1', PYTHONDONTWRITEBYTECODE='1')
+    return env
+
+
+def import_times(module):
+    """``{module: (self_us, cumulative_us)}`` for one cold ``import module``."""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT, env=environment(), capture_output=True, text=True
+    )
+    if result.returncode:
+        raise RuntimeError(result.stderr.strip().splitlines()[-1])
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        own, cumulative, name = line[len('import time:'):].split('|')
+        times[name.strip()] = (int(own), int(cumulative), len(name) - len(name.lstrip()))
+    return times
+
+
+def first_frame():
+    started = time.time()
+    result = subprocess.run(
+        [sys.executable, '-c', FIRST_FRAME],
+        cwd=ROOT, env=environment(), capture_output=True, text=True, timeout=120
+    )
+    for line in result.stdout.splitlines():
+        if line.startswith('FIRST_FRAME'):
+            return float(line.split()[1]) - started
+    raise RuntimeError((result.stderr.strip().splitlines() or ['sin ventana'])[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5)
+    parser.add_argument('--module', default='pym3u')
+    parser.add_argument('--top', type=int, default=10)
+    args = parser.parse_args(argv)
+
+    totals = []
+    times = {}
+    for _ in range(args.runs):
+        try:
+            times = import_times(args.module)
+        except RuntimeError as e:
+            print(f'import {args.module}: {e}')
+            break
+        totals.append(sum(own for own, _, _ in times.values()))
+    if totals:
+        print(f'import {args.module}: mediana {statistics.median(totals) / 1000:.1f} ms '
+              f'({len(times)} módulos, {args.runs} ejecuciones)')
+        # Sólo los imports de primer nivel: su acumulado incluye el resto
+        top = sorted(((cumulative, name) for name, (_, cumulative, depth) in times.items() if depth <= 1),
+                     reverse=True)[:args.top]
+        for cumulative, name in top:
+            print(f'  {cumulative / 1000:8.1f} ms  {name}')
+        loaded = [name for name in LAZY if name in times]
+        print('cargados al arrancar: ' + (', '.join(loaded) if loaded else 'ninguno de ' + ', '.join(LAZY)))
+
+    frames = []
+    for _ in range(args.runs):
+        try:
+            frames.append(first_frame())
+        except (RuntimeError, subprocess.TimeoutExpired) as e:
+            print(f'primer frame: {e}')
+            break
+    if frames:
+        print(f'primer frame: mediana {statistics.median(frames) * 1000:.0f} ms, '
+              f'mínimo {min(frames) * 1000:.0f} ms')
+
+
+if __name__ == '__main__':
+    main()
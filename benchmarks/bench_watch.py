@@ -0,0 +1,112 @@
+"""Watched playlists: reload cost against the size of the change.
+
+    python -m benchmarks.bench_watch [count] [changes ...]
+
+Loads a synthetic playlist, then edits that many entries of the file (a
+third renamed, a third removed, a third new channels inserted at random
+places) and reloads it twice: through ``PlaylistBaseline`` (diff the file,
+append only the new rows, update the search and group indexes) and by
+parsing and indexing the whole file again, as a reload without a watcher
+would.  Also prints how long each watcher mode takes to notice a write.
+"""
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+import m3u_parser
+from channel_groups import GroupIndex
+from channel_store import ChannelStore
+from playlist_diff import PlaylistBaseline
+from playlist_watcher import HAS_INOTIFY, PlaylistWatcher
+from search_index import SearchIndex
+from benchmarks.synthetic import write_playlist
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return (time.perf_counter() - start) * 1000, result
+
+
+def edit(path, changes, rng, step):
+    with open(path, encoding='utf-8') as f:
+        lines = f.read().splitlines(keepends=True)
+    header = lines[0]
+    entries = [lines[i] + lines[i + 1] for i in range(1, len(lines), 2)]
+    for i in range(changes):
+        kind = i % 3
+        if kind == 0:
+            j = rng.randrange(len(entries))
+            entries[j] = entries[j].replace(',', f',Nuevo nombre {step} ', 1)
+        elif kind == 1:
+            del entries[rng.randrange(len(entries))]
+        else:
+            entries.insert(
+                rng.randrange(len(entries)),
+                f'#EXTINF:-1 group-title="Estrenos",Estreno {step}-{i}\nhttp://streams.example.com/new/{step}/{i}.m3u8\n'
+            )
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(header + ''.join(entries))
+
+
+def full_reload(path):
+    store = ChannelStore(m3u_parser.iter_channels(path))
+    SearchIndex.build(store)
+    GroupIndex.build(store)
+    return store
+
+
+def incremental_reload(path, baseline, index, groups):
+    with open(path, 'rb') as f:
+        data = f.read()
+    diff_ms, diff = timed(lambda: baseline.diff(data))
+    start = time.perf_counter()
+    replaced, added = baseline.apply(diff)
+    index.update()
+    groups.apply_changes(replaced, added, diff.removed)
+    return diff_ms, (time.perf_counter() - start) * 1000
+
+
+def notice_latency(path, use_inotify):
+    noticed = threading.Event()
+    watcher = PlaylistWatcher(path, lambda path: noticed.set(), interval=0.5, settle=0.1,
+                              use_inotify=use_inotify).start()
+    time.sleep(0.6)
+    start = time.perf_counter()
+    with open(path, 'a', encoding='utf-8') as f:
+        f.write('#EXTINF:-1,Último\nhttp://streams.example.com/last.m3u8\n')
+    noticed.wait(5)
+    elapsed = (time.perf_counter() - start) * 1000
+    watcher.stop(timeout=1)
+    return watcher.mode, elapsed
+
+
+def main(argv):
+    count = int(argv[0]) if argv else 100_000
+    steps = [int(a) for a in argv[1:]] or [1, 10, 100, 1_000, 10_000]
+    rng = random.Random(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_playlist(os.path.join(tmp, 'lista.m3u'), count)
+        store = ChannelStore(m3u_parser.iter_channels(path))
+        baseline = PlaylistBaseline.from_file(path, store)
+        index = SearchIndex.build(store)
+        groups = GroupIndex.build(store)
+        print(f'{count:,} canales')
+        print(f'{"cambios":>8} {"diff":>10} {"aplicar":>10} {"recarga completa":>18}')
+        for step, changes in enumerate(steps):
+            edit(path, changes, rng, step)
+            diff_ms, apply_ms = incremental_reload(path, baseline, index, groups)
+            full_ms, _ = timed(lambda: full_reload(path))
+            print(f'{changes:>8,} {diff_ms:>8.0f} ms {apply_ms:>8.1f} ms {full_ms:>15.0f} ms')
+
+        modes = [True, False] if HAS_INOTIFY else [False]
+        for use_inotify in modes:
+            mode, elapsed = notice_latency(path, use_inotify)
+            print(f'aviso de cambio ({mode}): {elapsed:.0f} ms')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
@@ -0,0 +1,95 @@
+"""Zap latency: a fresh libVLC instance per channel versus ``PlayerEngine``,
+with and without pre-parsing the next channel.
+
+    python -m benchmarks.bench_zap media [media ...] [--rounds N]
+
+``media`` are local files or loopback URLs (e.g. ``http://127.0.0.1:8000/a.ts``
+served with ``python -m http.server``).  Each run zaps through them in a
+loop and reports the time from asking for a channel until libVLC reports
+playback time moving, through the engine's ``on_zap`` hook.  The
+``precarga`` run pre-parses the next channel the way the app does after
+every switch; the ``sin precarga`` run does not, so the difference between
+the two is what ``preload`` saves.
+"""
+import statistics
+import sys
+import threading
+import time
+
+import vlc
+
+from player_engine import PlayerEngine
+
+TIMEOUT = 15
+
+
+def legacy(media, rounds):
+    # Como el antiguo play_stream: vlc.Instance() y reproductor nuevos en cada cambio
+    latencies = []
+    player = None
+    for i in range(rounds * len(media)):
+        started = time.perf_counter()
+        if player:
+            player.stop()
+        instance = vlc.Instance('--quiet')
+        player = instance.media_player_new()
+        playing = threading.Event()
+        player.event_manager().event_attach(
+            vlc.EventType.MediaPlayerTimeChanged, lambda event: playing.set()
+        )
+        player.set_media(instance.media_new(media[i % len(media)]))
+        player.play()
+        if playing.wait(TIMEOUT):
+            latencies.append(time.perf_counter() - started)
+    if player:
+        player.stop()
+    return latencies
+
+
+def engine(media, rounds, preload=True):
+    latencies = []
+    playing = threading.Event()
+
+    def on_zap(url, latency, preloaded):
+        latencies.append(latency)
+        playing.set()
+
+    player = PlayerEngine(on_zap=on_zap)
+    try:
+        for i in range(rounds * len(media)):
+            playing.clear()
+            player.play(media[i % len(media)])
+            if preload:
+                player.preload([(media[(i + 1) % len(media)], ())])
+            playing.wait(TIMEOUT)
+        print(f'  precargados {player.stats["preloaded"]} de {player.stats["zaps"]} cambios')
+    finally:
+        player.close()
+    return latencies
+
+
+def main(argv):
+    rounds = 3
+    if '--rounds' in argv:
+        at = argv.index('--rounds')
+        rounds = int(argv[at + 1])
+        argv = argv[:at] + argv[at + 2:]
+    if not argv:
+        print(__doc__)
+        return
+    runs = (
+        ('legacy', legacy),
+        ('sin precarga', lambda media, rounds: engine(media, rounds, preload=False)),
+        ('precarga', engine),
+    )
+    for label, run in runs:
+        latencies = run(argv, rounds)
+        if not latencies:
+            print(f'{label:12} sin reproducción')
+            continue
+        print(f'{label:12} {len(latencies)} cambios  mediana {statistics.median(latencies) * 1000:7.1f} ms  '
+              f'máx {max(latencies) * 1000:7.1f} ms')
+
+
+if __name__ == '__main__':
+    main(sys.argv[1:])
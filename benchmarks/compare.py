@@ -0,0 +1,45 @@
+"""Compare two benchmark results files.
+
+    python -m benchmarks.compare old.json new.json [--threshold 10] [--all]
+
+Prints the metrics that changed by at least ``threshold`` percent (all of
+them with ``--all``), marking regressions and improvements, and exits with
+status 1 if any metric got worse, so it can gate a CI job.
+"""
+import argparse
+import sys
+
+from benchmarks.results import compare, load_results
+
+
+def describe(meta):
+    commit = (meta.get('commit') or '?')[:10]
+    dirty = ' (con cambios locales)' if meta.get('dirty') else ''
+    return f'{commit}{dirty} {meta.get("subject") or ""}  [{meta.get("python")}, {meta.get("cpus")} CPU]'
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('old')
+    parser.add_argument('new')
+    parser.add_argument('--threshold', type=float, default=10, help='cambio mínimo en %%')
+    parser.add_argument('--all', action='store_true', help='mostrar también lo que no cambió')
+    args = parser.parse_args(argv)
+    old, new = load_results(args.old), load_results(args.new)
+    print(f'antes:   {describe(old["meta"])}')
+    print(f'después: {describe(new["meta"])}')
+
+    rows = compare(old, new, args.threshold / 100)
+    worse = 0
+    for name, before, after, change, verdict in rows:
+        if not verdict and not args.all:
+            continue
+        worse += verdict == 'peor'
+        percent = f'{change * 100:+7.1f}%' if change is not None else '      -'
+        print(f'{name:60} {before:>12.4g} -> {after:<12.4g} {percent}  {verdict}')
+    print(f'{len(rows)} métricas comparadas, {worse} peor(es)')
+    return 1 if worse else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,177 @@
+"""Local aiohttp logo server with configurable latency and failures.
+
+    python -m benchmarks.logo_server [--port 8765] [--latency 50] [--jitter 20]
+                                     [--errors 0.05] [--missing 0.02] [--broken 0.01]
+                                     [--stalls 0.0]
+
+Serves ``/logo/<name>.png`` (any name) as a small PNG after ``latency``
+milliseconds, plus up to ``jitter`` more.  A fraction of requests fails:
+``errors`` answer 503 (the fetcher retries those), ``missing`` 404,
+``broken`` 200 with a body that is not an image and ``stalls`` never answer
+within the client's timeout.  Which request fails depends only on the seed,
+the logo name and how many times that name was asked for, so a run is
+reproducible whatever order the requests arrive in.
+
+Logos carry an ETag and honour ``If-None-Match``, so cache revalidation can
+be measured too.  Point a realistic synthetic playlist at it with
+``write_playlist(..., style='realistic', logo_base=server.url('logo'))``
+or run it standalone while trying the app.
+"""
+import argparse
+import asyncio
+import random
+import struct
+import zlib
+
+from aiohttp import web
+
+
+def make_png(size=48, seed=0):
+    """A valid ``size`` x ``size`` RGB PNG with a deterministic colour."""
+    rng = random.Random(seed)
+    pixel = bytes((rng.randrange(256), rng.randrange(256), rng.randrange(256)))
+    raw = b''.join(b'\0' + pixel * size for _ in range(size))
+
+    def chunk(kind, data):
+        return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data))
+    header = struct.pack('>IIBBBBB', size, size, 8, 2, 0, 0, 0)
+    return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', header)
+            + chunk(b'IDAT', zlib.compress(raw)) + chunk(b'IEND', b''))
+
+
+class LogoServer:
+    """Serve logos on 127.0.0.1 from the running event loop."""
+
+    def __init__(self, latency=0.02, jitter=0.0, errors=0.0, missing=0.0, broken=0.0,
+                 stalls=0.0, stall_time=30.0, size=48, variants=16, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.errors = errors
+        self.missing = missing
+        self.broken = broken
+        self.stalls = stalls
+        self.stall_time = stall_time
+        self.seed = seed
+        self.images = [make_png(size, seed + i) for i in range(variants)]
+        self.base = None
+        self._runner = None
+        self._attempts = {}
+        self._closing = None
+        self.stats = {
+            'requests': 0,
+            'served': 0,
+            'not_modified': 0,
+            'errors': 0,
+            'missing': 0,
+            'broken': 0,
+            'stalled': 0,
+            'bytes': 0,
+        }
+
+    def url(self, prefix='logo'):
+        return f'{self.base}/{prefix}'
+
+    def _roll(self, name, attempt):
+        # Mismo resultado para el mismo logo e intento, llegue cuando llegue
+        return random.Random(f'{self.seed}:{name}:{attempt}').random()
+
+    async def _logo(self, request):
+        name = request.match_info['name']
+        attempt = self._attempts.get(name, 0)
+        self._attempts[name] = attempt + 1
+        stats = self.stats
+        stats['requests'] += 1
+        roll = self._roll(name, attempt)
+        delay = self.latency + self.jitter * self._roll(name, -1 - attempt)
+        await asyncio.sleep(delay)
+
+        limit = self.stalls
+        if roll < limit:
+            stats['stalled'] += 1
+            # close() las despierta para no esperar a que venzan
+            try:
+                await asyncio.wait_for(self._closing.wait(), self.stall_time)
+            except asyncio.TimeoutError:
+                pass
+            raise web.HTTPGatewayTimeout()
+        limit += self.errors
+        if roll < limit:
+            stats['errors'] += 1
+            raise web.HTTPServiceUnavailable()
+        limit += self.missing
+        if roll < limit:
+            stats['missing'] += 1
+            raise web.HTTPNotFound()
+        limit += self.broken
+        if roll < limit:
+            stats['broken'] += 1
+            return web.Response(body=b'<html>no es una imagen</html>', content_type='text/html')
+
+        variant = zlib.crc32(name.encode()) % len(self.images)
+        etag = f'"{self.seed}-{variant}"'
+        if request.headers.get('If-None-Match') == etag:
+            stats['not_modified'] += 1
+            return web.Response(status=304, headers={'ETag': etag})
+        body = self.images[variant]
+        stats['served'] += 1
+        stats['bytes'] += len(body)
+        return web.Response(body=body, content_type='image/png', headers={'ETag': etag})
+
+    async def start(self, host='127.0.0.1', port=0):
+        self._closing = asyncio.Event()
+        app = web.Application()
+        app.router.add_get('/logo/{name}', self._logo)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        self.base = f'http://{host}:{port}'
+        return self
+
+    async def close(self):
+        if self._runner is not None:
+            self._closing.set()
+            await self._runner.cleanup()
+            self._runner = None
+
+    async def __aenter__(self):
+        return await self.start()
+
+    async def __aexit__(self, *exc):
+        await self.close()
+
+
+async def serve(args):
+    server = LogoServer(args.latency / 1000, args.jitter / 1000, args.errors, args.missing,
+                        args.broken, args.stalls, seed=args.seed)
+    await server.start(args.host, args.port)
+    print(f'Sirviendo logos en {server.url()}/<nombre>.png')
+    try:
+        while True:
+            await asyncio.sleep(10)
+            print(server.stats)
+    finally:
+        await server.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Servidor local de logos para pruebas')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency', type=float, default=50, help='milisegundos')
+    parser.add_argument('--jitter', type=float, default=0, help='milisegundos')
+    parser.add_argument('--errors', type=float, default=0.0, help='fracción de respuestas 503')
+    parser.add_argument('--missing', type=float, default=0.0, help='fracción de respuestas 404')
+    parser.add_argument('--broken', type=float, default=0.0, help='fracción de respuestas que no son imagen')
+    parser.add_argument('--stalls', type=float, default=0.0, help='fracción de peticiones que no responden')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
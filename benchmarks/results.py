@@ -0,0 +1,111 @@
+"""Benchmark results as JSON files that can be compared across commits.
+
+A results file holds ``meta`` (commit, whether the tree had local changes,
+Python, platform, CPUs, when and with which arguments it ran) and
+``results``: nested dicts of numbers, e.g.
+``results['parse']['100000']['channels_per_s']``.  ``flatten`` turns them
+into ``'parse/100000/channels_per_s'`` keys, which ``compare`` matches up.
+
+Metric names say which way is better: ``*_ms``, ``*_s`` and ``*_bytes``
+should go down, ``*_per_s`` and ``*_rate`` up.  Anything else (counts,
+sizes) is listed but never called a regression.
+"""
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(ROOT, 'benchmarks', 'results')
+
+LOWER_IS_BETTER = ('_ms', '_s', '_bytes', '_us')
+HIGHER_IS_BETTER = ('_per_s', '_rate')
+
+
+def git(*args):
+    try:
+        result = subprocess.run(['git', *args], cwd=ROOT, capture_output=True, text=True, timeout=30)
+    except (OSError, subprocess.SubprocessError):
+        return None
+    return result.stdout.strip() if result.returncode == 0 else None
+
+
+def environment(argv=None):
+    """Where and on what the benchmarks ran."""
+    return {
+        'commit': git('rev-parse', 'HEAD'),
+        'subject': git('log', '-1', '--format=%s'),
+        'dirty': bool(git('status', '--porcelain', '--untracked-files=no')),
+        'python': sys.version.split()[0],
+        'implementation': platform.python_implementation(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'argv': list(sys.argv[1:] if argv is None else argv),
+    }
+
+
+def default_path():
+    commit = git('rev-parse', '--short', 'HEAD') or 'sin-commit'
+    return os.path.join(RESULTS_DIR, f'{time.strftime("%Y%m%d-%H%M%S")}-{commit}.json')
+
+
+def write_results(results, path=None, argv=None):
+    """Write ``results`` with the environment to ``path`` and return the path."""
+    path = path or default_path()
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    data = {'meta': environment(argv), 'results': results}
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+        f.write('\n')
+    os.replace(tmp_path, path)
+    return path
+
+
+def load_results(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def flatten(results, prefix=''):
+    """``{'a/b/c': number}`` for every number nested in ``results``."""
+    flat = {}
+    for key, value in results.items():
+        name = f'{prefix}/{key}' if prefix else str(key)
+        if isinstance(value, dict):
+            flat.update(flatten(value, name))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def direction(name):
+    """+1 if bigger is better for this metric, -1 if smaller is, 0 if neither."""
+    if name.endswith(HIGHER_IS_BETTER):
+        return 1
+    if name.endswith(LOWER_IS_BETTER):
+        return -1
+    return 0
+
+
+def compare(old, new, threshold=0.1):
+    """``[(name, old, new, change, verdict)]`` for the metrics both runs have.
+
+    ``change`` is the relative difference; ``verdict`` is ``'mejor'``,
+    ``'peor'`` or ``''`` when within ``threshold`` or not comparable.
+    """
+    before = flatten(old['results'])
+    after = flatten(new['results'])
+    rows = []
+    for name in sorted(before.keys() & after.keys()):
+        a, b = before[name], after[name]
+        change = (b - a) / abs(a) if a else None
+        verdict = ''
+        sign = direction(name)
+        if sign and change is not None and abs(change) >= threshold:
+            verdict = 'mejor' if change * sign > 0 else 'peor'
+        rows.append((name, a, b, change, verdict))
+    return rows
@@ -0,0 +1,191 @@
+"""Reproducible benchmark suite: parse, search, batch loading and logos.
+
+    python -m benchmarks.suite [--sizes 1000,10000,100000] [--only parse,search,load,sort,logos]
+                               [--style realistic] [--repeat 3] [--logos 500]
+                               [--latency 20] [--errors 0.05] [--out FILE]
+
+Everything runs headless on playlists from ``benchmarks.synthetic`` (the
+same seed gives the same file) and, for logos, against a local
+``LogoServer``.  Results go to ``benchmarks/results/<date>-<commit>.json``
+unless ``--out`` says otherwise; compare two runs with
+``python -m benchmarks.compare old.json new.json``.  Sizes accept ``k`` and
+``M`` suffixes: ``--sizes 1k,100k,1M``.
+
+- parse (``bench_parse.measure``): ``m3u_parser.iter_channels`` end to end,
+  seconds per 10k lines (the number the app's metrics report),
+  ``parse_extinf`` per line and building the ``ChannelStore``.
+- search (``bench_search.measure``): index build, per-query latency through
+  ``SearchIndex`` and through the ``row_matcher`` scan used while no index
+  exists, and narrowing a query keystroke by keystroke.
+- load: what ``parse_playlist`` and ``publish_channels`` do during a load,
+  without kivy: ``m3u_parser.iter_batches`` chunks appended to the store
+  and to the visible view with ``ChannelStore.extend_view``, with and
+  without an active search.  ``publish_*`` is the time the UI thread would
+  spend.
+- sort: ``SortIndex`` build, switching the whole list to each order and
+  ordering search results by intersection, next to sorting channel dicts
+  with a key function as a naive list would.
+- logos (``bench_logos.measure``): the app's download path against the
+  local server, then a second pass revalidating every cached logo.
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+from array import array
+
+import m3u_parser
+from channel_sort import SortIndex
+from channel_store import ChannelStore
+from search_index import SearchIndex, normalize, parse_query, row_matcher
+from benchmarks import bench_logos, bench_parse, bench_search
+from benchmarks.bench_search import best_of
+from benchmarks.results import write_results
+from benchmarks.synthetic import write_playlist
+
+HARNESSES = ('parse', 'search', 'load', 'sort', 'logos')
+SORT_QUERIES = ('canal', 'tv', 'es')
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(int(len(values) * q), len(values) - 1)] if values else 0.0
+
+
+def simulate_load(path, search=None):
+    """Parse ``path`` in the app's chunks; return timings of the UI side."""
+    store = ChannelStore()
+    view = range(0)
+    matches = None
+    if search is not None:
+        key, group, tvg_id = parse_query(search)
+        matches = row_matcher(store, normalize(key), group, tvg_id)
+    publish = []
+    first = None
+    start = time.perf_counter()
+    # Los mismos lotes que parse_playlist y lo que append_channels hace con ellos
+    for chunk in m3u_parser.iter_batches(m3u_parser.iter_channels(path)):
+        began = time.perf_counter()
+        offset = len(store)
+        store.extend(chunk)
+        rows = range(offset, len(store))
+        if matches is not None:
+            rows = array('I', filter(matches, rows))
+        view = store.extend_view(view, offset, rows)
+        publish.append(time.perf_counter() - began)
+        if first is None:
+            first = time.perf_counter() - start
+    total = time.perf_counter() - start
+    if first is None:
+        first = total
+    return {
+        'first_batch_ms': first * 1000,
+        'total_ms': total * 1000,
+        'batches': len(publish),
+        'publish_total_ms': sum(publish) * 1000,
+        'publish_p95_ms': percentile(publish, 0.95) * 1000,
+        'publish_max_ms': max(publish, default=0) * 1000,
+        'visible_rows': len(view),
+    }
+
+
+def bench_load(path):
+    return {
+        'plain': simulate_load(path),
+        'searching': simulate_load(path, 'canal'),
+    }
+
+
+def bench_sort(store, repeat):
+    build_ms, index = best_of(lambda: SortIndex.build(store), 1)
+    search = SearchIndex.build(store)
+    rows = store.all_rows()
+    result = {'build_ms': build_ms}
+    for order in ('name', 'group', 'id'):
+        switch_ms, _ = best_of(lambda: index.sort(rows, order), repeat)
+        result[f'switch_{order}_ms'] = switch_ms
+    views = [search.search(query) for query in SORT_QUERIES]
+    result['search_rows'] = sum(map(len, views)) // len(views)
+    result['search_sorted_ms'] = statistics.mean(
+        best_of(lambda: index.sort(view, 'name'), repeat)[0] for view in views
+    )
+
+    def naive():
+        channels = [store.get(row) for row in rows]
+        return sorted(channels, key=lambda channel: channel['name'].split('|')[-1].strip().lower())
+    result['naive_dict_sort_ms'], _ = best_of(naive, 1)
+    return result
+
+
+def parse_size(text):
+    text = text.strip().lower()
+    factor = 1
+    if text.endswith('k'):
+        factor, text = 1000, text[:-1]
+    elif text.endswith('m'):
+        factor, text = 1_000_000, text[:-1]
+    return int(float(text) * factor)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', default='1k,10k,100k', help='canales por lista, p. ej. 1k,100k,1M')
+    parser.add_argument('--only', default=','.join(HARNESSES), help='pruebas a ejecutar')
+    parser.add_argument('--style', default='realistic', choices=('plain', 'realistic'))
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--logos', type=int, default=500, help='logos a descargar')
+    parser.add_argument('--latency', type=float, default=20, help='latencia del servidor de logos (ms)')
+    parser.add_argument('--errors', type=float, default=0.05, help='fracción de respuestas 503')
+    parser.add_argument('--out', help='fichero JSON de resultados')
+    args = parser.parse_args(argv)
+    sizes = [parse_size(size) for size in args.sizes.split(',') if size.strip()]
+    only = [name.strip() for name in args.only.split(',') if name.strip()]
+    unknown = set(only) - set(HARNESSES)
+    if unknown:
+        parser.error(f'pruebas desconocidas: {", ".join(sorted(unknown))}')
+
+    results = {name: {} for name in only}
+    with tempfile.TemporaryDirectory() as tmp:
+        for count in sizes:
+            path = write_playlist(os.path.join(tmp, f'{count}.m3u'), count, args.seed, args.style)
+            if 'parse' in only:
+                results['parse'][count] = data = bench_parse.measure(path, args.repeat)
+                print(f'parse  {count:>9,}  {data["parse_ms"]:9.0f} ms  {data["channels_per_s"]:>10,.0f} canales/s'
+                      f'  {data["per_10k_lines_s"] * 1000:.1f} ms/10k líneas')
+            if 'search' in only:
+                store = ChannelStore(m3u_parser.iter_channels(path))
+                results['search'][count] = data = bench_search.measure(store, args.repeat)
+                print(f'search {count:>9,}  índice {data["index_build_ms"]:.0f} ms  consulta p50 '
+                      f'{data["query_p50_ms"]:.2f} ms (recorrido {data["scan_p50_ms"]:.1f} ms)'
+                      f'  tecleando {data["typing_ms"]:.1f} ms')
+                del store
+            if 'load' in only:
+                results['load'][count] = data = bench_load(path)
+                for mode, load in data.items():
+                    print(f'load   {count:>9,}  {mode:9}  primer lote {load["first_batch_ms"]:.1f} ms'
+                          f'  total {load["total_ms"]:.0f} ms  lote máx {load["publish_max_ms"]:.1f} ms')
+            if 'sort' in only:
+                store = ChannelStore(m3u_parser.iter_channels(path))
+                results['sort'][count] = data = bench_sort(store, args.repeat)
+                print(f'sort   {count:>9,}  índice {data["build_ms"]:.0f} ms  cambio de orden '
+                      f'{data["switch_name_ms"]:.3f} ms  búsqueda ordenada {data["search_sorted_ms"]:.1f} ms'
+                      f'  (dicts {data["naive_dict_sort_ms"]:.0f} ms)')
+                del store
+        if 'logos' in only:
+            path = write_playlist(os.path.join(tmp, 'logos.m3u'), args.logos * 2, args.seed, 'realistic')
+            data = asyncio.run(bench_logos.measure(path, args.logos, args.latency / 1000, args.errors))
+            results['logos'][args.logos] = data
+            for mode, logos in data.items():
+                print(f'logos  {args.logos:>9,}  {mode:10}  {logos["total_ms"]:.0f} ms'
+                      f'  {logos["logos_per_s"]:,.0f} logos/s  p95 {logos["fetch_p95_ms"]:.0f} ms'
+                      f'  {logos["server_requests"]} peticiones')
+
+    path = write_results(results, args.out, argv)
+    print(f'Resultados en {path}')
+
+
+if __name__ == '__main__':
+    main()
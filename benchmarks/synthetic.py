@@ -0,0 +1,150 @@
+"""Deterministic synthetic M3U playlists and XMLTV guides for the benchmarks.
+
+``write_playlist`` has two styles.  ``plain`` writes one uniform entry per
+channel (every attribute present, ``PREFIX | Canal N`` names), which keeps
+older results comparable.  ``realistic`` mixes what provider lists
+actually contain: missing or empty attributes, ``#EXTGRP`` instead of
+``group-title``, commas inside quoted names, ``#EXTVLCOPT`` lines, catch-up
+and channel-number attributes, names in several scripts, and ``|``-prefixed
+names written in several ways.  Both only depend on ``seed``.
+"""
+import gzip
+import random
+import time
+from xml.sax.saxutils import escape
+
+GROUPS = ['Noticias', 'Deportes', 'Cine', 'Infantil', 'Música', 'Documentales']
+PREFIXES = ['ES', 'AR', 'MX', 'US', 'UK', 'CUL']
+
+# Nombres en otros alfabetos, con acentos y emoji
+UNICODE_NAMES = [
+    'Télé Québec', 'Fútbol Ñ', 'Россия 24', 'Первый канал', 'الجزيرة', 'CCTV-1 综合',
+    'NHK総合', 'KBS 한국', 'ΕΡΤ Ελληνικά', 'Türkiye Haber', 'Ελληνικό Σινεμά', '📺 Cine 24h',
+    'Ποδόσφαιρο', 'Canal Zürich', 'Đài Việt', 'हिंदी समाचार',
+]
+WORDS = ['Canal', 'TV', 'Sports', 'Cine', 'Noticias', 'Kids', 'Music', 'Premium', 'Plus', 'Max', '24h']
+QUALITIES = ['', '', ' HD', ' FHD', ' 4K', ' SD', ' HEVC']
+# Formas de separar el prefijo del país que aparecen en listas reales
+PREFIX_FORMATS = ['{p} | {n}', '{p}| {n}', '|{p}| {n}', '{p}: {n}', '[{p}] {n}', '{n}']
+REALISTIC_GROUPS = GROUPS + [
+    'ES | Deportes', 'ES | Cine', 'AR | Noticias', 'VOD | Películas 2024', 'Adultos',
+    '24/7', 'UK | Sport', 'Infantil y Familia', 'Radio', 'Ελληνικά', 'Русские',
+]
+USER_AGENTS = ['VLC/3.0.20 LibVLC/3.0.20', 'Mozilla/5.0 (SMART-TV; Linux; Tizen 6.0)']
+
+
+def channel_lines(index, rng):
+    group = rng.choice(GROUPS)
+    prefix = rng.choice(PREFIXES)
+    name = f'{prefix} | Canal {index} {group}'
+    return (
+        f'#EXTINF:-1 tvg-id="canal{index}.{prefix.lower()}" tvg-name="{name}" '
+        f'tvg-logo="http://logos.example.com/{index % 997}.png" '
+        f'group-title="{group}",{name}\n'
+        f'http://streams.example.com/live/{index}.m3u8\n'
+    )
+
+
+def realistic_channel_lines(index, rng, logo_base='http://logos.example.com'):
+    """One entry of a provider-style playlist: attributes come and go."""
+    prefix = rng.choice(PREFIXES)
+    roll = rng.random()
+    if roll < 0.15:
+        base = rng.choice(UNICODE_NAMES)
+    elif roll < 0.2:
+        # Comas dentro del nombre entre comillas
+        base = f'{rng.choice(WORDS)}, {rng.choice(WORDS)}'
+    else:
+        base = f'{rng.choice(WORDS)} {rng.choice(WORDS)}'
+    name = rng.choice(PREFIX_FORMATS).format(p=prefix, n=f'{base} {index}{rng.choice(QUALITIES)}')
+    group = rng.choice(REALISTIC_GROUPS)
+
+    attrs = []
+    roll = rng.random()
+    if roll < 0.7:
+        attrs.append(f'tvg-id="{base.split()[0].lower()}{index}.{prefix.lower()}"')
+    elif roll < 0.8:
+        attrs.append('tvg-id=""')
+    if rng.random() < 0.6:
+        attrs.append(f'tvg-name="{name}"')
+    if rng.random() < 0.85:
+        # Muchos canales comparten logo
+        attrs.append(f'tvg-logo="{logo_base}/{rng.randrange(max(index // 4, 1) + 50)}.png"')
+    grouped = rng.random()
+    if grouped < 0.8:
+        attrs.append(f'group-title="{group}"')
+    if rng.random() < 0.3:
+        attrs.append(f'tvg-chno="{index + 1}"')
+    if rng.random() < 0.1:
+        attrs.append(f'catchup="default" catchup-days="{rng.choice((1, 3, 7))}"')
+    if rng.random() < 0.05:
+        attrs.append('tvg-shift="+1"')
+    lines = [f'#EXTINF:{rng.choice(("-1", "-1", "0"))} {" ".join(attrs)},{name}']
+    if 0.8 <= grouped < 0.9:
+        lines.append(f'#EXTGRP:{group}')
+    if rng.random() < 0.08:
+        lines.append(f'#EXTVLCOPT:http-user-agent={rng.choice(USER_AGENTS)}')
+    roll = rng.random()
+    if roll < 0.6:
+        url = f'http://streams.example.com/live/{index}.m3u8'
+    elif roll < 0.9:
+        url = f'http://provider.example.net:8080/user/pass/{index}.ts'
+    elif roll < 0.97:
+        url = f'https://cdn.example.org/hls/{prefix.lower()}/{index}/index.m3u8?token={rng.getrandbits(48):x}'
+    else:
+        url = f'udp://@239.0.{index // 256 % 256}.{index % 256}:1234'
+    lines.append(url)
+    return '\n'.join(lines) + '\n'
+
+
+def write_playlist(path, count, seed=0, style='plain', logo_base='http://logos.example.com'):
+    """Write ``count`` channels to ``path`` and return the path.
+
+    ``style`` is ``plain`` or ``realistic`` (see the module docstring);
+    realistic logos point at ``logo_base`` so they can be served locally.
+    """
+    rng = random.Random(seed)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write('#EXTM3U x-tvg-url="http://epg.example.com/guide.xml"\n')
+        if style == 'realistic':
+            for i in range(count):
+                f.write(realistic_channel_lines(i, rng, logo_base))
+        else:
+            for i in range(count):
+                f.write(channel_lines(i, rng))
+    return path
+
+
+SHOWS = ['Telediario', 'Partido en directo', 'Película', 'Dibujos', 'Concierto',
+         'Documental', 'Magacín', 'Tiempo', 'Resumen deportivo', 'Cine de noche']
+
+
+def write_xmltv(path, channels, days=7, slot_minutes=30, seed=0, start=None):
+    """Write an XMLTV guide (gzipped if ``path`` ends in .gz) and return the path.
+
+    Channel ids look like the tvg-ids of ``write_playlist``; programmes of
+    ``slot_minutes`` cover ``days`` days from ``start`` (default: yesterday).
+    """
+    rng = random.Random(seed)
+    if start is None:
+        start = (int(time.time()) // 3600 - 24) * 3600
+    slots = days * 24 * 60 // slot_minutes
+    opener = gzip.open if path.endswith('.gz') else open
+    with opener(path, 'wt', encoding='utf-8') as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<tv generator-info-name="pym3u-bench">\n')
+        ids = []
+        for index in range(channels):
+            prefix = rng.choice(PREFIXES)
+            channel_id = f'canal{index}.{prefix.lower()}'
+            ids.append(channel_id)
+            f.write(f'  <channel id="{channel_id}"><display-name>{prefix} | Canal {index}'
+                    f'</display-name></channel>\n')
+        for channel_id in ids:
+            for slot in range(slots):
+                begin = time.strftime('%Y%m%d%H%M%S', time.gmtime(start + slot * slot_minutes * 60))
+                end = time.strftime('%Y%m%d%H%M%S', time.gmtime(start + (slot + 1) * slot_minutes * 60))
+                title = escape(f'{rng.choice(SHOWS)} {slot % 50}')
+                f.write(f'  <programme start="{begin} +0000" stop="{end} +0000" channel="{channel_id}">'
+                        f'<title lang="es">{title}</title><desc>Episodio {slot}</desc></programme>\n')
+        f.write('</tv>\n')
+    return path
@@ -0,0 +1,152 @@
+"""Grouped browsing of a playlist by ``group-title``.
+
+``GroupIndex`` maps every group of a ``ChannelStore`` to its rows.  It is
+built once per playlist on a worker thread, in a single pass over the
+group id column.
+
+``GroupedLayout`` is what the list shows in grouped mode: one header per
+group and, only for the groups the user expanded, their rows.  Collapsed
+groups cost one list position, so the widgets bound and the logos fetched
+depend on what is open, not on the size of the playlist.
+"""
+from array import array
+from bisect import bisect_right
+
+from search_index import normalize
+
+NO_GROUP = 'Sin grupo'
+
+
+class GroupIndex:
+    """Rows of each group of one store, with groups in display order."""
+
+    def __init__(self, store, rows, order, count):
+        self.store = store
+        # rows[group_id] -> array('I') de filas, en orden de la lista
+        self.rows = rows
+        self.order = order
+        self.count = count
+
+    @classmethod
+    def build(cls, store):
+        count = len(store)
+        groups = store.groups
+        rows = [array('I') for _ in range(len(groups.values))]
+        ids = groups.ids()
+        view = store.all_rows()
+        for row in (range(count) if isinstance(view, range) else view):
+            rows[ids[row]].append(row)
+        return cls(store, rows, cls._sorted(groups, rows), count)
+
+    @staticmethod
+    def _sorted(groups, rows):
+        # Alfabético sin tildes ni mayúsculas; los canales sin grupo al final
+        return sorted(
+            (group_id for group_id, group_rows in enumerate(rows) if group_rows),
+            key=lambda group_id: (not groups.values[group_id], normalize(groups.values[group_id]))
+        )
+
+    def apply_changes(self, replaced, added, removed):
+        """Follow a reload (see ``playlist_diff``) by moving only the rows involved."""
+        groups = self.store.groups
+        id_of = groups.id_of
+        rows = self.rows
+
+        def rows_of(group_id):
+            while group_id >= len(rows):
+                rows.append(array('I'))
+            return rows[group_id]
+
+        dropped = set(removed)
+        kept = {}
+        added = list(added)
+        for old, new in replaced.items():
+            if id_of(new) == id_of(old):
+                kept[old] = new
+            else:
+                dropped.add(old)
+                added.append(new)
+        # Cada grupo afectado se rehace una vez, no una vez por cambio
+        for group_id in {id_of(row) for row in (*dropped, *kept)}:
+            rows[group_id] = array('I', [kept.get(row, row) for row in rows[group_id] if row not in dropped])
+        for row in added:
+            rows_of(id_of(row)).append(row)
+        self.order = self._sorted(groups, rows)
+        self.count = len(self.store)
+
+    def name(self, group_id):
+        return self.store.groups.values[group_id] or NO_GROUP
+
+    def partition(self, view):
+        """``[(group_id, rows)]`` of the rows in ``view``, in display order.
+
+        The whole playlist reuses the prebuilt lists; any other view (search
+        results, dead channels hidden) is split in one pass.
+        """
+        if view is self.store.order or isinstance(view, range) and view == range(self.count):
+            return [(group_id, self.rows[group_id]) for group_id in self.order]
+        id_of = self.store.groups.id_of
+        buckets = {}
+        for row in view:
+            group_id = id_of(row)
+            bucket = buckets.get(group_id)
+            if bucket is None:
+                bucket = buckets[group_id] = array('I')
+            bucket.append(row)
+        position = {group_id: i for i, group_id in enumerate(self.order)}
+        # Grupos nuevos (filas añadidas después de indexar) al final
+        ordered = sorted(buckets, key=lambda group_id: position.get(group_id, len(position)))
+        return [(group_id, buckets[group_id]) for group_id in ordered]
+
+
+class GroupedLayout:
+    """List positions of a grouped view: each header, then its rows if expanded."""
+
+    def __init__(self, index, groups, expanded):
+        self.index = index
+        self.groups = groups
+        # Conjunto compartido con la app: sobrevive a búsquedas y filtros
+        self.expanded = expanded
+        self.sizes = {group_id: len(rows) for group_id, rows in groups}
+        self.starts = array('I')
+        self.length = 0
+        self._update()
+
+    def _update(self):
+        starts = array('I')
+        position = 0
+        for group_id, rows in self.groups:
+            starts.append(position)
+            position += 1 + (len(rows) if group_id in self.expanded else 0)
+        self.starts = starts
+        self.length = position
+
+    def __len__(self):
+        return self.length
+
+    def entry(self, position):
+        """``(group_id, row)`` at a list position; ``row`` is ``None`` for a header."""
+        i = bisect_right(self.starts, position) - 1
+        group_id, rows = self.groups[i]
+        offset = position - self.starts[i]
+        return group_id, (rows[offset - 1] if offset else None)
+
+    def header(self, group_id):
+        """``(name, channel count, expanded)`` for a group header."""
+        return self.index.name(group_id), self.sizes.get(group_id, 0), group_id in self.expanded
+
+    def toggle(self, group_id):
+        if group_id in self.expanded:
+            self.expanded.discard(group_id)
+        else:
+            self.expanded.add(group_id)
+        self._update()
+
+    def data(self, header_item, row_item):
+        """The RecycleView data list: one shared item per position."""
+        data = []
+        for group_id, rows in self.groups:
+            data.append(header_item)
+            if group_id in self.expanded:
+                data.extend([row_item] * len(rows))
+        return data
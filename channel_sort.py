@@ -0,0 +1,140 @@
+"""Precomputed sort orders of a playlist.
+
+``SortIndex`` is built once per playlist on a worker thread, like the
+search and group indexes.  Each order (display name, group, tvg-id) is kept
+as a permutation of the rows, an ``array('I')``, plus the rank of every
+row in it.  The collation keys (casefolded, without accents, numbers
+compared by value so "Canal 2" comes before "Canal 10") only exist while
+building.
+
+Showing an order is then cheap: the whole playlist is the permutation
+itself, and any other view, such as search results, is *intersected* with
+it (one pass over the permutation keeping the rows marked in the view)
+instead of being sorted again by name.  Views under a quarter of the
+playlist are quicker to put in order through the ranks: their integer
+ranks are sorted and mapped back through the permutation.  Rows added
+after the index was built (a reload) go last, in view order, until it is
+rebuilt.
+"""
+import re
+from array import array
+from itertools import compress
+
+from search_index import normalize
+
+ORDERS = ('file', 'name', 'group', 'id')
+ORDER_NAMES = {
+    'file': 'orden de la lista',
+    'name': 'nombre',
+    'group': 'grupo',
+    'id': 'tvg-id',
+}
+# Por debajo de count / SMALL_VIEW filas se ordenan los rangos en lugar de recorrer la permutación
+SMALL_VIEW = 4
+# Sin valor: después de todo lo demás
+LAST = '\U0010ffff'
+
+NUMBER_RE = re.compile(r'\d+')
+
+
+def collation_key(text):
+    """Normalized key: 'Fútbol 10' -> 'futbol 0000000010'."""
+    key = normalize(text)
+    if NUMBER_RE.search(key):
+        key = NUMBER_RE.sub(pad_number, key)
+    return key
+
+
+def pad_number(match):
+    return match.group().zfill(10)
+
+
+class SortIndex:
+    """Row permutations of one store for every order in ``ORDERS``."""
+
+    def __init__(self, store, orders, ranks, count, rows):
+        self.store = store
+        # orders[orden] -> array('I') de filas; ranks[orden][fila] -> posición
+        self.orders = orders
+        self.ranks = ranks
+        self.count = count
+        # La vista completa que se ordenó (store.all_rows() al construir)
+        self.rows = rows
+
+    @classmethod
+    def build(cls, store):
+        count = len(store)
+        view = store.all_rows()
+        rows = range(count) if isinstance(view, range) else view
+        display_name = store.display_name
+        names = [collation_key(display_name(row)) for row in range(count)]
+        by_name = sorted(rows, key=names.__getitem__)
+        del names
+
+        # Por grupo: cubos en el orden de los grupos, cada uno ya ordenado por nombre
+        groups = store.groups
+        ids = groups.ids()
+        group_order = sorted(
+            range(len(groups.values)),
+            key=lambda group_id: (not groups.values[group_id], collation_key(groups.values[group_id]))
+        )
+        buckets = [array('I') for _ in groups.values]
+        for row in by_name:
+            buckets[ids[row]].append(row)
+        by_group = array('I')
+        for group_id in group_order:
+            by_group.extend(buckets[group_id])
+        del buckets
+
+        tvg_ids = [collation_key(store.tvg_id(row)) or LAST for row in range(count)]
+        # sorted es estable: a igual tvg-id queda el orden por nombre
+        by_id = sorted(by_name, key=tvg_ids.__getitem__)
+        del tvg_ids
+
+        orders = {
+            'name': array('I', by_name),
+            'group': by_group,
+            'id': array('I', by_id),
+        }
+        ranks = {}
+        for order, permutation in orders.items():
+            # Las filas retiradas conservan el rango 0xFFFFFFFF
+            rank = array('I', [0xFFFFFFFF]) * count
+            for position, row in enumerate(permutation):
+                rank[row] = position
+            ranks[order] = rank
+        return cls(store, orders, ranks, count, view)
+
+    def is_current(self):
+        """Whether the store still has exactly the rows this index sorted."""
+        rows = self.store.all_rows()
+        return rows is self.rows or isinstance(rows, range) and rows == self.rows
+
+    def sort(self, view, order):
+        """Return ``view`` (rows) in ``order``; ``'file'`` leaves it as it is."""
+        if order == 'file' or not len(view):
+            return view
+        permutation = self.orders[order]
+        if view is self.rows or isinstance(view, range) and view == self.rows:
+            return permutation
+        count = self.count
+        if len(view) * SMALL_VIEW < count:
+            extra = ()
+            if max(view) >= count:
+                extra = [row for row in view if row >= count]
+                view = [row for row in view if row < count]
+            ranks = sorted(map(self.ranks[order].__getitem__, view))
+            ordered = array('I', map(permutation.__getitem__, ranks))
+            ordered.extend(extra)
+            return ordered
+        # Intersección: se recorre la permutación quedándose con lo marcado
+        marks = bytearray(count)
+        extra = array('I')
+        for row in view:
+            if row < count:
+                marks[row] = 1
+            else:
+                extra.append(row)
+        ordered = array('I', compress(permutation, map(marks.__getitem__, permutation)))
+        ordered.extend(extra)
+        return ordered
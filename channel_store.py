@@ -0,0 +1,425 @@
+"""Compact columnar channel table.
+
+Replaces the old list-of-dicts playlist.  Every text field lives in a
+``StringColumn``: rows are packed into shared string segments of
+``SEGMENT_ROWS`` entries with an ``array`` of end offsets, so a 200k channel
+playlist costs a few hundred segment strings instead of a million small
+objects.  Group titles are interned and stored as small integer ids.
+
+Filtered results are *views*: ``range`` objects or ``array('I')`` instances
+holding row numbers into the store.  Nothing outside this module needs
+per-channel dicts; ``get`` still builds one on demand for export code.
+
+A store has a single writer, but rows below ``len(store)`` may be read from
+other threads while it appends: a row only counts once every column holds it.
+
+Playlists parsed in parallel arrive as whole packed chunks (one string plus
+end offsets per column); ``ChannelStore.packed`` stores keep those chunks
+as they are in ``PackedStringColumn`` instead of re-appending every row.
+"""
+from array import array
+from bisect import bisect_right
+from itertools import accumulate
+
+SEGMENT_SHIFT = 12
+SEGMENT_ROWS = 1 << SEGMENT_SHIFT
+SEGMENT_MASK = SEGMENT_ROWS - 1
+
+
+class StringColumn:
+    """Append-only column of strings packed into shared segments."""
+
+    __slots__ = ('_segments', '_ends', '_pending', '_pending_len')
+
+    def __init__(self):
+        self._segments = []
+        self._ends = array('I')
+        self._pending = []
+        self._pending_len = 0
+
+    def __len__(self):
+        return len(self._ends)
+
+    def append(self, value):
+        self._pending.append(value)
+        self._pending_len += len(value)
+        self._ends.append(self._pending_len)
+        if len(self._pending) == SEGMENT_ROWS:
+            self._segments.append(''.join(self._pending))
+            self._pending = []
+            self._pending_len = 0
+
+    def __getitem__(self, row):
+        # Se toma _pending antes de mirar los segmentos: append() publica el
+        # segmento nuevo antes de vaciar _pending, así que otro hilo puede
+        # leer filas < len() mientras se añaden más
+        pending = self._pending
+        segment = row >> SEGMENT_SHIFT
+        if segment < len(self._segments):
+            ends = self._ends
+            start = ends[row - 1] if row & SEGMENT_MASK else 0
+            return self._segments[segment][start:ends[row]]
+        return pending[row & SEGMENT_MASK]
+
+    def __iter__(self):
+        ends = self._ends
+        for segment_index, segment in enumerate(self._segments):
+            start = 0
+            base = segment_index << SEGMENT_SHIFT
+            for row in range(base, base + SEGMENT_ROWS):
+                end = ends[row]
+                yield segment[start:end]
+                start = end
+        yield from self._pending
+
+    def find_rows(self, text):
+        """Yield, in order, the rows containing ``text``.
+
+        Searches whole segments with ``str.find`` instead of slicing every
+        row, which keeps scans of rarely matching text at C speed.
+        """
+        ends = self._ends
+        size = len(text)
+        for segment_index, segment in enumerate(self._segments):
+            hits = segment.count(text)
+            if not hits:
+                continue
+            base = segment_index << SEGMENT_SHIFT
+            top = base + SEGMENT_ROWS
+            if hits * 4 >= SEGMENT_ROWS:
+                # Segmento denso: sale más barato comprobar fila a fila
+                start = 0
+                for row in range(base, top):
+                    end = ends[row]
+                    if text in segment[start:end]:
+                        yield row
+                    start = end
+                continue
+            pos = segment.find(text)
+            while pos != -1:
+                row = bisect_right(ends, pos, base, top)
+                end = ends[row]
+                if pos + size <= end:
+                    yield row
+                    pos = segment.find(text, end)
+                else:
+                    # Coincidencia que cruza el límite entre dos filas
+                    pos = segment.find(text, pos + 1)
+        base = len(self._segments) << SEGMENT_SHIFT
+        for offset, value in enumerate(self._pending):
+            if text in value:
+                yield base + offset
+
+
+class MappedStringColumn:
+    """String column read lazily from a memory-mapped snapshot.
+
+    ``data`` is a buffer of UTF-8 text and ``ends`` a sequence of the byte
+    offsets where each row ends; rows are decoded only when accessed.  Rows
+    appended later go to an ordinary in-memory tail.
+    """
+
+    __slots__ = ('_data', '_ends', '_base', '_tail')
+
+    def __init__(self, data, ends):
+        self._data = data
+        self._ends = ends
+        self._base = len(ends)
+        self._tail = StringColumn()
+
+    def __len__(self):
+        return self._base + len(self._tail)
+
+    def append(self, value):
+        self._tail.append(value)
+
+    def __getitem__(self, row):
+        if row >= self._base:
+            return self._tail[row - self._base]
+        ends = self._ends
+        start = ends[row - 1] if row else 0
+        return str(self._data[start:ends[row]], 'utf-8')
+
+    def __iter__(self):
+        data = self._data
+        start = 0
+        for end in self._ends:
+            yield str(data[start:end], 'utf-8')
+            start = end
+        yield from self._tail
+
+    def find_rows(self, text):
+        for row, value in enumerate(self):
+            if text in value:
+                yield row
+
+
+class PackedStringColumn:
+    """String column made of large packed parts, e.g. chunks parsed in parallel.
+
+    Each part is one string and an array of the offsets where its rows end.
+    Rows appended one at a time go to an ordinary in-memory tail.
+    """
+
+    __slots__ = ('_parts', '_starts', '_count', '_tail')
+
+    def __init__(self):
+        self._parts = []
+        self._starts = array('I')
+        self._count = 0
+        self._tail = StringColumn()
+
+    def __len__(self):
+        return self._count + len(self._tail)
+
+    def add_part(self, text, ends):
+        if len(self._tail):
+            raise ValueError('no se pueden añadir bloques tras filas sueltas')
+        if not ends:
+            return
+        self._parts.append((text, ends))
+        self._starts.append(self._count)
+        # La longitud se publica la última, como en StringColumn
+        self._count += len(ends)
+
+    def append(self, value):
+        self._tail.append(value)
+
+    def __getitem__(self, row):
+        if row >= self._count:
+            return self._tail[row - self._count]
+        part = bisect_right(self._starts, row) - 1
+        text, ends = self._parts[part]
+        row -= self._starts[part]
+        return text[ends[row - 1] if row else 0:ends[row]]
+
+    def __iter__(self):
+        for text, ends in self._parts:
+            start = 0
+            for end in ends:
+                yield text[start:end]
+                start = end
+        yield from self._tail
+
+    def find_rows(self, text):
+        size = len(text)
+        for (part, ends), base in zip(self._parts, self._starts):
+            pos = part.find(text)
+            while pos != -1:
+                row = bisect_right(ends, pos)
+                end = ends[row]
+                if pos + size <= end:
+                    yield base + row
+                    pos = part.find(text, end)
+                else:
+                    pos = part.find(text, pos + 1)
+        for row in self._tail.find_rows(text):
+            yield self._count + row
+
+
+class InternedColumn:
+    """Column of repeated strings stored as ids into a shared value table."""
+
+    __slots__ = ('values', '_ids', '_rows')
+
+    def __init__(self, values=None, rows=None):
+        self.values = values or ['']
+        self._ids = {value: value_id for value_id, value in enumerate(self.values)}
+        self._rows = rows if rows is not None else array('I')
+
+    def __len__(self):
+        return len(self._rows)
+
+    def append(self, value):
+        value_id = self._ids.get(value)
+        if value_id is None:
+            value_id = self._ids[value] = len(self.values)
+            self.values.append(value)
+        self._rows.append(value_id)
+
+    def __getitem__(self, row):
+        return self.values[self._rows[row]]
+
+    def __iter__(self):
+        values = self.values
+        return (values[value_id] for value_id in self._rows)
+
+    def id_of(self, row):
+        return self._rows[row]
+
+    def ids(self):
+        return self._rows
+
+    def extend_ids(self, values, ids):
+        """Append rows given as ids into another value table ``values``."""
+        remap = []
+        for value in values:
+            value_id = self._ids.get(value)
+            if value_id is None:
+                value_id = self._ids[value] = len(self.values)
+                self.values.append(value)
+            remap.append(value_id)
+        if remap == list(range(len(remap))):
+            self._rows.extend(ids)
+        else:
+            self._rows.extend(map(remap.__getitem__, ids))
+
+
+class ChannelStore:
+    """Columnar playlist: one row per channel, addressed by row number."""
+
+    def __init__(self, channels=None):
+        self.names = StringColumn()
+        self.urls = StringColumn()
+        self.logos = StringColumn()
+        self.tvg_ids = StringColumn()
+        self.groups = InternedColumn()
+        # Las opciones #EXTVLCOPT son raras: se guardan aparte por fila
+        self.vlcopts = {}
+        # Atributos de la línea #EXTM3U (x-tvg-url, ...)
+        self.header = {}
+        # Tras recargar una lista vigilada: orden visible y filas sustituidas
+        self.order = None
+        self.retired = set()
+        if channels is not None:
+            self.extend(channels)
+
+    @classmethod
+    def from_columns(cls, names, urls, logos, tvg_ids, groups, vlcopts=None, header=None):
+        """Build a store around existing columns (e.g. from a snapshot)."""
+        store = cls()
+        store.names = names
+        store.urls = urls
+        store.logos = logos
+        store.tvg_ids = tvg_ids
+        store.groups = groups
+        store.vlcopts = vlcopts or {}
+        store.header = header or {}
+        return store
+
+    @classmethod
+    def packed(cls):
+        """An empty store that takes parsed chunks whole (see ``extend_packed``)."""
+        store = cls()
+        store.names = PackedStringColumn()
+        store.urls = PackedStringColumn()
+        store.logos = PackedStringColumn()
+        store.tvg_ids = PackedStringColumn()
+        return store
+
+    def __len__(self):
+        return len(self.urls)
+
+    def extend_packed(self, chunk):
+        """Add a ``parallel_parser.PackedChannels`` chunk; return how many rows it had."""
+        base = len(self)
+        text, ends = chunk.names
+        if chunk.unnamed:
+            # Los workers no conocen el número de fila global del nombre por defecto
+            names = []
+            start = 0
+            for end in ends:
+                names.append(text[start:end])
+                start = end
+            for row in chunk.unnamed:
+                names[row] = f'Canal {base + row + 1}'
+            text = ''.join(names)
+            ends = array('I', accumulate(map(len, names)))
+        self.names.add_part(text, ends)
+        self.logos.add_part(*chunk.logos)
+        self.tvg_ids.add_part(*chunk.tvg_ids)
+        self.groups.extend_ids(chunk.group_values, chunk.group_ids)
+        for row, opts in chunk.vlcopts.items():
+            self.vlcopts[base + row] = opts
+        if chunk.header:
+            self.header = chunk.header
+        # urls marca la longitud del store: se añade la última
+        self.urls.add_part(*chunk.urls)
+        return chunk.count
+
+    def append(self, channel):
+        """Add a parsed channel record and return its row number."""
+        row = len(self.urls)
+        self.names.append(channel.get('name') or f'Canal {row + 1}')
+        self.logos.append(channel.get('logo', ''))
+        self.tvg_ids.append(channel.get('id', ''))
+        self.groups.append(channel.get('group', ''))
+        opts = channel.get('vlcopts')
+        if opts:
+            self.vlcopts[row] = opts
+        # urls marca la longitud del store: se añade la última
+        self.urls.append(channel.get('url', ''))
+        return row
+
+    def extend(self, channels):
+        """Add every record of an iterable; return how many were added."""
+        start = len(self)
+        append = self.append
+        for channel in channels:
+            append(channel)
+        return len(self) - start
+
+    def name(self, row):
+        return self.names[row]
+
+    def display_name(self, row):
+        name = self.names[row]
+        return name.split('|')[-1].strip() if '|' in name else name
+
+    def url(self, row):
+        return self.urls[row]
+
+    def logo(self, row):
+        return self.logos[row]
+
+    def tvg_id(self, row):
+        return self.tvg_ids[row]
+
+    def group(self, row):
+        return self.groups[row]
+
+    def get(self, row):
+        """Materialize one row as the dict shape the parser produces."""
+        channel = {'name': self.names[row], 'url': self.urls[row]}
+        for key, column in (('logo', self.logos), ('group', self.groups), ('id', self.tvg_ids)):
+            value = column[row]
+            if value:
+                channel[key] = value
+        if row in self.vlcopts:
+            channel['vlcopts'] = self.vlcopts[row]
+        return channel
+
+    def all_rows(self):
+        """View over every live row in file order."""
+        return self.order if self.order is not None else range(len(self))
+
+    def reorder(self, order, retired=()):
+        """Make ``order`` the playlist from now on, as after a reload.
+
+        The columns only grow: a channel that changed gets a new row and its
+        old one is ``retired``, still readable but left out of every view.
+        """
+        self.order = order
+        self.retired.update(retired)
+
+    def extend_view(self, view, start, rows):
+        """Return ``view`` plus ``rows``, those kept of the rows added from ``start`` on.
+
+        A ``range`` view stays ``all_rows()`` while every new row is kept;
+        otherwise it becomes an ``array('I')`` and ``rows`` are appended to it.
+        """
+        if isinstance(view, range) and len(rows) == len(self) - start:
+            return self.all_rows()
+        if isinstance(view, range):
+            view = array('I', view)
+        view.extend(rows)
+        return view
+
+    def select(self, predicate, rows=None):
+        """Return an ``array('I')`` view of the rows whose name matches."""
+        names = self.names
+        if rows is None and self.order is not None:
+            rows = self.order
+        if rows is None:
+            return array('I', (row for row, name in enumerate(names) if predicate(name)))
+        return array('I', (row for row in rows if predicate(names[row])))
@@ -0,0 +1,350 @@
+"""XMLTV programme guide: streaming ingestion and now/next lookups.
+
+XMLTV files are read with ``iterparse`` and every element is dropped as
+soon as it has been handled, so a 500 MB guide (plain or gzipped) is
+ingested in bounded memory.  Programmes are grouped per channel, sorted by
+start time and written to a compact index file: a JSON header with the
+channel ids, then ``array('I')`` columns of start/stop times and title
+numbers, and the deduplicated titles as one UTF-8 block.
+
+Opening an index maps the file; ``now_next`` is a ``bisect`` over the
+channel's slice of the start column, so lookups for the cards on screen
+take microseconds and touch only a few pages.
+"""
+import calendar
+import gzip
+import hashlib
+import json
+import mmap
+import os
+import struct
+import time
+import xml.etree.ElementTree as ET
+from array import array
+from bisect import bisect_right
+from collections import namedtuple
+
+from channel_store import MappedStringColumn, StringColumn
+
+MAGIC = b'PYM3UEPG'
+VERSION = 1
+PREFIX = struct.Struct('<8sII')
+ALIGN = 8
+GZIP_MAGIC = b'\x1f\x8b'
+
+# Atributos de #EXTM3U con la URL de la guía, por orden de preferencia
+GUIDE_ATTRS = ('x-tvg-url', 'url-tvg', 'tvg-url')
+
+Programme = namedtuple('Programme', 'title start stop')
+
+# Una guía abarca pocos días: el calendario se calcula una vez por fecha
+_DAYS = {}
+
+
+def parse_xmltv_time(text):
+    """``'20240101203000 +0100'`` -> seconds since the epoch (UTC)."""
+    text = text.strip()
+    day = _DAYS.get(text[:8])
+    if day is None:
+        day = _DAYS[text[:8]] = calendar.timegm((int(text[0:4]), int(text[4:6]), int(text[6:8]), 0, 0, 0))
+    stamp = day + int(text[8:10] or 0) * 3600 + int(text[10:12] or 0) * 60 + int(text[12:14] or 0)
+    zone = text[14:].strip()
+    if zone:
+        offset = int(zone[1:3]) * 3600 + int(zone[3:5]) * 60
+        stamp += offset if zone[0] == '-' else -offset
+    return stamp
+
+
+def guide_url(header):
+    """The first guide URL announced in a playlist's ``#EXTM3U`` attributes."""
+    for attr in GUIDE_ATTRS:
+        for url in header.get(attr, '').split(','):
+            if url.strip():
+                return url.strip()
+    return None
+
+
+def format_now_next(current, following):
+    """Card caption such as ``'Ahora: Noticias · Después: Cine'``."""
+    parts = []
+    if current is not None:
+        parts.append(f'Ahora: {current.title}')
+    if following is not None:
+        parts.append(f'Después: {following.title}')
+    return ' · '.join(parts)
+
+
+def gunzip_if_needed(f):
+    """Wrap a buffered binary stream in ``GzipFile`` when it starts like one."""
+    if hasattr(f, 'peek') and f.peek(2)[:2] == GZIP_MAGIC:
+        return gzip.GzipFile(fileobj=f)
+    return f
+
+
+def iter_xmltv(source):
+    """Yield ``('channel', id, names)`` and ``('programme', id, start, stop, title)``.
+
+    ``source`` is a path or a binary file object, plain or gzipped.
+    Elements are cleared from the tree once read so memory stays flat.
+    """
+    owned = isinstance(source, (str, os.PathLike))
+    raw = open(source, 'rb') if owned else source
+    stream = gunzip_if_needed(raw)
+    try:
+        context = ET.iterparse(stream, events=('start', 'end'))
+        _, root = next(context)
+        for event, elem in context:
+            if event == 'start':
+                continue
+            tag = elem.tag
+            if tag == 'programme':
+                try:
+                    start = parse_xmltv_time(elem.get('start', ''))
+                    stop = elem.get('stop')
+                    stop = parse_xmltv_time(stop) if stop else 0
+                except ValueError:
+                    root.clear()
+                    continue
+                yield 'programme', elem.get('channel', ''), start, stop, elem.findtext('title') or ''
+                root.clear()
+            elif tag == 'channel':
+                names = [name.text.strip() for name in elem.iter('display-name') if name.text]
+                yield 'channel', elem.get('id', ''), names
+                root.clear()
+    finally:
+        if stream is not raw:
+            stream.close()
+        if owned:
+            raw.close()
+
+
+class EPGBuilder:
+    """Collect programmes per channel and produce a sorted ``EPGIndex``.
+
+    Programmes that ended more than ``keep_past`` seconds ago are skipped.
+    """
+
+    def __init__(self, keep_past=6 * 3600, now=None):
+        self.cutoff = (time.time() if now is None else now) - keep_past
+        self.titles = StringColumn()
+        self._title_ids = {}
+        self._channels = {}
+        self.aliases = {}
+        self.programmes = 0
+
+    def add_channel(self, channel_id, names):
+        for name in names:
+            self.aliases.setdefault(name.casefold(), channel_id)
+
+    def add(self, channel_id, start, stop, title):
+        if stop and stop < self.cutoff:
+            return
+        title_id = self._title_ids.get(title)
+        if title_id is None:
+            title_id = self._title_ids[title] = len(self.titles)
+            self.titles.append(title)
+        columns = self._channels.get(channel_id)
+        if columns is None:
+            columns = self._channels[channel_id] = (array('I'), array('I'), array('I'))
+        columns[0].append(start)
+        columns[1].append(stop)
+        columns[2].append(title_id)
+        self.programmes += 1
+
+    def feed(self, source):
+        for item in iter_xmltv(source):
+            if item[0] == 'programme':
+                self.add(*item[1:])
+            else:
+                self.add_channel(item[1], item[2])
+        return self
+
+    def build(self):
+        ids = sorted(self._channels)
+        offsets = array('I', [0])
+        starts = array('I')
+        stops = array('I')
+        titles = array('I')
+        for channel_id in ids:
+            channel_starts, channel_stops, channel_titles = self._channels[channel_id]
+            order = range(len(channel_starts))
+            if any(channel_starts[i] > channel_starts[i + 1] for i in range(len(channel_starts) - 1)):
+                order = sorted(order, key=channel_starts.__getitem__)
+            base = len(starts)
+            for i in order:
+                starts.append(channel_starts[i])
+                stops.append(channel_stops[i])
+                titles.append(channel_titles[i])
+            # Sin stop: el programa dura hasta que empieza el siguiente
+            for i in range(base, len(starts)):
+                if not stops[i]:
+                    stops[i] = starts[i + 1] if i + 1 < len(starts) else starts[i] + 3600
+            offsets.append(len(starts))
+        aliases = {name: channel_id for name, channel_id in self.aliases.items() if channel_id in self._channels}
+        return EPGIndex(ids, offsets, starts, stops, titles, self.titles, aliases)
+
+
+class EPGIndex:
+    """Per-channel, time-sorted programmes answering now/next queries."""
+
+    def __init__(self, ids, offsets, starts, stops, titles, title_column, aliases=None, meta=None):
+        self.ids = ids
+        self.offsets = offsets
+        self.starts = starts
+        self.stops = stops
+        self.titles = titles
+        self.title_column = title_column
+        self.aliases = aliases or {}
+        self.meta = meta or {}
+        self._positions = {channel_id: i for i, channel_id in enumerate(ids)}
+        self._folded = {channel_id.casefold(): i for i, channel_id in enumerate(ids)}
+
+    def __len__(self):
+        return len(self.starts)
+
+    def channel(self, tvg_id=None, name=None):
+        """Position of a channel by tvg-id (exact, then caseless) or display name."""
+        if tvg_id:
+            position = self._positions.get(tvg_id)
+            if position is None:
+                position = self._folded.get(tvg_id.casefold())
+            if position is not None:
+                return position
+        if name:
+            channel_id = self.aliases.get(name.casefold())
+            if channel_id is not None:
+                return self._positions[channel_id]
+        return None
+
+    def _programme(self, i):
+        return Programme(self.title_column[self.titles[i]], self.starts[i], self.stops[i])
+
+    def now_next(self, tvg_id=None, name=None, now=None):
+        """``(current, following)`` programmes for a channel; either may be ``None``."""
+        position = self.channel(tvg_id, name)
+        if position is None:
+            return None, None
+        lo = self.offsets[position]
+        hi = self.offsets[position + 1]
+        if now is None:
+            now = time.time()
+        i = bisect_right(self.starts, now, lo, hi) - 1
+        current = self._programme(i) if i >= lo and self.stops[i] > now else None
+        following = self._programme(i + 1) if i + 1 < hi else None
+        return current, following
+
+    def save(self, path, **meta):
+        encoded = [title.encode('utf-8') for title in self.title_column]
+        title_data = b''.join(encoded)
+        title_ends = array('I')
+        end = 0
+        for value in encoded:
+            end += len(value)
+            title_ends.append(end)
+
+        sections = []
+        columns = {}
+        offset = 0
+        for name, data in (
+            ('offsets', self.offsets), ('starts', self.starts), ('stops', self.stops),
+            ('titles', self.titles), ('title_ends', title_ends), ('title_data', title_data),
+        ):
+            data = data if isinstance(data, bytes) else data.tobytes()
+            columns[name] = (offset, len(data))
+            pad = -len(data) % ALIGN
+            sections.append(data + b'\0' * pad)
+            offset += len(data) + pad
+
+        header = json.dumps({
+            'ids': self.ids,
+            'aliases': self.aliases,
+            'columns': columns,
+            'meta': meta,
+        }).encode('utf-8')
+        header += b' ' * (-(PREFIX.size + len(header)) % ALIGN)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(PREFIX.pack(MAGIC, VERSION, len(header)))
+            f.write(header)
+            for section in sections:
+                f.write(section)
+        os.replace(tmp_path, path)
+        return path
+
+    @classmethod
+    def load(cls, path):
+        """Map a saved index; ``None`` if missing or unreadable."""
+        try:
+            with open(path, 'rb') as f:
+                magic, version, header_len = PREFIX.unpack(f.read(PREFIX.size))
+                if magic != MAGIC or version != VERSION:
+                    return None
+                header = json.loads(f.read(header_len))
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError, struct.error):
+            return None
+        view = memoryview(mapped)
+        base = PREFIX.size + header_len
+
+        def section(name, cast='I'):
+            start, length = header['columns'][name]
+            data = view[base + start:base + start + length]
+            return data.cast(cast) if cast else data
+
+        titles = MappedStringColumn(section('title_data', None), section('title_ends'))
+        return cls(header['ids'], section('offsets'), section('starts'), section('stops'),
+                   section('titles'), titles, header['aliases'], header['meta'])
+
+
+class GuideCache:
+    """Compiled EPG indexes on disk, one per guide URL."""
+
+    def __init__(self, cache_dir, max_age=12 * 3600, keep_past=6 * 3600):
+        self.directory = os.path.join(cache_dir, 'epg')
+        os.makedirs(self.directory, exist_ok=True)
+        self.max_age = max_age
+        self.keep_past = keep_past
+
+    def _base(self, url):
+        return os.path.join(self.directory, hashlib.sha1(url.encode('utf-8')).hexdigest())
+
+    def index_path(self, url):
+        return self._base(url) + '.epg'
+
+    def download_path(self, url):
+        """Where to save the guide before compiling it (removed afterwards)."""
+        return self._base(url) + '.xml'
+
+    def load(self, url):
+        return EPGIndex.load(self.index_path(url))
+
+    def is_stale(self, url):
+        try:
+            return time.time() - os.path.getmtime(self.index_path(url)) > self.max_age
+        except OSError:
+            return True
+
+    def touch(self, url):
+        """The server says the guide did not change: keep the index another ``max_age``."""
+        try:
+            os.utime(self.index_path(url))
+        except OSError:
+            pass
+
+    def validators(self, url):
+        index = self.load(url)
+        headers = {}
+        if index is not None:
+            if index.meta.get('etag'):
+                headers['If-None-Match'] = index.meta['etag']
+            if index.meta.get('last_modified'):
+                headers['If-Modified-Since'] = index.meta['last_modified']
+        return headers
+
+    def build(self, url, source, etag=None, last_modified=None):
+        """Parse an XMLTV file and store (and return) its mapped index."""
+        index = EPGBuilder(self.keep_past).feed(source).build()
+        path = index.save(self.index_path(url), url=url, etag=etag, last_modified=last_modified)
+        if source == self.download_path(url):
+            os.remove(source)
+        return EPGIndex.load(path)
@@ -0,0 +1,98 @@
+"""Logging for the app: rate limited and written off the calling thread.
+
+Modules log through ``logging.getLogger(__name__)`` with %-style arguments
+(``log.warning('Error al descargar %s: %s', url, e)``), so every record of
+one call site shares its format string.  ``RateLimitFilter`` uses that
+string as the key: past ``burst`` records in ``period`` seconds the rest
+are dropped and counted, and the next record let through says how many were
+skipped.  A storm of identical errors therefore costs one dictionary lookup
+per record.
+
+``configure_logging`` puts the filter on a ``QueueHandler`` and makes it
+the root logger's only handler: callers, including the asyncio loop, only
+enqueue; a ``QueueListener`` thread formats the records and writes them out
+through the handlers the root logger had before (kivy's) and the new ones.
+"""
+import logging
+import logging.handlers
+import queue
+import threading
+import time
+
+FORMAT = '%(asctime)s %(levelname)s %(name)s: %(message)s'
+
+
+class RateLimitFilter(logging.Filter):
+    """Let at most ``burst`` records per ``period`` seconds through for each call site."""
+
+    def __init__(self, burst=5, period=10.0, on_drop=None, max_keys=1000):
+        super().__init__()
+        self.burst = burst
+        self.period = period
+        self.on_drop = on_drop
+        self.max_keys = max_keys
+        self.dropped = 0
+        # (logger, nivel, formato) -> [inicio de la ventana, emitidos, omitidos]
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        key = (record.name, record.levelno, str(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is None or now - window[0] >= self.period:
+                skipped = window[2] if window is not None else 0
+                if window is None and len(self._windows) >= self.max_keys:
+                    self._prune(now)
+                window = self._windows[key] = [now, 0, 0]
+                if skipped:
+                    record.msg = f'{record.msg} ({skipped} mensajes iguales omitidos)'
+            if window[1] >= self.burst:
+                window[2] += 1
+                self.dropped += 1
+                drop = True
+            else:
+                window[1] += 1
+                drop = False
+        if drop and self.on_drop is not None:
+            self.on_drop(record)
+        return not drop
+
+    def _prune(self, now):
+        for key in [key for key, window in self._windows.items() if now - window[0] >= self.period]:
+            del self._windows[key]
+
+
+def configure_logging(level=logging.INFO, path=None, burst=5, period=10.0, on_drop=None):
+    """Route the root logger through a rate-limited queue; return the listener.
+
+    Handlers already on the root logger (kivy installs its own) are taken
+    off it and written to by the listener, so every record is throttled
+    and none is written on the calling thread.  Records also go to ``path``
+    if given, and to stderr if the root logger had no handler.  Call
+    ``stop()`` on the returned listener at exit to flush what is still
+    queued.
+    """
+    root = logging.getLogger()
+    handlers = []
+    if not root.handlers:
+        handlers.append(logging.StreamHandler())
+    if path is not None:
+        handlers.append(logging.FileHandler(path, encoding='utf-8'))
+    formatter = logging.Formatter(FORMAT)
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    # Los que ya había conservan su formato, pero escriben desde el hilo del listener
+    existing = list(root.handlers)
+    for handler in existing:
+        root.removeHandler(handler)
+
+    records = queue.SimpleQueue()
+    queue_handler = logging.handlers.QueueHandler(records)
+    queue_handler.addFilter(RateLimitFilter(burst, period, on_drop))
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+    listener = logging.handlers.QueueListener(records, *existing, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener
@@ -0,0 +1,106 @@
+"""Logo texture atlas: many small logos in a few large shared textures.
+
+Every decoded logo normally becomes a texture of its own: one allocation
+and upload per logo, and one texture bind per card drawn.  In atlas mode
+logos are instead copied into fixed-size cells of a few big *pages*
+(``page_size`` square textures), and cards show a region of a page.
+Arriving logos only update part of an existing texture, the number of
+live textures stays at a handful, and neighbouring cards usually draw from
+the same one.
+
+All logos are already shrunk to fit the same ``cell`` x ``cell`` box (see
+``thumbnails.decode_thumbnail``), so the page is a plain grid: a list of
+free cells is the whole allocator.  Pages are created as logos arrive, up
+to the number needed for ``capacity`` logos; cells of evicted logos go back
+to the free list and are reused.  A one-pixel gutter between cells keeps
+linear filtering from bleeding a neighbour into the edge of a logo.
+
+The module does not import kivy: the app passes ``make_page(width,
+height)``, which must return a texture with kivy's ``blit_buffer`` and
+``get_region``.  Only call it on the UI thread.
+"""
+
+PAGE_SIZE = 1024
+GUTTER = 1
+
+
+class LogoAtlas:
+    """Grid of logo cells over shared page textures, recycled on release."""
+
+    def __init__(self, cell, make_page, capacity=300, page_size=PAGE_SIZE):
+        per_row = page_size // (cell + GUTTER)
+        if per_row < 1:
+            raise ValueError(f'Una celda de {cell}px no cabe en una página de {page_size}px')
+        self.cell = cell
+        self.make_page = make_page
+        self.page_size = page_size
+        self.per_row = per_row
+        self.per_page = per_row * per_row
+        self.max_pages = max(-(-capacity // self.per_page), 1)
+        self.pages = []
+        # Celdas libres: (página, x, y, ancho, alto ocupados por el último logo)
+        self._free = []
+        self._slots = {}
+        self._blank = None
+        self.stats = {'uploads': 0, 'released': 0, 'full': 0}
+
+    def __len__(self):
+        return len(self._slots)
+
+    def __contains__(self, url):
+        return url in self._slots
+
+    @property
+    def capacity(self):
+        return self.per_page * self.max_pages
+
+    def _add_page(self):
+        page = len(self.pages)
+        self.pages.append(self.make_page(self.page_size, self.page_size))
+        step = self.cell + GUTTER
+        cells = [
+            (page, column * step, row * step, 0, 0)
+            for row in range(self.per_row)
+            for column in range(self.per_row)
+        ]
+        # pop() saca del final: se llena por la esquina inferior izquierda
+        self._free.extend(reversed(cells))
+
+    def add(self, url, width, height, pixels):
+        """Copy an RGBA logo (rows bottom-up) into a free cell; return its region.
+
+        Returns ``None`` when every cell of every page is taken.
+        """
+        if width > self.cell or height > self.cell:
+            raise ValueError(f'Logo de {width}x{height} mayor que la celda de {self.cell}px')
+        self.release(url)
+        if not self._free:
+            if len(self.pages) >= self.max_pages:
+                self.stats['full'] += 1
+                return None
+            self._add_page()
+        page, x, y, used_width, used_height = self._free.pop()
+        texture = self.pages[page]
+        if used_width > width or used_height > height:
+            # Restos de un logo mayor quedarían junto al borde del nuevo
+            if self._blank is None:
+                self._blank = bytes(self.cell * self.cell * 4)
+            texture.blit_buffer(self._blank, pos=(x, y), size=(self.cell, self.cell),
+                                colorfmt='rgba', bufferfmt='ubyte')
+        texture.blit_buffer(pixels, pos=(x, y), size=(width, height), colorfmt='rgba', bufferfmt='ubyte')
+        self.stats['uploads'] += 1
+        self._slots[url] = (page, x, y, width, height)
+        return texture.get_region(x, y, width, height)
+
+    def release(self, url):
+        """Give the cell of ``url`` back; whatever showed its region must stop."""
+        slot = self._slots.pop(url, None)
+        if slot is not None:
+            self._free.append(slot)
+            self.stats['released'] += 1
+
+    def clear(self):
+        """Drop every logo and page."""
+        self._slots.clear()
+        self._free.clear()
+        self.pages.clear()
@@ -0,0 +1,226 @@
+"""Content-addressed logo disk cache.
+
+Logos are stored under the SHA-1 of their URL, so channels sharing a logo
+share one file and channels with similar names no longer collide.  A small
+SQLite index records URL, ETag/Last-Modified, size, fetch time and last
+access; it is read in a single query at startup, after which lookups never
+touch the filesystem.
+
+The cache enforces a byte budget by evicting least recently used logos, and
+entries older than ``revalidate_after`` seconds are revalidated with a
+conditional request instead of being downloaded again.
+
+Files and the database are only written on the event loop thread
+(``store``, ``revalidated``, ``flush``).  ``lookup`` and the other reads are
+safe to call from the UI thread: the in-memory index is only read or
+changed under a lock, which is never held across disk I/O.  Last-access
+times gathered by ``lookup`` are written by ``flush``, which the app runs
+on the loop every ``FLUSH_INTERVAL`` seconds so a crash loses little of the
+LRU order.
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+# Cada cuántos segundos la app guarda los últimos accesos
+FLUSH_INTERVAL = 60
+
+# Extensión según la firma del fichero: kivy elige el decodificador por extensión
+IMAGE_EXTENSIONS = (
+    (b'\x89PNG', '.png'),
+    (b'\xFF\xD8\xFF', '.jpg'),
+    (b'GIF8', '.gif'),
+)
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS logos (
+    key TEXT PRIMARY KEY,
+    url TEXT NOT NULL,
+    ext TEXT NOT NULL,
+    etag TEXT,
+    last_modified TEXT,
+    size INTEGER NOT NULL,
+    fetched REAL NOT NULL,
+    last_access REAL NOT NULL
+)
+'''
+
+
+def url_key(url):
+    return hashlib.sha1(url.strip().encode('utf-8')).hexdigest()
+
+
+def image_extension(content):
+    for magic, ext in IMAGE_EXTENSIONS:
+        if content.startswith(magic):
+            return ext
+    return None
+
+
+class CacheEntry:
+    __slots__ = ('key', 'url', 'ext', 'etag', 'last_modified', 'size', 'fetched', 'last_access')
+
+    def __init__(self, key, url, ext, etag, last_modified, size, fetched, last_access):
+        self.key = key
+        self.url = url
+        self.ext = ext
+        self.etag = etag
+        self.last_modified = last_modified
+        self.size = size
+        self.fetched = fetched
+        self.last_access = last_access
+
+    def row(self):
+        return (self.key, self.url, self.ext, self.etag, self.last_modified,
+                self.size, self.fetched, self.last_access)
+
+
+class LogoCache:
+    """URL-keyed logo files with an SQLite index and an LRU byte budget."""
+
+    def __init__(self, cache_dir, max_bytes=200 * 1024 * 1024, revalidate_after=7 * 24 * 3600):
+        self.directory = os.path.join(cache_dir, 'logos')
+        os.makedirs(self.directory, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.revalidate_after = revalidate_after
+        self.stats = {'hits': 0, 'misses': 0, 'stores': 0, 'revalidated': 0, 'evictions': 0}
+
+        self.db = sqlite3.connect(os.path.join(cache_dir, 'logos.sqlite'), check_same_thread=False)
+        self.db.execute(SCHEMA)
+        self.entries = {
+            row[0]: CacheEntry(*row)
+            for row in self.db.execute('SELECT * FROM logos')
+        }
+        self.total_bytes = sum(entry.size for entry in self.entries.values())
+        self._touched = set()
+        # Protege entries, total_bytes, _touched y stats entre la UI y el bucle
+        self._lock = threading.Lock()
+
+    def path(self, entry):
+        return os.path.join(self.directory, entry.key + entry.ext)
+
+    def lookup(self, url, touch=True):
+        """Return the cached file for ``url`` or ``None``.
+
+        With ``touch`` the lookup counts as a hit/miss and as a use for LRU.
+        """
+        key = url_key(url)
+        with self._lock:
+            entry = self.entries.get(key)
+            if not touch:
+                return self.path(entry) if entry is not None else None
+            if entry is None:
+                self.stats['misses'] += 1
+                return None
+            self.stats['hits'] += 1
+            entry.last_access = time.time()
+            self._touched.add(entry.key)
+            return self.path(entry)
+
+    def is_stale(self, url):
+        key = url_key(url)
+        with self._lock:
+            entry = self.entries.get(key)
+            return entry is None or time.time() - entry.fetched > self.revalidate_after
+
+    def validators(self, url):
+        """Conditional request headers for revalidating ``url``."""
+        key = url_key(url)
+        headers = {}
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                if entry.etag:
+                    headers['If-None-Match'] = entry.etag
+                if entry.last_modified:
+                    headers['If-Modified-Since'] = entry.last_modified
+        return headers
+
+    def revalidated(self, url, etag=None, last_modified=None):
+        """Record a 304: the cached copy is still current."""
+        key = url_key(url)
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            self.stats['revalidated'] += 1
+            entry.fetched = entry.last_access = time.time()
+            entry.etag = etag or entry.etag
+            entry.last_modified = last_modified or entry.last_modified
+            self._touched.discard(key)
+            row = entry.row()
+        self.db.execute('INSERT OR REPLACE INTO logos VALUES (?, ?, ?, ?, ?, ?, ?, ?)', row)
+        self.db.commit()
+        return self.path(entry)
+
+    def store(self, url, content, etag=None, last_modified=None):
+        """Write ``content`` for ``url`` and return its path (None if not an image)."""
+        ext = image_extension(content)
+        if ext is None:
+            return None
+        key = url_key(url)
+        now = time.time()
+        entry = CacheEntry(key, url.strip(), ext, etag, last_modified, len(content), now, now)
+        with self._lock:
+            old = self.entries.get(key)
+        if old is not None and old.ext != ext:
+            self._remove_file(old)
+        with open(self.path(entry), 'wb') as f:
+            f.write(content)
+        with self._lock:
+            old = self.entries.get(key)
+            if old is not None:
+                self.total_bytes -= old.size
+            self.entries[key] = entry
+            self.total_bytes += entry.size
+            self.stats['stores'] += 1
+            self._touched.discard(key)
+            over_budget = self.total_bytes > self.max_bytes
+        self.db.execute('INSERT OR REPLACE INTO logos VALUES (?, ?, ?, ?, ?, ?, ?, ?)', entry.row())
+        if over_budget:
+            self.evict()
+        self.db.commit()
+        return self.path(entry)
+
+    def evict(self, target=None):
+        """Drop least recently used logos until the cache fits ``target`` bytes."""
+        if target is None:
+            # Se libera un 10% extra para no desalojar en cada descarga
+            target = self.max_bytes * 9 // 10
+        evicted = []
+        with self._lock:
+            for entry in sorted(self.entries.values(), key=lambda e: e.last_access):
+                if self.total_bytes <= target:
+                    break
+                del self.entries[entry.key]
+                self.total_bytes -= entry.size
+                self._touched.discard(entry.key)
+                evicted.append(entry)
+            self.stats['evictions'] += len(evicted)
+        for entry in evicted:
+            self._remove_file(entry)
+        self.db.executemany('DELETE FROM logos WHERE key = ?', [(entry.key,) for entry in evicted])
+
+    def _remove_file(self, entry):
+        try:
+            os.remove(self.path(entry))
+        except OSError:
+            pass
+
+    def flush(self):
+        """Persist last-access times gathered by ``lookup`` in one transaction."""
+        with self._lock:
+            touched, self._touched = self._touched, set()
+            updates = [
+                (self.entries[key].last_access, key)
+                for key in touched if key in self.entries
+            ]
+        if updates:
+            self.db.executemany('UPDATE logos SET last_access = ? WHERE key = ?', updates)
+            self.db.commit()
+
+    def close(self):
+        self.flush()
+        self.db.close()
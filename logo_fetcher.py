@@ -0,0 +1,177 @@
+"""Pooled, bounded-concurrency logo downloader.
+
+One long-lived ``aiohttp.ClientSession`` is shared by every logo request, so
+connections (and their DNS/TLS setup) are reused through keep-alive.  The
+connector caps concurrency globally and per host, simultaneous requests for
+the same URL are coalesced into one download, and transient failures are
+retried with exponential backoff.
+
+All coroutines must run on the same event loop; the session is created
+lazily on the first fetch, and aiohttp itself is only imported then.
+"""
+import asyncio
+import logging
+import random
+import time
+from collections import namedtuple
+
+log = logging.getLogger(__name__)
+
+USER_AGENT = (
+    'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 '
+    '(KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
+)
+
+# Firmas de los formatos de imagen aceptados
+IMAGE_MAGIC = (b'\x89PNG', b'\xFF\xD8\xFF', b'GIF8')
+
+RETRY_STATUSES = frozenset((408, 425, 429, 500, 502, 503, 504))
+
+
+class RetryableError(Exception):
+    pass
+
+
+class LogoResponse(namedtuple('LogoResponse', 'content etag last_modified')):
+    """A fetched logo; ``content`` is ``None`` when the server answered 304."""
+
+    @property
+    def not_modified(self):
+        return self.content is None
+
+
+def is_image(content):
+    return content.startswith(IMAGE_MAGIC)
+
+
+class LogoFetcher:
+    """Download logo bytes over a shared, pooled HTTP session."""
+
+    def __init__(self, limit=16, limit_per_host=4, timeout=10, retries=2, backoff=0.5):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.timeout = timeout
+        self.retries = retries
+        self.backoff = backoff
+        self._session = None
+        self._inflight = {}
+        self._waiters = {}
+        self.stats = {
+            'requests': 0,
+            'coalesced': 0,
+            'retries': 0,
+            'failures': 0,
+            'not_modified': 0,
+            'bytes': 0,
+        }
+
+    def session(self):
+        if self._session is None or self._session.closed:
+            import aiohttp
+            connector = aiohttp.TCPConnector(
+                limit=self.limit,
+                limit_per_host=self.limit_per_host,
+                ttl_dns_cache=300,
+                keepalive_timeout=30,
+                ssl=False
+            )
+            self._session = aiohttp.ClientSession(
+                connector=connector,
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={'User-Agent': USER_AGENT}
+            )
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def fetch(self, url, validators=None):
+        """Return a ``LogoResponse`` for ``url``, or ``None`` on failure.
+
+        ``validators`` are conditional headers (If-None-Match and
+        If-Modified-Since) for a copy the caller already has.  Callers asking
+        for a URL that is already being downloaded share the same request.
+        Cancelling one caller does not cancel the download for the others;
+        it is only cancelled once nobody is waiting for it any more.
+        """
+        url = url.strip()
+        if not url.startswith(('http://', 'https://')):
+            return None
+
+        task = self._inflight.get(url)
+        if task is None:
+            task = asyncio.ensure_future(self._fetch(url, validators))
+            self._inflight[url] = task
+            task.add_done_callback(lambda t, u=url: self._inflight.pop(u, None))
+        else:
+            self.stats['coalesced'] += 1
+
+        self._waiters[url] = self._waiters.get(url, 0) + 1
+        try:
+            return await asyncio.shield(task)
+        except asyncio.CancelledError:
+            if self._waiters[url] == 1 and not task.done():
+                task.cancel()
+            raise
+        finally:
+            self._waiters[url] -= 1
+            if not self._waiters[url]:
+                del self._waiters[url]
+
+    async def fetch_cached(self, cache, url, timer=None):
+        """Return the path of ``url`` in a ``LogoCache``, downloading it if needed.
+
+        A cached logo that is still fresh is returned as it is; a stale one
+        is revalidated with its validators.  ``timer`` (a ``Histogram``)
+        observes the seconds every network fetch takes.  When the fetch
+        fails the cached copy, if any, is returned.
+        """
+        logo_path = cache.lookup(url, touch=False)
+        if logo_path and not cache.is_stale(url):
+            return logo_path
+
+        # Revalidación condicional: un 304 evita volver a descargar el logo
+        started = time.perf_counter()
+        response = await self.fetch(url, cache.validators(url))
+        if timer is not None:
+            timer.observe(time.perf_counter() - started)
+        if response is None:
+            return logo_path
+        if response.not_modified:
+            return cache.revalidated(url, response.etag, response.last_modified)
+        return cache.store(url, response.content, response.etag, response.last_modified)
+
+    async def _fetch(self, url, validators):
+        import aiohttp
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self.stats['retries'] += 1
+                delay = self.backoff * (2 ** (attempt - 1))
+                await asyncio.sleep(delay + random.uniform(0, delay / 2))
+            try:
+                return await self._get(url, validators)
+            except (RetryableError, aiohttp.ClientError, asyncio.TimeoutError) as e:
+                if attempt == self.retries:
+                    self.stats['failures'] += 1
+                    log.warning("Error downloading logo from %s: %s", url, e)
+        return None
+
+    async def _get(self, url, validators):
+        self.stats['requests'] += 1
+        async with self.session().get(url, headers=validators) as response:
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            if response.status == 304:
+                self.stats['not_modified'] += 1
+                return LogoResponse(None, etag, last_modified)
+            if response.status in RETRY_STATUSES:
+                raise RetryableError(f'HTTP {response.status}')
+            if response.status != 200:
+                return None
+            content = await response.read()
+            self.stats['bytes'] += len(content)
+            if not is_image(content):
+                return None
+            return LogoResponse(content, etag, last_modified)
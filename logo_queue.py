@@ -0,0 +1,94 @@
+"""Viewport-prioritized logo job queue.
+
+Replaces the plain FIFO ``asyncio.Queue``.  The UI periodically hands the
+queue the complete set of logos it still wants (``schedule``): rows on
+screen get ``VISIBLE`` priority, rows just around the viewport
+``PREFETCH``.  Anything queued that is no longer wanted is dropped, and
+downloads already running for channels that went away are cancelled.
+
+Every method must be called on the event loop thread.
+"""
+import asyncio
+import heapq
+
+VISIBLE = 0
+PREFETCH = 1
+# Workers que la app pone a vaciar la cola
+WORKERS = 8
+
+
+class LogoQueue:
+    """Priority queue of ``(channel_id, logo_url)`` jobs."""
+
+    def __init__(self):
+        self._heap = []
+        self._queued = {}
+        self._active = {}
+        self._seq = 0
+        self._wakeup = asyncio.Event()
+        self.stats = {'scheduled': 0, 'dropped': 0, 'cancelled': 0, 'completed': 0}
+
+    def __len__(self):
+        return len(self._queued)
+
+    def put(self, channel_id, logo_url, priority=VISIBLE):
+        """Queue one job; a better priority replaces a queued one."""
+        if channel_id in self._active:
+            return
+        entry = self._queued.get(channel_id)
+        if entry is not None:
+            if entry[3] == logo_url and entry[0] <= priority:
+                return
+            entry[4] = False
+        self._seq += 1
+        entry = [priority, self._seq, channel_id, logo_url, True]
+        self._queued[channel_id] = entry
+        heapq.heappush(self._heap, entry)
+        self.stats['scheduled'] += 1
+        self._wakeup.set()
+
+    def schedule(self, jobs):
+        """Make ``jobs`` (``(channel_id, url, priority)``) the wanted set.
+
+        Queued jobs outside it are dropped and running ones cancelled.
+        """
+        wanted = set()
+        for channel_id, logo_url, priority in jobs:
+            wanted.add(channel_id)
+            self.put(channel_id, logo_url, priority)
+
+        for channel_id in [cid for cid in self._queued if cid not in wanted]:
+            self._queued.pop(channel_id)[4] = False
+            self.stats['dropped'] += 1
+        for channel_id, task in list(self._active.items()):
+            if channel_id not in wanted and not task.done():
+                task.cancel()
+                self.stats['cancelled'] += 1
+
+        # Compactar el heap cuando acumula demasiadas entradas anuladas
+        if len(self._heap) > 4 * len(self._queued) + 64:
+            self._heap = [entry for entry in self._heap if entry[4]]
+            heapq.heapify(self._heap)
+
+    def clear(self):
+        self.schedule(())
+
+    async def get(self):
+        """Wait for the most urgent job and return ``(channel_id, logo_url)``."""
+        while True:
+            while self._heap:
+                priority, seq, channel_id, logo_url, valid = heapq.heappop(self._heap)
+                if valid:
+                    del self._queued[channel_id]
+                    return channel_id, logo_url
+            self._wakeup.clear()
+            await self._wakeup.wait()
+
+    def started(self, channel_id, task):
+        self._active[channel_id] = task
+
+    def finished(self, channel_id, task):
+        if self._active.get(channel_id) is task:
+            del self._active[channel_id]
+        if not task.cancelled():
+            self.stats['completed'] += 1
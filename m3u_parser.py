@@ -0,0 +1,216 @@
+"""Headless M3U playlist parser.
+
+Streams channel records out of an M3U/M3U8 playlist without importing kivy,
+kivymd or vlc, so the same code backs the PyM3U app and batch jobs.
+
+Each record is a small dict using the keys the app has always used:
+``name``, ``logo``, ``group``, ``id`` and ``url``, plus ``vlcopts`` when the
+entry carries ``#EXTVLCOPT`` lines, and ``attrs``/``title`` (every raw
+attribute and the EXTINF title) when the parser was created with
+``keep_attrs=True``.
+"""
+import io
+import os
+import re
+
+# Un solo patrón compilado para todos los atributos key="value" de la línea.
+# Los cuantificadores posesivos (Python 3.11+) evitan el backtracking sobre el
+# título; en versiones anteriores se emula con un lookahead atómico.
+try:
+    ATTR_RE = re.compile(r'([A-Za-z0-9_-]++)="([^"]*+)"')
+except re.error:
+    ATTR_RE = re.compile(r'(?=([A-Za-z0-9_-]+))\1="([^"]*)"')
+
+# Título tras la primera coma fuera de comillas
+TITLE_RE = re.compile(r'#EXTINF:[^,"]*(?:"[^"]*"[^,"]*)*,(.*)')
+
+# Atributos EXTINF que se guardan en el registro del canal
+FIELD_ATTRS = (
+    ('tvg-logo', 'logo'),
+    ('tvg-name', 'name'),
+    ('group-title', 'group'),
+    ('tvg-id', 'id'),
+)
+
+# Canales por lote al cargar: el primero pequeño para pintar cuanto antes
+FIRST_CHUNK = 25
+LOAD_CHUNK = 2000
+
+
+def parse_attributes(line):
+    """Return every ``key="value"`` pair of an M3U directive line."""
+    return dict(ATTR_RE.findall(line))
+
+
+def parse_extinf(line, keep_attrs=False):
+    """Parse one ``#EXTINF:`` line into a channel info dict (without url).
+
+    The title after the attribute list is used as the name when there is no
+    ``tvg-name`` attribute.
+    """
+    attrs = dict(ATTR_RE.findall(line))
+    info = {}
+    for key, field in FIELD_ATTRS:
+        value = attrs.get(key)
+        if value:
+            info[field] = value
+
+    if 'name' not in info or keep_attrs:
+        match = TITLE_RE.match(line)
+        title = match.group(1).strip() if match else ''
+        if title and 'name' not in info:
+            info['name'] = title
+        if keep_attrs:
+            info['title'] = title
+    if keep_attrs:
+        info['attrs'] = attrs
+    return info
+
+
+def format_channel(channel):
+    """Render a channel record back into M3U lines (no trailing newline).
+
+    Raw ``attrs`` from ``keep_attrs=True`` are written back as they were;
+    otherwise the logo, group and tvg-id fields become attributes.
+    """
+    attrs = dict(channel.get('attrs') or ())
+    for key, field in FIELD_ATTRS:
+        value = channel.get(field)
+        if value and key not in attrs and field != 'name':
+            attrs[key] = value
+    # Las comillas dobles no pueden ir dentro de un valor
+    extinf = ''.join(f' {key}="{value.replace(chr(34), chr(39))}"' for key, value in attrs.items())
+    title = channel.get('title') or channel.get('name', '')
+    lines = [f'#EXTINF:-1{extinf},{title}']
+    lines.extend(f'#EXTVLCOPT:{opt}' for opt in channel.get('vlcopts', ()))
+    lines.append(channel.get('url', ''))
+    return '\n'.join(lines)
+
+
+class M3UParser:
+    """Line-oriented M3U state machine.
+
+    Feed it lines with ``feed_line``; it returns a finished channel record
+    when a URL line closes an entry and ``None`` otherwise.  ``header`` holds
+    the attributes of the ``#EXTM3U`` line (``x-tvg-url`` and friends).
+    """
+
+    def __init__(self, keep_attrs=False):
+        self.keep_attrs = keep_attrs
+        self.header = {}
+        self.lines = 0
+        self._info = None
+        self._group = None
+        self._vlcopts = None
+
+    def feed_line(self, line):
+        for channel in self.parse_lines((line,)):
+            return channel
+        return None
+
+    def _directive(self, line):
+        if line.startswith('#EXTGRP:'):
+            self._group = line[8:].strip()
+        elif line.startswith('#EXTVLCOPT:'):
+            if self._vlcopts is None:
+                self._vlcopts = []
+            self._vlcopts.append(line[11:].strip())
+        elif line.startswith('#EXTM3U'):
+            self.header = parse_attributes(line)
+
+    def parse_lines(self, lines):
+        """Yield channel records from an iterable of text lines."""
+        keep_attrs = self.keep_attrs
+        directive = self._directive
+        count = 0
+        try:
+            for line in lines:
+                count += 1
+                line = line.strip()
+                if not line:
+                    continue
+                if line[0] == '#':
+                    if line.startswith('#EXTINF:'):
+                        self._info = parse_extinf(line, keep_attrs)
+                    else:
+                        directive(line)
+                    continue
+
+                info = self._info
+                if info is None:
+                    # URL sin #EXTINF: se ignora, igual que antes
+                    self._group = self._vlcopts = None
+                    continue
+
+                info['url'] = line
+                if self._group is not None:
+                    if 'group' not in info and self._group:
+                        info['group'] = self._group
+                    self._group = None
+                if self._vlcopts is not None:
+                    info['vlcopts'] = self._vlcopts
+                    self._vlcopts = None
+                self._info = None
+                yield info
+        finally:
+            self.lines += count
+
+
+def is_url(source):
+    """True for http(s) playlist sources, which are fetched instead of opened."""
+    return isinstance(source, str) and source[:8].lower().startswith(('http://', 'https://'))
+
+
+def open_text(source, encoding='utf-8-sig'):
+    """Wrap a path or binary stream as a text stream, tolerating bad bytes."""
+    if isinstance(source, (str, os.PathLike)):
+        return open(source, 'r', encoding=encoding, errors='replace')
+    if isinstance(source, io.TextIOBase):
+        return source
+    return io.TextIOWrapper(source, encoding=encoding, errors='replace')
+
+
+def iter_channels(source, encoding='utf-8-sig', keep_attrs=False, parser=None):
+    """Lazily yield channel records from a playlist.
+
+    ``source`` may be a path, a text or binary file object, or any iterable
+    of ``str``/``bytes`` lines.  Pass your own ``parser`` to read the
+    ``#EXTM3U`` header attributes once iteration is done.
+    """
+    if parser is None:
+        parser = M3UParser(keep_attrs=keep_attrs)
+
+    if isinstance(source, (str, os.PathLike)):
+        with open_text(source, encoding) as f:
+            yield from parser.parse_lines(f)
+    elif hasattr(source, 'read'):
+        stream = open_text(source, encoding)
+        try:
+            yield from parser.parse_lines(stream)
+        finally:
+            if stream is not source:
+                stream.detach()
+    else:
+        lines = (
+            line.decode(encoding, 'replace') if isinstance(line, bytes) else line
+            for line in source
+        )
+        yield from parser.parse_lines(lines)
+
+
+def iter_batches(channels, first=FIRST_CHUNK, size=LOAD_CHUNK):
+    """Group ``channels`` into lists of ``first``, then ``size`` records.
+
+    The last list holds whatever is left; no list is ever empty.
+    """
+    batch = []
+    limit = first
+    for channel in channels:
+        batch.append(channel)
+        if len(batch) < limit:
+            continue
+        yield batch
+        batch = []
+        limit = size
+    if batch:
+        yield batch
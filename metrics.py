@@ -0,0 +1,250 @@
+"""In-process metrics: counters, gauges and histograms.
+
+Components keep counting in their own plain ``stats`` dicts
+(``LogoCache.stats``, ``LogoFetcher.stats``, ``SearchScheduler.stats()``...)
+and know nothing about this module.  The app registers those numbers here as
+*collected* counters or gauges, which are only read when the registry is
+exported, and measures its own timings into ``Histogram``s.
+
+Histograms use fixed buckets, as Prometheus does: ``observe`` is a
+``bisect`` plus two additions under a lock, cheap enough to run every frame,
+and quantiles are estimated from the bucket counts.  Those cover the whole
+run; a histogram created with ``window`` also keeps its last values, which
+is what a live overlay wants to show.
+
+``MetricsRegistry.dump`` writes everything as JSON, or in the Prometheus
+text format when the file name ends in ``.prom``.
+"""
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+
+# Segundos: de un acceso a caché a una descarga lenta
+TIME_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+# Duración de un frame: 240, 120, 60, 30 y 20 fps, y tirones
+FRAME_BUCKETS = (1 / 240, 1 / 120, 1 / 60, 1 / 30, 1 / 20, 0.1, 0.25, 0.5, 1.0)
+
+
+class Counter:
+    """A value that only grows; ``fn`` reads it from somewhere else instead."""
+
+    kind = 'counter'
+
+    def __init__(self, name, help='', fn=None):
+        self.name = name
+        self.help = help
+        self.fn = fn
+        self._value = 0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self._value += amount
+
+    @property
+    def value(self):
+        return self.fn() if self.fn is not None else self._value
+
+    def snapshot(self):
+        return self.value
+
+
+class Gauge(Counter):
+    """A value that goes up and down: queue depth, widgets alive, loop lag."""
+
+    kind = 'gauge'
+
+    def set(self, value):
+        self._value = value
+
+    def dec(self, amount=1):
+        self.inc(-amount)
+
+
+class Histogram:
+    """Distribution of observed values over fixed buckets."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help='', buckets=TIME_BUCKETS, window=0):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(sorted(buckets))
+        self.recent = deque(maxlen=window) if window else None
+        # Una cuenta por cubo más la de los valores por encima del último
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.last = None
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+            self.last = value
+            if self.recent is not None:
+                self.recent.append(value)
+
+    def time(self):
+        """Context manager observing the seconds its block takes."""
+        return _Timer(self)
+
+    def quantile(self, q):
+        """Estimate the ``q`` quantile (0..1) by interpolating inside its bucket."""
+        with self._lock:
+            counts = list(self.counts)
+            total = self.count
+        if not total:
+            return None
+        rank = q * total
+        seen = 0
+        for i, count in enumerate(counts):
+            if seen + count >= rank and count:
+                if i == len(self.buckets):
+                    # Por encima del último cubo no hay límite con el que interpolar
+                    return self.buckets[-1]
+                lower = self.buckets[i - 1] if i else 0.0
+                return lower + (self.buckets[i] - lower) * (rank - seen) / count
+            seen += count
+        return self.buckets[-1]
+
+    def recent_quantile(self, q):
+        """Exact ``q`` quantile of the last ``window`` values, ``None`` if none."""
+        with self._lock:
+            values = sorted(self.recent or ())
+        if not values:
+            return None
+        return values[min(int(len(values) * q), len(values) - 1)]
+
+    def clear_recent(self):
+        """Forget the recent window, e.g. after switching a mode being compared."""
+        with self._lock:
+            if self.recent is not None:
+                self.recent.clear()
+
+    @property
+    def mean(self):
+        return self.sum / self.count if self.count else None
+
+    def snapshot(self):
+        with self._lock:
+            counts = list(self.counts)
+            total, value_sum, last = self.count, self.sum, self.last
+        cumulative = []
+        seen = 0
+        for bound, count in zip(self.buckets, counts):
+            seen += count
+            cumulative.append([bound, seen])
+        snapshot = {
+            'count': total,
+            'sum': value_sum,
+            'last': last,
+            'p50': self.quantile(0.5),
+            'p95': self.quantile(0.95),
+            'buckets': cumulative,
+        }
+        if self.recent is not None:
+            snapshot['recent_p50'] = self.recent_quantile(0.5)
+            snapshot['recent_p95'] = self.recent_quantile(0.95)
+        return snapshot
+
+
+class _Timer:
+    def __init__(self, histogram):
+        self.histogram = histogram
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start)
+
+
+class MetricsRegistry:
+    """Named metrics of one process, exportable as JSON or Prometheus text."""
+
+    def __init__(self, prefix='pym3u'):
+        self.prefix = prefix
+        self.metrics = {}
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name, *args, **kwargs):
+        with self._lock:
+            metric = self.metrics.get(name)
+            if metric is None:
+                metric = self.metrics[name] = cls(name, *args, **kwargs)
+            elif type(metric) is not cls:
+                raise ValueError(f'{name} ya está registrada como {metric.kind}')
+            return metric
+
+    def counter(self, name, help='', fn=None):
+        return self._get(Counter, name, help, fn)
+
+    def gauge(self, name, help='', fn=None):
+        return self._get(Gauge, name, help, fn)
+
+    def histogram(self, name, help='', buckets=TIME_BUCKETS, window=0):
+        return self._get(Histogram, name, help, buckets, window)
+
+    def get(self, name):
+        return self.metrics.get(name)
+
+    def value(self, name, default=None):
+        """Current value of a counter or gauge, ``default`` if missing or unreadable."""
+        metric = self.metrics.get(name)
+        try:
+            return metric.value if metric is not None else default
+        except Exception:
+            return default
+
+    def snapshot(self):
+        """``{name: value}`` for counters and gauges, a dict per histogram."""
+        result = {}
+        for name, metric in list(self.metrics.items()):
+            try:
+                result[name] = metric.snapshot()
+            except Exception:
+                # Un colector que falla no debe impedir exportar el resto
+                result[name] = None
+        return result
+
+    def to_json(self):
+        return json.dumps({'time': time.time(), 'metrics': self.snapshot()}, indent=2)
+
+    def to_prometheus(self):
+        lines = []
+        for name, metric in list(self.metrics.items()):
+            full = f'{self.prefix}_{name}' if self.prefix else name
+            if metric.help:
+                lines.append(f'# HELP {full} {metric.help}')
+            lines.append(f'# TYPE {full} {metric.kind}')
+            if metric.kind == 'histogram':
+                data = metric.snapshot()
+                for bound, count in data['buckets']:
+                    lines.append(f'{full}_bucket{{le="{bound:g}"}} {count}')
+                lines.append(f'{full}_bucket{{le="+Inf"}} {data["count"]}')
+                lines.append(f'{full}_sum {data["sum"]}')
+                lines.append(f'{full}_count {data["count"]}')
+            else:
+                try:
+                    value = metric.value
+                except Exception:
+                    continue
+                lines.append(f'{full} {value}')
+        return '\n'.join(lines) + '\n'
+
+    def dump(self, path):
+        """Write every metric to ``path``: Prometheus text for ``.prom``, else JSON."""
+        text = self.to_prometheus() if path.endswith('.prom') else self.to_json()
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+        return path
@@ -0,0 +1,247 @@
+"""Multi-process parsing of very large playlists.
+
+The file is memory-mapped and cut into byte ranges that each start at an
+entry: the ``#EXTINF:`` line that follows a URL line, together with any
+directive lines (``#EXTVLCOPT``, ``#EXTGRP``) that precede it.  At those
+points ``M3UParser`` carries no state, so every range parses on its own
+exactly as it would inside a sequential read.
+
+Worker processes parse the ranges and send back ``PackedChannels``: per
+column a single string plus an ``array`` of end offsets, the group titles
+as a small value table plus ids.  Pickling that is a handful of large
+objects instead of a dict per channel, and ``ChannelStore.extend_packed``
+adopts the strings as they are.  Results are consumed in range order, so
+the merged store keeps the file's channel order.
+
+The first range is small and parsed in the calling thread while the pool
+starts, so the first screen of channels does not wait for the workers.
+
+The workers are not forked from the caller, whose other threads (the
+asyncio loop, thread pools, the logging listener) may hold locks at fork
+time that would stay held in the child forever.  Neither are they
+``multiprocessing`` spawn or forkserver children, which import the
+caller's main module, in the app kivy and its window.  ``RangeWorkers``
+starts fresh interpreters on the small ``parallel_worker.py`` entry module
+and talks to them over pipes: ranges go out round-robin, results come back
+in the same order.
+"""
+import io
+import mmap
+import os
+import pickle
+import subprocess
+import sys
+from array import array
+from collections import namedtuple
+from itertools import accumulate
+
+from channel_store import ChannelStore
+from m3u_parser import M3UParser
+
+# Por debajo de esto el arranque del pool cuesta más de lo que ahorra
+MIN_PARALLEL_SIZE = 32 * 1024 * 1024
+FIRST_RANGE = 256 * 1024
+RANGE_SIZE = 8 * 1024 * 1024
+# Al menos unos cuatro tramos por worker para repartir bien, pero no minúsculos
+MIN_RANGE_SIZE = 1024 * 1024
+
+ENTRY = b'\n#EXTINF:'
+WORKER = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'parallel_worker.py')
+
+
+class PackedChannels(namedtuple('PackedChannels', (
+        'count names urls logos tvg_ids group_values group_ids vlcopts header unnamed'))):
+    """Columnar channels of one range.
+
+    ``names``/``urls``/``logos``/``tvg_ids`` are ``(text, ends)`` pairs;
+    ``group_ids`` index ``group_values``; ``vlcopts`` and ``unnamed`` (rows
+    without a name) use row numbers local to the range.
+    """
+
+
+def entry_start(data, pos, lo, hi):
+    """First offset at or after ``pos`` where the parser state is clean, or ``hi``."""
+    found = data.find(ENTRY, max(pos - 1, lo), hi)
+    if found == -1:
+        return hi
+    boundary = found + 1
+    # Las directivas justo antes del #EXTINF pertenecen a esa entrada
+    while boundary > lo:
+        line_start = max(data.rfind(b'\n', lo, boundary - 1) + 1, lo)
+        line = data[line_start:boundary].strip()
+        if line and not line.startswith(b'#'):
+            break
+        boundary = line_start
+    return boundary
+
+
+def split_ranges(data, first=FIRST_RANGE, size=RANGE_SIZE):
+    """Cut ``data`` (bytes or mmap) into ``(start, end)`` ranges at entry boundaries."""
+    total = len(data)
+    ranges = []
+    start = 0
+    target = first
+    while start < total:
+        end = entry_start(data, start + target, start, total) if start + target < total else total
+        if end > start:
+            ranges.append((start, end))
+            start = end
+        else:
+            # Sin ninguna URL en el tramo: se amplía hasta encontrar un corte
+            target += size
+            continue
+        target = size
+    return ranges
+
+
+def pack_channels(channels, parser):
+    """Turn parsed channel dicts into a ``PackedChannels``."""
+    names = []
+    urls = []
+    logos = []
+    tvg_ids = []
+    group_values = ['']
+    group_index = {'': 0}
+    group_ids = array('I')
+    vlcopts = {}
+    unnamed = []
+    for row, channel in enumerate(channels):
+        name = channel.get('name')
+        if not name:
+            unnamed.append(row)
+            name = ''
+        names.append(name)
+        urls.append(channel.get('url', ''))
+        logos.append(channel.get('logo', ''))
+        tvg_ids.append(channel.get('id', ''))
+        group = channel.get('group', '')
+        group_id = group_index.get(group)
+        if group_id is None:
+            group_id = group_index[group] = len(group_values)
+            group_values.append(group)
+        group_ids.append(group_id)
+        opts = channel.get('vlcopts')
+        if opts:
+            vlcopts[row] = opts
+
+    def column(values):
+        return ''.join(values), array('I', accumulate(map(len, values)))
+
+    return PackedChannels(
+        len(urls), column(names), column(urls), column(logos), column(tvg_ids),
+        group_values, group_ids, vlcopts, parser.header, unnamed
+    )
+
+
+def parse_range(path, start, end):
+    """Worker: parse one byte range of ``path``."""
+    with open(path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            data = mapped[start:end]
+    # Los cortes caen siempre a principio de línea: ningún carácter queda partido
+    text = data.decode('utf-8-sig' if start == 0 else 'utf-8', 'replace')
+    parser = M3UParser()
+    return pack_channels(parser.parse_lines(io.StringIO(text, newline=None)), parser)
+
+
+def plan(path, workers, first=FIRST_RANGE, size=RANGE_SIZE):
+    """Byte ranges of ``path`` and its size."""
+    total = os.path.getsize(path)
+    if not total:
+        return [], 0
+    size = min(size, max(total // (workers * 4), MIN_RANGE_SIZE))
+    with open(path, 'rb') as f:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+            return split_ranges(mapped, first, size), total
+
+
+class RangeWorkers:
+    """``count`` fresh ``parallel_worker.py`` processes parsing ranges of one file."""
+
+    def __init__(self, count):
+        self.processes = []
+        try:
+            for _ in range(count):
+                self.processes.append(subprocess.Popen(
+                    [sys.executable, WORKER], stdin=subprocess.PIPE, stdout=subprocess.PIPE
+                ))
+        except BaseException:
+            self.close()
+            raise
+
+    def submit(self, path, ranges):
+        """Hand ``ranges`` out round-robin; results come back through ``results``."""
+        for number, (start, end) in enumerate(ranges):
+            stdin = self.processes[number % len(self.processes)].stdin
+            pickle.dump((path, start, end), stdin, pickle.HIGHEST_PROTOCOL)
+        # Al llegar al final de su entrada cada worker termina
+        for process in self.processes:
+            process.stdin.close()
+
+    def results(self, count):
+        """Yield the ``PackedChannels`` of the ``count`` submitted ranges, in order."""
+        for number in range(count):
+            process = self.processes[number % len(self.processes)]
+            try:
+                ok, result = pickle.load(process.stdout)
+            except EOFError:
+                raise RuntimeError(f'El proceso de parseo terminó con código {process.wait()}') from None
+            if not ok:
+                raise result
+            yield result
+
+    def close(self):
+        """Stop the workers, whether they finished or not."""
+        for process in self.processes:
+            if process.poll() is None:
+                process.kill()
+            for pipe in (process.stdin, process.stdout):
+                if pipe is not None and not pipe.closed:
+                    pipe.close()
+            process.wait()
+
+
+def iter_chunks(path, workers=None, first=FIRST_RANGE, size=RANGE_SIZE):
+    """Yield ``(PackedChannels, percent)`` for ``path`` in file order.
+
+    Closing the generator early stops the workers.
+    """
+    workers = workers or os.cpu_count() or 1
+    ranges, total = plan(path, workers, first, size)
+    if not ranges:
+        return
+    start, end = ranges[0]
+    if len(ranges) == 1:
+        yield parse_range(path, start, end), 100
+        return
+    pool = RangeWorkers(min(workers, len(ranges) - 1))
+    try:
+        pool.submit(path, ranges[1:])
+        yield parse_range(path, start, end), end * 100 // total
+        for (start, end), chunk in zip(ranges[1:], pool.results(len(ranges) - 1)):
+            yield chunk, end * 100 // total
+    finally:
+        pool.close()
+
+
+def parse_parallel(path, workers=None):
+    """Parse ``path`` into a packed ``ChannelStore`` using ``workers`` processes."""
+    store = ChannelStore.packed()
+    for chunk, _ in iter_chunks(path, workers):
+        store.extend_packed(chunk)
+    return store
+
+
+def can_start_workers():
+    """Whether ``parallel_worker.py`` can be run: a real interpreter, not a frozen app."""
+    return bool(sys.executable) and not getattr(sys, 'frozen', False) and os.path.exists(WORKER)
+
+
+def should_parallelize(path):
+    """Whether the app should split a local playlist: big file, several cores, workers available."""
+    if not can_start_workers() or (os.cpu_count() or 1) < 2:
+        return False
+    try:
+        return os.path.getsize(path) >= MIN_PARALLEL_SIZE
+    except OSError:
+        return False
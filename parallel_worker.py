@@ -0,0 +1,35 @@
+"""Worker process of ``parallel_parser``.
+
+Started by ``RangeWorkers`` as a fresh interpreter running this file, so it
+never imports the app (kivy, its window, the asyncio and logging threads)
+and inherits none of its locks, as a forked worker would.  It reads
+pickled ``(path, start, end)`` ranges from stdin until EOF and writes one
+pickled ``(True, PackedChannels)`` or ``(False, exception)`` per range to
+stdout, in the order they came.
+"""
+import pickle
+import sys
+
+from parallel_parser import parse_range
+
+
+def main():
+    tasks = sys.stdin.buffer
+    results = sys.stdout.buffer
+    # Nada más puede escribir en el canal de resultados
+    sys.stdout = sys.stderr
+    while True:
+        try:
+            path, start, end = pickle.load(tasks)
+        except EOFError:
+            return
+        try:
+            result = (True, parse_range(path, start, end))
+        except Exception as e:
+            result = (False, e)
+        pickle.dump(result, results, pickle.HIGHEST_PROTOCOL)
+        results.flush()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,167 @@
+"""Long-lived libVLC player with fast channel zapping.
+
+One ``vlc.Instance`` and one media player are created on first use and kept
+for the life of the app; switching channels only swaps the media.  The
+neighbours of the current channel are pre-parsed (``preload``): their
+``Media`` objects are created with the caching options and their metadata
+parsed in the background, which resolves the host and probes the stream or
+fetches the HLS manifest before the user asks for them.  That is all it
+does: nothing is opened for playback or buffered, so switching to a
+pre-parsed channel still pays for connecting and filling the
+``network-caching`` buffer; only instance start-up and the metadata round
+trips are saved.  Pre-rolling the neighbours in standby players would hide
+the buffering too, but without an embedded video output every such player
+opens a window of its own.  ``benchmarks/bench_zap.py`` measures zapping
+with and without ``preload``.
+
+Zap latency is measured from ``play`` until libVLC reports playback time
+moving, and handed to ``on_zap(url, seconds, preloaded)`` (called from a
+libVLC thread).
+
+The ``vlc`` bindings load libVLC and its plugin cache, which is slow on
+small devices, so they are only imported when the player is first used.
+"""
+import time
+from collections import OrderedDict
+
+
+class PlayerEngine:
+    """Single libVLC instance and player reused for every channel."""
+
+    def __init__(self, network_caching=1000, live_caching=1000, file_caching=300,
+                 instance_args=('--quiet',), preload_timeout=5000, max_media=5, on_zap=None):
+        # Milisegundos de búfer: menos arranca antes, más aguanta mejor la red
+        self.network_caching = network_caching
+        self.live_caching = live_caching
+        self.file_caching = file_caching
+        self.instance_args = list(instance_args)
+        self.preload_timeout = preload_timeout
+        self.max_media = max_media
+        self.on_zap = on_zap
+        self._instance = None
+        self._player = None
+        self._media = OrderedDict()
+        self._zap = None
+        self.current_url = None
+        self.stats = {'zaps': 0, 'preloaded': 0, 'preloads': 0, 'last_latency': None}
+
+    @property
+    def instance(self):
+        if self._instance is None:
+            import vlc
+            self._instance = vlc.Instance(self.instance_args)
+        return self._instance
+
+    @property
+    def player(self):
+        if self._player is None:
+            import vlc
+            self._player = self.instance.media_player_new()
+            events = self._player.event_manager()
+            events.event_attach(vlc.EventType.MediaPlayerTimeChanged, self._on_time_changed)
+        return self._player
+
+    def configure(self, **options):
+        """Change caching options; media opened from now on use them."""
+        for name, value in options.items():
+            if not hasattr(self, name):
+                raise AttributeError(name)
+            setattr(self, name, value)
+        self._release_media()
+
+    def media_options(self, extra=()):
+        options = [
+            f':network-caching={self.network_caching}',
+            f':live-caching={self.live_caching}',
+            f':file-caching={self.file_caching}',
+        ]
+        # Las líneas #EXTVLCOPT de la lista van tal cual, con ':' delante
+        options.extend(opt if opt.startswith(':') else ':' + opt for opt in extra)
+        return options
+
+    def _get_media(self, url, options):
+        key = (url, tuple(options))
+        media = self._media.get(key)
+        if media is not None:
+            self._media.move_to_end(key)
+            return media, True
+        media = self.instance.media_new(url, *self.media_options(options))
+        self._media[key] = media
+        while len(self._media) > self.max_media:
+            old_key, old = self._media.popitem(last=False)
+            old.release()
+        return media, False
+
+    def preload(self, channels):
+        """Pre-parse ``(url, options)`` pairs, e.g. the previous and next channel.
+
+        Only the media metadata is fetched; the stream is not buffered.
+        """
+        import vlc
+        for url, options in channels:
+            if not url:
+                continue
+            media, cached = self._get_media(url, options)
+            if cached:
+                continue
+            self.stats['preloads'] += 1
+            flags = vlc.MediaParseFlag.network | vlc.MediaParseFlag.local
+            media.parse_with_options(flags, self.preload_timeout)
+
+    def play(self, url, options=()):
+        started = time.perf_counter()
+        media, preloaded = self._get_media(url, options)
+        player = self.player
+        self._zap = None
+        self.current_url = url
+        self.stats['zaps'] += 1
+        if preloaded:
+            self.stats['preloaded'] += 1
+        # set_media() detiene la entrada anterior: sus eventos ya no cuentan
+        player.set_media(media)
+        self._zap = (url, started, preloaded)
+        player.play()
+
+    def _on_time_changed(self, event):
+        zap = self._zap
+        if zap is None:
+            return
+        self._zap = None
+        url, started, preloaded = zap
+        latency = time.perf_counter() - started
+        self.stats['last_latency'] = latency
+        if self.on_zap is not None:
+            self.on_zap(url, latency, preloaded)
+
+    def is_playing(self):
+        return self._player is not None and bool(self._player.is_playing())
+
+    def pause(self):
+        if self._player is not None:
+            self._player.set_pause(1)
+
+    def resume(self):
+        # play() reanuda la pausa y vuelve a abrir un directo que se cortó
+        if self._player is not None:
+            self._player.play()
+
+    def stop(self):
+        self._zap = None
+        if self._player is not None:
+            self._player.stop()
+
+    def _release_media(self):
+        # El reproductor conserva su propia referencia al medio actual
+        for media in self._media.values():
+            media.release()
+        self._media.clear()
+
+    def close(self):
+        self.stop()
+        self._release_media()
+        if self._player is not None:
+            self._player.release()
+            self._player = None
+        if self._instance is not None:
+            self._instance.release()
+            self._instance = None
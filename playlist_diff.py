@@ -0,0 +1,217 @@
+"""Incremental reload of a playlist file that changed on disk.
+
+``PlaylistBaseline`` remembers one 64-bit hash per entry of the file the
+store was loaded from (an entry is the bytes from just after one URL line
+to the end of the next: its directives, ``#EXTINF`` and URL), in list order,
+next to the row showing it.  When the file changes, the new entries are
+hashed and walked against the old sequence: equal hashes keep their row, a
+short search ahead resynchronises after insertions and deletions, and a
+hash -> position table, built only when that fails, finds blocks that moved
+far.  Only the entries left unmatched are parsed.
+
+An unmatched entry whose key (tvg-id, else URL) belongs to an old entry that
+disappeared is that channel *changed*; otherwise it was *added*.  Old
+entries nobody claimed were *removed*.  Applying the diff appends the
+changed and added channels to the store, retires the rows they replace and
+sets the store's order to the new file order, so the search index, the
+group index and the list only handle the rows that actually changed.
+Reading and hashing the file remains a pass over its bytes.
+"""
+import re
+from array import array
+from collections import namedtuple
+
+from m3u_parser import M3UParser, parse_attributes
+
+# Directivas y líneas en blanco hasta la línea de la URL, incluida
+ENTRY_RE = re.compile(rb'(?:[ \t\r]*(?:#[^\n]*)?\n)*[ \t]*[^#\s][^\n]*(?:\n|\Z)')
+# Hasta dónde se busca una entrada desplazada antes de recurrir al diccionario
+RESYNC_WINDOW = 256
+UNMATCHED = 0xFFFFFFFF
+
+
+class PlaylistDiff(namedtuple('PlaylistDiff', 'order hashes added changed removed header')):
+    """What changed between two versions of a playlist file.
+
+    ``order`` has the row of every entry of the new file, ``UNMATCHED`` for
+    those in ``added`` (``(position, channel)``) and ``changed``
+    (``(position, old_row, channel)``); ``removed`` lists old rows.
+    """
+
+
+def iter_entries(data):
+    """Yield the bytes of every channel entry of a playlist, in file order.
+
+    URL lines without an ``#EXTINF`` are skipped, as the parser does.
+    """
+    if data.startswith(b'\xef\xbb\xbf'):
+        data = data[3:]
+    for match in ENTRY_RE.finditer(data):
+        entry = match.group()
+        if entry.startswith(b'#EXTINF:') or b'\n#EXTINF:' in entry:
+            yield entry
+
+
+def playlist_header(data):
+    """Attributes of the ``#EXTM3U`` line at the top of ``data``."""
+    first = data[:data.find(b'\n')].lstrip(b'\xef\xbb\xbf').strip()
+    if first.startswith(b'#EXTM3U'):
+        return parse_attributes(first.decode('utf-8', 'replace'))
+    return {}
+
+
+def channel_key(channel):
+    return channel.get('id') or channel.get('url', '')
+
+
+def row_key(store, row):
+    return store.tvg_id(row) or store.url(row)
+
+
+def same_channel(store, row, channel):
+    """Whether ``row`` already shows ``channel`` exactly."""
+    return (
+        store.name(row) == channel['name']
+        and store.url(row) == channel.get('url', '')
+        and store.logo(row) == channel.get('logo', '')
+        and store.tvg_id(row) == channel.get('id', '')
+        and store.group(row) == channel.get('group', '')
+        and store.vlcopts.get(row) == channel.get('vlcopts')
+    )
+
+
+class PlaylistBaseline:
+    """Entry hashes of the file behind a store, to diff it when it changes."""
+
+    def __init__(self, store, hashes, rows):
+        self.store = store
+        self.hashes = hashes
+        self.rows = rows
+
+    @classmethod
+    def from_file(cls, path, store):
+        """Hash ``path`` as loaded into ``store``.
+
+        If the file no longer has one entry per row it changed after
+        loading: the baseline is left empty, so the next diff compares every
+        entry with the store by key.
+        """
+        with open(path, 'rb') as f:
+            data = f.read()
+        hashes = array('q', map(hash, iter_entries(data)))
+        rows = store.all_rows()
+        if len(hashes) != len(rows):
+            return cls(store, array('q'), array('I'))
+        return cls(store, hashes, array('I', rows))
+
+    def diff(self, data):
+        """Compare the new contents of the file; ``None`` if no channel changed."""
+        entries = list(iter_entries(data))
+        hashes = array('q', map(hash, entries))
+        old = self.hashes
+        rows = self.rows
+        count = len(old)
+        order = array('I', [UNMATCHED]) * len(hashes)
+        used = bytearray(count)
+        where = None
+        unmatched = []
+        i = 0
+        for position, value in enumerate(hashes):
+            if i < count and old[i] == value and not used[i]:
+                found = i
+            else:
+                # Entradas repetidas: la siguiente igual que no se haya emparejado ya
+                found = None
+                start = i
+                end = min(i + RESYNC_WINDOW, count)
+                while found is None:
+                    try:
+                        found = old.index(value, start, end)
+                    except ValueError:
+                        break
+                    if used[found]:
+                        start = found + 1
+                        found = None
+                if found is None:
+                    # Bloques movidos lejos: posiciones de cada entrada anterior,
+                    # de mayor a menor para sacar las ya emparejadas por el final
+                    if where is None:
+                        where = {}
+                        for index in range(count - 1, -1, -1):
+                            where.setdefault(old[index], []).append(index)
+                    positions = where.get(value)
+                    while positions and used[positions[-1]]:
+                        positions.pop()
+                    found = positions[-1] if positions else None
+                    if found is None:
+                        unmatched.append(position)
+                        continue
+            used[found] = 1
+            order[position] = rows[found]
+            i = found + 1
+
+        store = self.store
+        if count:
+            # Entradas anteriores que no aparecen: quitadas o cambiadas
+            gone = []
+            found = used.find(0)
+            while found != -1:
+                gone.append(rows[found])
+                found = used.find(0, found + 1)
+        else:
+            # Sin referencia: todas las filas se comparan por clave
+            gone = store.all_rows()
+
+        by_key = {}
+        for row in gone:
+            by_key.setdefault(row_key(store, row), []).append(row)
+
+        parser = M3UParser()
+        added = []
+        changed = []
+        for position in unmatched:
+            text = entries[position].decode('utf-8', 'replace')
+            channel = next(parser.parse_lines(text.splitlines()))
+            if not channel.get('name'):
+                channel['name'] = f'Canal {position + 1}'
+            candidates = by_key.get(channel_key(channel))
+            if not candidates:
+                added.append((position, channel))
+                continue
+            row = candidates.pop(0)
+            if same_channel(store, row, channel):
+                # Sólo se movió o cambió de formato
+                order[position] = row
+            else:
+                changed.append((position, row, channel))
+        removed = [row for candidates in by_key.values() for row in candidates]
+
+        header = playlist_header(data)
+        if not (added or changed or removed) and header == store.header:
+            if order != rows:
+                # Mismos canales en otro orden: basta con reordenar
+                return PlaylistDiff(order, hashes, [], [], [], header)
+            self.hashes = hashes
+            return None
+        return PlaylistDiff(order, hashes, added, changed, removed, header)
+
+    def apply(self, diff):
+        """Write ``diff`` into the store (UI thread); return ``(replaced, added)``.
+
+        ``replaced`` maps each changed channel's old row to its new row and
+        ``added`` lists the rows of new channels.
+        """
+        store = self.store
+        order = diff.order
+        replaced = {}
+        for position, row, channel in diff.changed:
+            replaced[row] = order[position] = store.append(channel)
+        added = []
+        for position, channel in diff.added:
+            row = order[position] = store.append(channel)
+            added.append(row)
+        store.header = diff.header
+        store.reorder(order, [*replaced, *diff.removed])
+        self.hashes = diff.hashes
+        self.rows = order
+        return replaced, added
@@ -0,0 +1,184 @@
+"""Streaming download of remote M3U playlists.
+
+Playlists served over http(s) are parsed while they arrive: the body is
+read in chunks, decoded incrementally and fed line by line to an
+``M3UParser``, so the first channels are on screen long before a large
+provider list finishes downloading.
+
+Compressed transfers are accepted (gzip and deflate always, brotli when the
+``brotli``/``brotlicffi`` package is installed) and so are bodies that are
+themselves gzip files (``.m3u.gz``).  Callers pass the ETag/Last-Modified
+of the copy they already have; an unchanged playlist then costs a single
+304 response.
+
+Must run on the app's asyncio loop; the session (and aiohttp) is created
+lazily.
+"""
+import codecs
+import os
+import zlib
+from collections import namedtuple
+
+from m3u_parser import FIRST_CHUNK, LOAD_CHUNK, M3UParser, is_url  # noqa: F401 - is_url se reexporta
+from logo_fetcher import USER_AGENT
+
+try:
+    import brotli  # noqa: F401 - aiohttp lo usa para Content-Encoding: br
+    HAS_BROTLI = True
+except ImportError:
+    try:
+        import brotlicffi  # noqa: F401
+        HAS_BROTLI = True
+    except ImportError:
+        HAS_BROTLI = False
+
+ACCEPT_ENCODING = 'gzip, deflate, br' if HAS_BROTLI else 'gzip, deflate'
+GZIP_MAGIC = b'\x1f\x8b'
+
+
+class PlaylistError(Exception):
+    """The server did not return a playlist."""
+
+
+class PlaylistResponse(namedtuple('PlaylistResponse', 'etag last_modified channels received header')):
+    """Outcome of a download; ``channels`` is ``None`` when the server answered 304."""
+
+    @property
+    def not_modified(self):
+        return self.channels is None
+
+
+class LineDecoder:
+    """Turn arbitrary byte chunks into complete text lines."""
+
+    def __init__(self, encoding='utf-8'):
+        try:
+            self._decoder = codecs.getincrementaldecoder(encoding)(errors='replace')
+        except LookupError:
+            self._decoder = codecs.getincrementaldecoder('utf-8')(errors='replace')
+        self._inflate = None
+        self._tail = ''
+        self._started = False
+
+    def feed(self, data, final=False):
+        if not self._started and data:
+            self._started = True
+            # Cuerpo que es un .gz en sí mismo, no una codificación de transporte
+            if data.startswith(GZIP_MAGIC):
+                self._inflate = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        if self._inflate is not None:
+            data = self._inflate.decompress(data)
+            if final:
+                data += self._inflate.flush()
+        text = self._tail + self._decoder.decode(data, final)
+        if not self._tail and text.startswith('\ufeff'):
+            text = text[1:]
+        lines = text.split('\n')
+        self._tail = '' if final else lines.pop()
+        return lines
+
+
+class PlaylistFetcher:
+    """Download and parse remote playlists over one pooled HTTP session."""
+
+    def __init__(self, timeout=120, read_size=64 * 1024):
+        self.timeout = timeout
+        self.read_size = read_size
+        self._session = None
+        self.stats = {'downloads': 0, 'not_modified': 0, 'bytes': 0, 'channels': 0}
+
+    def session(self):
+        if self._session is None or self._session.closed:
+            import aiohttp
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=4, ttl_dns_cache=300, ssl=False),
+                timeout=aiohttp.ClientTimeout(total=None, sock_connect=15, sock_read=self.timeout),
+                headers={'User-Agent': USER_AGENT, 'Accept-Encoding': ACCEPT_ENCODING}
+            )
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    async def fetch(self, url, validators=None, on_channels=None, first_batch=FIRST_CHUNK, batch=LOAD_CHUNK):
+        """Download ``url`` and hand its channels to ``on_channels`` in batches.
+
+        ``on_channels(channels, received, total)`` receives lists of channel
+        records plus the bytes read so far and the ``Content-Length`` (or
+        ``None``).  It may return ``False`` to abandon the download.  The
+        first batch is kept small so the caller can show something at once.
+
+        Returns a ``PlaylistResponse``; raises ``PlaylistError`` for HTTP
+        errors and ``aiohttp.ClientError``/``asyncio.TimeoutError`` for
+        network ones.
+        """
+        async with self.session().get(url, headers=validators or None) as response:
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            if response.status == 304:
+                self.stats['not_modified'] += 1
+                return PlaylistResponse(etag, last_modified, None, 0, {})
+            if response.status != 200:
+                raise PlaylistError(f'HTTP {response.status}')
+
+            self.stats['downloads'] += 1
+            # Con compresión de transporte Content-Length no es el tamaño leído
+            total = response.content_length if not response.headers.get('Content-Encoding') else None
+            parser = M3UParser()
+            decoder = LineDecoder(response.charset or 'utf-8')
+            channels = []
+            limit = first_batch
+            count = 0
+            received = 0
+            stopped = False
+            async for data in response.content.iter_chunked(self.read_size):
+                received += len(data)
+                channels.extend(parser.parse_lines(decoder.feed(data)))
+                if len(channels) >= limit and on_channels is not None:
+                    count += len(channels)
+                    if on_channels(channels, received, total) is False:
+                        stopped = True
+                        break
+                    channels = []
+                    limit = batch
+            if not stopped:
+                channels.extend(parser.parse_lines(decoder.feed(b'', final=True)))
+                count += len(channels)
+                if on_channels is not None:
+                    on_channels(channels, received, total)
+
+            self.stats['bytes'] += received
+            self.stats['channels'] += count
+            return PlaylistResponse(etag, last_modified, count, received, parser.header)
+
+    async def download(self, url, path, validators=None):
+        """Save the body of ``url`` to ``path`` (e.g. an XMLTV guide) without parsing it.
+
+        The file is written next to ``path`` and renamed when complete.
+        Returns a ``PlaylistResponse``; after a 304 it is ``not_modified``
+        and nothing is written.
+        """
+        async with self.session().get(url, headers=validators or None) as response:
+            etag = response.headers.get('ETag')
+            last_modified = response.headers.get('Last-Modified')
+            if response.status == 304:
+                self.stats['not_modified'] += 1
+                return PlaylistResponse(etag, last_modified, None, 0, {})
+            if response.status != 200:
+                raise PlaylistError(f'HTTP {response.status}')
+
+            received = 0
+            tmp_path = path + '.part'
+            try:
+                with open(tmp_path, 'wb') as f:
+                    async for data in response.content.iter_chunked(self.read_size):
+                        received += len(data)
+                        f.write(data)
+                os.replace(tmp_path, path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            self.stats['bytes'] += received
+            return PlaylistResponse(etag, last_modified, 0, received, {})
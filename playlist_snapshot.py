@@ -0,0 +1,249 @@
+"""Binary snapshots of parsed playlists for near-instant reopening.
+
+After a playlist is parsed its ``ChannelStore`` is written next to the logo
+cache as one file: a JSON header followed by the UTF-8 text of every string
+column and the ``array('I')`` of row end offsets for each.  Reopening an
+unchanged playlist maps that file and wraps it in ``MappedStringColumn``
+objects, so nothing is parsed and rows are decoded only when shown.
+
+A snapshot is keyed by the playlist's absolute path and is valid while the
+file keeps its size and mtime.  If only the mtime changed, the content hash
+decides, so touching a file does not force a reparse.  The caller passes
+both: the ``file_signature`` taken before parsing and the hash of the bytes
+that were parsed, which ``open_hashed`` computes while the parser reads
+them, so a playlist rewritten during the parse is not labelled with the
+new file's state.  Checking may hash the whole file: do it off the UI
+thread.
+
+Remote playlists are keyed by URL and carry the ETag/Last-Modified of the
+download instead; the server decides whether they are current (a 304).
+"""
+import hashlib
+import io
+import json
+import mmap
+import os
+import struct
+from array import array
+
+from channel_store import ChannelStore, InternedColumn, MappedStringColumn
+from m3u_parser import is_url
+from playlist_watcher import file_signature
+
+MAGIC = b'PYM3USNP'
+VERSION = 1
+PREFIX = struct.Struct('<8sII')
+STRING_COLUMNS = ('names', 'urls', 'logos', 'tvg_ids')
+ALIGN = 8
+
+
+def new_digest():
+    return hashlib.blake2b(digest_size=20)
+
+
+def file_digest(path, chunk_size=1024 * 1024):
+    digest = new_digest()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class HashingReader(io.RawIOBase):
+    """Unbuffered reader over a binary file that hashes every byte read."""
+
+    def __init__(self, file):
+        super().__init__()
+        self.file = file
+        self.digest = new_digest()
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        count = self.file.readinto(buffer)
+        if count:
+            self.digest.update(memoryview(buffer)[:count])
+        return count
+
+    def tell(self):
+        return self.file.tell()
+
+    def close(self):
+        self.file.close()
+        super().close()
+
+    def hexdigest(self):
+        """``file_digest`` of what was read so far: of the whole file once at the end."""
+        return self.digest.hexdigest()
+
+
+def open_hashed(path, buffer_size=io.DEFAULT_BUFFER_SIZE):
+    """Open ``path`` as a buffered binary file whose ``raw.hexdigest()`` hashes what was read."""
+    return io.BufferedReader(HashingReader(open(path, 'rb', buffering=0)), buffer_size)
+
+
+def _pad(length):
+    return -length % ALIGN
+
+
+class PlaylistSnapshots:
+    """Directory of playlist snapshots, one file per playlist path."""
+
+    def __init__(self, cache_dir):
+        self.directory = os.path.join(cache_dir, 'playlists')
+        os.makedirs(self.directory, exist_ok=True)
+
+    def source_key(self, playlist_path):
+        return playlist_path if is_url(playlist_path) else os.path.abspath(playlist_path)
+
+    def snapshot_path(self, playlist_path):
+        key = hashlib.sha1(self.source_key(playlist_path).encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, key + '.snap')
+
+    def save(self, playlist_path, store, signature, digest):
+        """Write ``store`` as the snapshot of the local file ``playlist_path``.
+
+        ``signature`` and ``digest`` describe the file as it was when
+        ``store`` was parsed from it.
+        """
+        size, mtime_ns = signature[:2]
+        return self._write(playlist_path, store, {
+            'size': size,
+            'mtime_ns': mtime_ns,
+            'digest': digest,
+        })
+
+    def save_remote(self, url, store, etag=None, last_modified=None):
+        """Write ``store`` as the snapshot of a downloaded playlist."""
+        return self._write(url, store, {'etag': etag, 'last_modified': last_modified})
+
+    def _write(self, playlist_path, store, source_info):
+        sections = []
+        columns = {}
+        offset = 0
+        for name in STRING_COLUMNS:
+            encoded = [value.encode('utf-8') for value in getattr(store, name)]
+            data = b''.join(encoded)
+            ends = array('I')
+            end = 0
+            for value in encoded:
+                end += len(value)
+                ends.append(end)
+            ends = ends.tobytes()
+            columns[name] = {'data': offset, 'data_len': len(data)}
+            sections.append(data + b'\0' * _pad(len(data)))
+            offset += len(data) + _pad(len(data))
+            columns[name].update(ends=offset, ends_len=len(ends))
+            sections.append(ends)
+            offset += len(ends)
+
+        group_ids = array('I', store.groups.ids()).tobytes()
+        columns['groups'] = {'ends': offset, 'ends_len': len(group_ids)}
+        sections.append(group_ids)
+
+        header = json.dumps({
+            'path': self.source_key(playlist_path),
+            **source_info,
+            'count': len(store),
+            'columns': columns,
+            'groups': store.groups.values,
+            'vlcopts': {str(row): opts for row, opts in store.vlcopts.items()},
+            'playlist_header': store.header,
+        }).encode('utf-8')
+        header += b' ' * _pad(PREFIX.size + len(header))
+
+        path = self.snapshot_path(playlist_path)
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(PREFIX.pack(MAGIC, VERSION, len(header)))
+            f.write(header)
+            for section in sections:
+                f.write(section)
+        os.replace(tmp_path, path)
+        return path
+
+    def _read_header(self, f):
+        magic, version, header_len = PREFIX.unpack(f.read(PREFIX.size))
+        if magic != MAGIC or version != VERSION:
+            return None
+        return json.loads(f.read(header_len)), PREFIX.size + header_len
+
+    def header(self, playlist_path):
+        """The JSON header of ``playlist_path``'s snapshot, or ``None``."""
+        try:
+            with open(self.snapshot_path(playlist_path), 'rb') as f:
+                parsed = self._read_header(f)
+        except (OSError, ValueError, struct.error):
+            return None
+        if parsed is None or parsed[0]['path'] != self.source_key(playlist_path):
+            return None
+        return parsed[0]
+
+    def validators(self, url):
+        """Conditional request headers for re-downloading ``url``."""
+        header = self.header(url)
+        headers = {}
+        if header is not None:
+            if header.get('etag'):
+                headers['If-None-Match'] = header['etag']
+            if header.get('last_modified'):
+                headers['If-Modified-Since'] = header['last_modified']
+        return headers
+
+    def load(self, playlist_path, signature=None):
+        """Return a mmap-backed ``ChannelStore`` for an unchanged playlist, else ``None``.
+
+        ``signature`` is the local file's ``file_signature``, taken now if
+        not given.  For a URL the snapshot is returned as is: the caller
+        checks it with the server first (see ``validators``).
+        """
+        path = self.snapshot_path(playlist_path)
+        try:
+            if is_url(playlist_path):
+                signature = None
+            elif signature is None:
+                signature = file_signature(playlist_path)
+                if signature is None:
+                    return None
+            with open(path, 'rb') as f:
+                parsed = self._read_header(f)
+                if parsed is None:
+                    return None
+                header, base = parsed
+                if not self._is_current(header, playlist_path, signature):
+                    return None
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError, struct.error):
+            return None
+
+        view = memoryview(mapped)
+        columns = header['columns']
+        string_columns = []
+        for name in STRING_COLUMNS:
+            info = columns[name]
+            data = view[base + info['data']:base + info['data'] + info['data_len']]
+            ends = view[base + info['ends']:base + info['ends'] + info['ends_len']].cast('I')
+            string_columns.append(MappedStringColumn(data, ends))
+
+        info = columns['groups']
+        group_ids = array('I')
+        group_ids.frombytes(view[base + info['ends']:base + info['ends'] + info['ends_len']])
+        groups = InternedColumn(header['groups'], group_ids)
+        vlcopts = {int(row): opts for row, opts in header['vlcopts'].items()}
+        return ChannelStore.from_columns(*string_columns, groups, vlcopts, header.get('playlist_header'))
+
+    def _is_current(self, header, playlist_path, signature):
+        if header['path'] != self.source_key(playlist_path):
+            return False
+        if signature is None:
+            return True
+        size, mtime_ns = signature[:2]
+        if header.get('size') != size:
+            return False
+        if header['mtime_ns'] == mtime_ns:
+            return True
+        # Misma talla pero otra fecha: decide el contenido
+        if not header.get('digest'):
+            return False
+        return header['digest'] == file_digest(playlist_path)
@@ -0,0 +1,153 @@
+"""Notice when a loaded playlist file changes on disk.
+
+On Linux the file's directory is watched with inotify (through ``ctypes``,
+no extra package): providers usually rewrite the file in place or rename a
+new copy over it, and both show up as events for its name.  Elsewhere, or
+if inotify cannot be set up, the file is polled with ``os.stat``.
+
+Either way a change is reported once the file has been quiet for
+``settle`` seconds, so a slow writer is not read half-written, and only if
+its size, modification time or inode actually differ from what was last
+seen.  ``on_change(path)`` is called on the watcher's own thread; the
+next change is only looked at once it returns.
+
+``signature`` is the file's state when its contents were read (see
+``file_signature``): a change made between that read and ``start`` is
+reported straight away.
+"""
+import logging
+import os
+import select
+import struct
+import sys
+import threading
+
+log = logging.getLogger(__name__)
+
+try:
+    import ctypes
+    import ctypes.util
+    _libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+    HAS_INOTIFY = sys.platform.startswith('linux') and hasattr(_libc, 'inotify_init1')
+except (OSError, AttributeError, TypeError):
+    HAS_INOTIFY = False
+
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+EVENT = struct.Struct('iIII')
+WATCH_MASK = IN_MODIFY | IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE
+
+
+def file_signature(path):
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns, stat.st_ino
+
+
+class PlaylistWatcher:
+    """Call ``on_change(path)`` from a background thread whenever ``path`` changes."""
+
+    def __init__(self, path, on_change, signature=None, interval=2.0, settle=0.5, use_inotify=True):
+        self.path = os.path.abspath(path)
+        self.on_change = on_change
+        self.interval = interval
+        self.settle = settle
+        self.use_inotify = use_inotify and HAS_INOTIFY
+        self.mode = None
+        self.signature = signature if signature is not None else file_signature(self.path)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='playlist-watcher', daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self, timeout=None):
+        """Ask the thread to finish; wait up to ``timeout`` seconds if given."""
+        self._stop.set()
+        if timeout and self._thread.is_alive() and self._thread is not threading.current_thread():
+            self._thread.join(timeout)
+
+    def _run(self):
+        fd = self._open_inotify() if self.use_inotify else None
+        try:
+            self._check()
+            if fd is not None:
+                self.mode = 'inotify'
+                self._watch_inotify(fd)
+            else:
+                self.mode = 'poll'
+                self._poll()
+        finally:
+            if fd is not None:
+                os.close(fd)
+
+    def _open_inotify(self):
+        fd = _libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            return None
+        directory = os.path.dirname(self.path).encode(sys.getfilesystemencoding())
+        if _libc.inotify_add_watch(fd, directory, WATCH_MASK) < 0:
+            os.close(fd)
+            return None
+        return fd
+
+    def _read_events(self, fd):
+        """True if any pending event concerns the watched file."""
+        name = os.path.basename(self.path).encode(sys.getfilesystemencoding())
+        try:
+            data = os.read(fd, 64 * 1024)
+        except BlockingIOError:
+            return False
+        touched = False
+        offset = 0
+        while offset + EVENT.size <= len(data):
+            length = EVENT.unpack_from(data, offset)[3]
+            offset += EVENT.size
+            if data[offset:offset + length].rstrip(b'\0') == name:
+                touched = True
+            offset += length
+        return touched
+
+    def _watch_inotify(self, fd):
+        while not self._stop.is_set():
+            # El timeout sólo sirve para atender stop()
+            ready, _, _ = select.select([fd], [], [], self.interval)
+            if not ready or not self._read_events(fd):
+                continue
+            # Esperar a que el fichero deje de cambiar
+            while not self._stop.is_set():
+                ready, _, _ = select.select([fd], [], [], self.settle)
+                if not ready:
+                    break
+                self._read_events(fd)
+            self._check()
+
+    def _poll(self):
+        while not self._stop.wait(self.interval):
+            signature = file_signature(self.path)
+            if signature is None or signature == self.signature:
+                continue
+            # Cambió: se espera a que se quede quieto antes de leerlo
+            while not self._stop.wait(self.settle):
+                settled = file_signature(self.path)
+                if settled == signature:
+                    break
+                signature = settled
+            self._check()
+
+    def _check(self):
+        signature = file_signature(self.path)
+        if signature is None or signature == self.signature or self._stop.is_set():
+            return
+        self.signature = signature
+        try:
+            self.on_change(self.path)
+        except Exception as e:
+            log.exception("Error al recargar %s: %s", self.path, e)
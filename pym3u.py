@@ -1,39 +1,111 @@
 from kivymd.app import MDApp
 from kivymd.uix.screen import MDScreen
 from kivymd.uix.card import MDCard
-from kivymd.uix.list import ThreeLineAvatarListItem, ImageLeftWidget, MDList
-from kivymd.uix.button import MDIconButton
+from kivymd.uix.list import ThreeLineAvatarListItem, ImageLeftWidget
+from kivymd.uix.button import MDIconButton, MDFlatButton
 from kivymd.uix.boxlayout import MDBoxLayout
-from kivymd.uix.label import MDLabel
+from kivymd.uix.label import MDLabel, MDIcon
 from kivymd.uix.textfield import MDTextField
-from kivy.uix.scrollview import ScrollView
+from kivy.uix.recycleview import RecycleView
+from kivy.uix.recycleview.views import RecycleDataViewBehavior
+from kivy.uix.recycleboxlayout import RecycleBoxLayout
 from kivy.core.window import Window
+from kivy.graphics.texture import Texture
 from kivy.clock import Clock
+from kivy.factory import Factory
 from kivy.properties import StringProperty, ObjectProperty, NumericProperty
-from kivymd.uix.filemanager import MDFileManager
-from kivymd.uix.snackbar import Snackbar
-import vlc
 import threading
 import asyncio
-import re
-import aiohttp
+import logging
 import os
-from collections import deque
+import time
+from array import array
+from collections import deque, namedtuple
 from kivy.metrics import dp
 from functools import partial
 from kivy.clock import mainthread
 
+import m3u_parser
+from channel_store import ChannelStore
+from search_index import SearchIndex, normalize, parse_query, row_matcher
+from search_scheduler import SearchScheduler
+from logo_fetcher import LogoFetcher
+from logo_cache import LogoCache, FLUSH_INTERVAL as LOGO_FLUSH_INTERVAL
+from logo_queue import LogoQueue, VISIBLE, PREFETCH, WORKERS as LOGO_WORKERS
+from thumbnails import ThumbnailCache
+from logo_atlas import LogoAtlas
+from playlist_snapshot import PlaylistSnapshots, file_digest, open_hashed
+from playlist_fetcher import PlaylistFetcher, is_url
+from player_engine import PlayerEngine
+from stream_probe import StreamProber, ProbeCache
+from epg import GuideCache, guide_url, format_now_next
+from async_runtime import AsyncRuntime
+from channel_groups import GroupIndex, GroupedLayout
+from channel_sort import SortIndex, ORDERS, ORDER_NAMES
+import parallel_parser
+from parallel_parser import PackedChannels
+from playlist_watcher import PlaylistWatcher, file_signature
+from playlist_diff import PlaylistBaseline
+from metrics import MetricsRegistry, FRAME_BUCKETS
+from log_setup import configure_logging
+
 if os.name == 'nt':
     asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
 
+# Icono del botón de orden para cada orden de la lista
+SORT_ICONS = {
+    'file': 'sort-numeric-ascending',
+    'name': 'sort-alphabetical-ascending',
+    'group': 'sort-variant',
+    'id': 'identifier',
+}
+
+# Qué hacer con los canales caídos según la última comprobación
+HEALTH_MODES = ('all', 'dead_last', 'hide_dead')
+HEALTH_LABELS = {
+    'all': 'Mostrando todos los canales',
+    'dead_last': 'Canales caídos al final',
+    'hide_dead': 'Canales caídos ocultos',
+}
+
+# Trabajo en el bucle asyncio por tipo: (en ejecución a la vez, máximo pendiente)
+TASK_GROUPS = {
+    'logos': (LOGO_WORKERS, LOGO_WORKERS),
+    'loading': (1, 3),
+    'probes': (1, 1),
+    'epg': (1, 1),
+}
+
+# Cada cuánto se repinta el "Ahora/Después" de las tarjetas, en segundos
+GUIDE_REFRESH = 60
+
+# Resultado de una búsqueda; count es cuántas filas había al lanzarla
+SearchState = namedtuple('SearchState', 'store key group tvg_id rows count')
+
+# Cargas de listas: de una instantánea a un millón de canales
+LOAD_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+# Teclas del panel de métricas (F12) y de su volcado a cache/ (F11)
+KEY_METRICS_OVERLAY = 293
+KEY_METRICS_DUMP = 292
+# Alterna entre una textura por logo y el atlas de logos (F10)
+KEY_LOGO_ATLAS = 291
+
+log = logging.getLogger('pym3u')
+
 class AsyncImageLeftWidget(ImageLeftWidget):
     source = StringProperty()
     
     def update_source(self, new_source):
         self.source = new_source
 
-class ChannelCard(MDCard):
-    def __init__(self, channel_id, name, url, on_release_callback, **kwargs):
+    def update_texture(self, texture):
+        # Textura ya decodificada fuera del hilo principal
+        self.source = ''
+        self.texture = texture
+
+class ChannelCard(RecycleDataViewBehavior, MDCard):
+    """Card view recycled by ChannelListView; shows one playlist row at a time"""
+    def __init__(self, **kwargs):
         super().__init__(
             orientation='horizontal',
             size_hint_y=None,
@@ -45,7 +117,9 @@ class ChannelCard(MDCard):
             elevation=2,
             **kwargs
         )
-        self.channel_id = channel_id
+        self.channel_id = None
+        self.logo_url = None
+        self.list_view = None
         
         self.image = AsyncImageLeftWidget(
             source="default_channel.png",
@@ -58,46 +132,179 @@ class ChannelCard(MDCard):
             padding=(dp(10), 0)
         )
         
-        display_name = name.split('|')[-1].strip() if '|' in name else name
-        channel_name = MDLabel(
-            text=display_name,
+        self.channel_name = MDLabel(
             theme_text_color="Primary",
             font_style="Subtitle1",
             bold=True
         )
         
-        channel_url = MDLabel(
-            text=url[:50] + "..." if len(url) > 50 else url,
+        self.channel_url = MDLabel(
             theme_text_color="Secondary",
             font_style="Caption"
         )
         
-        text_container.add_widget(channel_name)
-        text_container.add_widget(channel_url)
+        text_container.add_widget(self.channel_name)
+        text_container.add_widget(self.channel_url)
         
         self.add_widget(self.image)
         self.add_widget(text_container)
         
-        self.bind(on_release=lambda x: on_release_callback(url))
+        self.bind(on_release=self.on_card_release)
+
+    def refresh_view_attrs(self, rv, index, data):
+        # data es un dict compartido y vacío: la fila sale del índice
+        self.list_view = rv
+        rv.bind_row(self, index)
+        return super().refresh_view_attrs(rv, index, data)
+
+    def show_channel(self, channel_id, name, url, logo_url, dead=False, guide=''):
+        self.channel_id = channel_id
+        self.logo_url = logo_url
+        self.channel_name.text = name
+        # Con guía se muestra el programa en emisión en lugar de la URL
+        url = guide or (url[:50] + "..." if len(url) > 50 else url)
+        self.channel_url.text = f"Sin señal · {url}" if dead else url
+
+    def on_card_release(self, *args):
+        if self.channel_id is not None and self.list_view:
+            self.list_view.on_row_release(self.channel_id)
+
+class GroupHeader(RecycleDataViewBehavior, MDCard):
+    """Header of a group in the grouped view; tapping it expands or collapses the group"""
+    def __init__(self, **kwargs):
+        super().__init__(
+            orientation='horizontal',
+            size_hint_y=None,
+            height=dp(80),
+            padding=dp(10),
+            spacing=dp(10),
+            ripple_behavior=True,
+            radius=[dp(10),],
+            elevation=1,
+            **kwargs
+        )
+        self.group_id = None
+        self.list_view = None
+        
+        self.arrow = MDIcon(
+            icon="chevron-right",
+            size_hint=(None, None),
+            size=(dp(40), dp(60))
+        )
+        
+        text_container = MDBoxLayout(
+            orientation='vertical',
+            padding=(dp(10), 0)
+        )
+        
+        self.group_name = MDLabel(
+            theme_text_color="Primary",
+            font_style="H6"
+        )
+        
+        self.group_count = MDLabel(
+            theme_text_color="Secondary",
+            font_style="Caption"
+        )
+        
+        text_container.add_widget(self.group_name)
+        text_container.add_widget(self.group_count)
+        
+        self.add_widget(self.arrow)
+        self.add_widget(text_container)
+        
+        self.bind(on_release=self.on_header_release)
 
-class LazyScrollView(ScrollView):
-    def __init__(self, load_more_callback, **kwargs):
+    def refresh_view_attrs(self, rv, index, data):
+        self.list_view = rv
+        rv.bind_header(self, index)
+        return super().refresh_view_attrs(rv, index, data)
+
+    def show_group(self, group_id, name, count, expanded):
+        self.group_id = group_id
+        self.group_name.text = name
+        self.group_count.text = f'{count} canales' if count != 1 else '1 canal'
+        self.arrow.icon = "chevron-down" if expanded else "chevron-right"
+
+    def on_header_release(self, *args):
+        if self.group_id is not None and self.list_view:
+            self.list_view.on_header_release(self.group_id)
+
+Factory.register('GroupHeader', cls=GroupHeader)
+
+# Todas las filas comparten este dict: RecycleView sólo necesita la longitud
+CHANNEL_ROW = {}
+# Igual para las cabeceras de grupo de la vista agrupada
+HEADER_ROW = {'viewclass': 'GroupHeader'}
+
+class ChannelListView(RecycleView):
+    """Virtualized channel list: a fixed pool of ChannelCard bound to visible rows"""
+    def __init__(self, bind_row, on_row_release, bind_header=None, on_header_release=None, **kwargs):
         super().__init__(**kwargs)
-        self.load_more_callback = load_more_callback
-        self.bind(scroll_y=self.check_scroll)
-        self._prev_scroll_y = 1.0
-        self._loading = False
-        
-    def check_scroll(self, instance, value):
-        # Detectar dirección del scroll
-        scroll_down = value < self._prev_scroll_y
-        self._prev_scroll_y = value
-        
-        # Cargar más cuando nos acercamos al final (20% del final)
-        if scroll_down and value <= 0.2 and not self._loading:
-            self._loading = True
-            self.load_more_callback()
-            Clock.schedule_once(lambda dt: setattr(self, '_loading', False), 1)
+        self.bind_row = bind_row
+        self.on_row_release = on_row_release
+        self.bind_header = bind_header
+        self.on_header_release = on_header_release
+        self.viewclass = ChannelCard
+        # Las filas sin clave 'viewclass' son tarjetas de canal
+        self.key_viewclass = 'viewclass'
+        self.row_height = dp(80)
+        self.row_spacing = dp(5)
+        
+        layout = RecycleBoxLayout(
+            orientation='vertical',
+            size_hint_y=None,
+            default_size=(None, self.row_height),
+            default_size_hint=(1, None),
+            spacing=self.row_spacing,
+            padding=(dp(5), dp(5))
+        )
+        layout.bind(minimum_height=layout.setter('height'))
+        self.add_widget(layout)
+
+    def show_rows(self, count):
+        self.show_data([CHANNEL_ROW] * count)
+
+    def show_data(self, data, keep_scroll=False):
+        """Replace the list items; keep_scroll leaves the rows on screen where they are"""
+        top = self.scroll_top() if keep_scroll else 0
+        self.data = data
+        self.refresh_from_data()
+        if keep_scroll:
+            self.restore_scroll_top(top)
+        else:
+            self.scroll_y = 1
+
+    def append_rows(self, count):
+        """Add rows at the end keeping the rows on screen where they are"""
+        top = self.scroll_top()
+        self.data.extend([CHANNEL_ROW] * count)
+        self.restore_scroll_top(top)
+
+    def scroll_top(self):
+        """Pixels scrolled from the top of the list"""
+        return (1 - self.scroll_y) * max(self.layout_manager.height - self.height, 0)
+
+    def restore_scroll_top(self, top):
+        step = self.row_height + self.row_spacing
+        # El layout se recalcula más tarde: la altura nueva se deduce de las filas
+        scrollable = len(self.data) * step - self.row_spacing + dp(10) - self.height
+        if scrollable > 0:
+            self.scroll_y = min(max(1 - top / scrollable, 0), 1)
+        else:
+            self.scroll_y = 1
+
+    def visible_range(self):
+        """First and last index on screen (rows have a fixed height)"""
+        count = len(self.data)
+        if not count:
+            return 0, -1
+        step = self.row_height + self.row_spacing
+        scrollable = max(self.layout_manager.height - self.height, 0)
+        top = (1 - self.scroll_y) * scrollable
+        first = max(int((top - dp(5)) // step), 0)
+        last = min(int((top + self.height) // step), count - 1)
+        return first, last
 
 class ChannelItem(ThreeLineAvatarListItem):
     def __init__(self, text="", secondary_text="", tertiary_text="", channel_logo=None, **kwargs):
@@ -116,61 +323,267 @@ class PyM3U(MDApp):
     def __init__(self):
         super().__init__()
         Window.size = (800, 600)
-        self.player = None
-        self.current_playlist = []
-        self.filtered_playlist = []  # New list for filtered results
+        # Una sola instancia de libVLC; los canales vecinos se preparsean
+        self.player = PlayerEngine(network_caching=1000, live_caching=1000, on_zap=self.on_zap)
+        self.current_playlist = ChannelStore()
+        # Vista activa: filas de current_playlist (range o array('I'))
+        self.filtered_playlist = range(0)
         self.current_index = 0
+        # Fila del canal en reproducción, para situarlo en cada vista nueva
+        self.playing_row = None
+        # Cada carga nueva invalida la que siga parseando en segundo plano
+        self.load_generation = 0
         self.file_manager = None
-        self.visible_batch_size = 15
-        self.preload_batch_size = 10
-        self.current_load_index = 0
-        self.is_loading = False
-        self.logo_cache = {}
+        self.url_dialog = None
         self.channel_cards = {}
-        self.logo_download_queue = asyncio.Queue()
+        # Cola de logos por prioridad: primero lo visible, luego lo cercano
+        self.logo_download_queue = LogoQueue()
+        self.logo_prefetch_rows = 10
+        self.logo_schedule_trigger = Clock.create_trigger(self.schedule_logo_downloads, 0.05)
+        # Logos decodificados y reducidos a 60dp en un pool, con LRU de texturas
+        self.thumbnails = ThumbnailCache(
+            int(dp(60)),
+            make_texture=self.make_logo_texture,
+            deliver=lambda callback: Clock.schedule_once(lambda dt: callback()),
+            max_entries=300,
+            on_evict=self.on_logo_evicted
+        )
+        # Modo atlas: los logos comparten unas pocas texturas grandes
+        self.logo_atlas = LogoAtlas(
+            self.thumbnails.size, self.make_atlas_page, capacity=self.thumbnails.max_entries
+        )
+        
+        # Búsqueda fuera del hilo principal sobre un índice de trigramas
+        self.search_index = None
+        self.last_search = None
+        self.search_scheduler = SearchScheduler(
+            self.run_search,
+            self.show_search_results,
+            call_later=lambda delay, callback: Clock.schedule_once(callback, delay),
+            deliver=lambda callback: Clock.schedule_once(lambda dt: callback()),
+            delay=0.3
+        )
         
         self.cache_dir = os.path.join(os.path.dirname(__file__), 'cache')
         if not os.path.exists(self.cache_dir):
             os.makedirs(self.cache_dir)
+        # Métricas de rendimiento; el log pasa por una cola con límite por mensaje
+        self.metrics = MetricsRegistry()
+        log_dropped = self.metrics.counter('log_suppressed_total', 'Mensajes de log omitidos por repetidos')
+        self.log_listener = configure_logging(
+            path=os.path.join(self.cache_dir, 'pym3u.log'), on_drop=lambda record: log_dropped.inc()
+        )
+        self.overlay_event = None
+        self.load_started = None
+        # Índice de logos por hash de URL, leído de una vez al arrancar
+        self.logo_cache = LogoCache(self.cache_dir)
+        # Instantáneas binarias de las listas ya parseadas
+        self.playlist_snapshots = PlaylistSnapshots(self.cache_dir)
+        
+        # Un único bucle asyncio en su hilo para toda la E/S en segundo plano
+        self.runtime = AsyncRuntime(TASK_GROUPS).start()
         
-        self.loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(self.loop)
+        # Una sola sesión HTTP compartida y varios workers concurrentes
+        self.logo_fetcher = LogoFetcher(limit=16, limit_per_host=4)
+        self.logo_workers = TASK_GROUPS['logos'][0]
+        self.logo_download_tasks = []
+        self.load_future = None
+        # Listas remotas: descarga en streaming con revalidación condicional
+        self.playlist_fetcher = PlaylistFetcher()
         
-        self.loop_thread = threading.Thread(target=self.run_loop, daemon=True)
-        self.loop_thread.start()
+        # Comprobación masiva de canales, con resultados persistidos por URL
+        self.stream_prober = StreamProber(concurrency=32, per_host=2, host_rate=4.0)
+        self.stream_probes = ProbeCache(os.path.join(self.cache_dir, 'probes.sqlite'))
+        self.probe_future = None
+        self.health_mode = 'all'
         
-        self.logo_download_task = None
+        # Vista agrupada por group-title: sólo se materializan los grupos abiertos
+        self.group_index = None
+        self.group_layout = None
+        self.grouped = False
+        self.expanded_groups = set()
+        # Órdenes por nombre, grupo y tvg-id precalculados como permutaciones de filas
+        self.sort_index = None
+        self.sort_order = 'file'
+        
+        # Guía XMLTV de la lista (x-tvg-url), compilada a un índice en disco
+        self.epg_guides = GuideCache(self.cache_dir)
+        self.epg = None
+        self.epg_url = None
+        self.epg_future = None
+        
+        # Listas locales vigiladas: al cambiar el fichero sólo se aplica la diferencia
+        self.watching = False
+        self.watcher = None
+        self.watch_generation = 0
+        self.playlist_path = None
+        self.playlist_signature = None
+        
+        self.register_metrics()
 
-    def run_loop(self):
-        asyncio.set_event_loop(self.loop)
-        self.loop.run_forever()
+    def register_metrics(self):
+        """Expose the components' own counters and the timings measured by the app"""
+        metrics = self.metrics
+        self.parse_timer = metrics.histogram(
+            'parse_seconds_per_10k_lines', 'Parseo de listas locales por cada 10.000 líneas', LOAD_BUCKETS
+        )
+        self.load_timer = metrics.histogram('playlist_load_seconds', 'Desde abrir una lista hasta tenerla entera', LOAD_BUCKETS)
+        self.search_timer = metrics.histogram('search_seconds', 'Consulta de una búsqueda en el worker', window=100)
+        self.render_timer = metrics.histogram('search_render_seconds', 'Mostrar el resultado de una búsqueda', window=100)
+        self.logo_timer = metrics.histogram('logo_fetch_seconds', 'Descarga o revalidación de un logo', window=200)
+        self.frame_timer = metrics.histogram('frame_seconds', 'Duración de cada frame', FRAME_BUCKETS, window=240)
+        self.snapshot_hits = metrics.counter('playlist_snapshot_hits_total', 'Listas reabiertas desde su instantánea')
+        self.snapshot_misses = metrics.counter('playlist_snapshot_misses_total', 'Listas locales parseadas de nuevo')
+        self.sort_timer = metrics.histogram('sort_seconds', 'Cambiar el orden de la vista activa', window=100)
+        
+        metrics.gauge('fps', 'Frames por segundo según kivy', Clock.get_fps)
+        metrics.gauge('widgets_alive', 'Tarjetas y cabeceras creadas por la lista',
+                      lambda: len(self.channel_list.layout_manager.children))
+        metrics.gauge('channel_cards', 'Tarjetas enlazadas a un canal', lambda: len(self.channel_cards))
+        metrics.gauge('channels', 'Canales de la lista actual', lambda: len(self.current_playlist.all_rows()))
+        metrics.gauge('logo_queue_depth', 'Logos esperando descarga', lambda: len(self.logo_download_queue))
+        metrics.gauge('thumbnail_textures', 'Texturas de logos en memoria', lambda: len(self.thumbnails))
+        metrics.gauge('logo_gl_textures', 'Texturas de GPU que ocupan los logos', self.logo_gl_textures)
+        metrics.gauge('logo_atlas_pages', 'Páginas del atlas de logos', lambda: len(self.logo_atlas.pages))
+        metrics.gauge('asyncio_loop_lag_seconds', 'Retraso del bucle asyncio', lambda: self.runtime.lag)
+        metrics.gauge('asyncio_loop_lag_p95_seconds', 'Retraso p95 del bucle asyncio (ventana reciente)',
+                      lambda: self.runtime.stats()['loop_lag']['p95'])
+        metrics.gauge('asyncio_tasks', 'Tareas vivas en el bucle asyncio', lambda: self.runtime.stats()['tasks'])
+        
+        # Contadores que ya llevan los componentes, leídos sólo al exportar
+        collected = (
+            ('logo_cache', self.logo_cache.stats, 'Caché de logos en disco'),
+            ('logo_fetch', self.logo_fetcher.stats, 'Descargas de logos'),
+            ('thumbnail', self.thumbnails.stats, 'Texturas de logos'),
+            ('logo_atlas', self.logo_atlas.stats, 'Atlas de logos'),
+            ('search', self.search_scheduler.counters, 'Búsquedas'),
+        )
+        for prefix, stats, help in collected:
+            for key in stats:
+                metrics.counter(f'{prefix}_{key}_total', f'{help}: {key}', partial(stats.get, key, 0))
 
     def start_logo_downloader(self):
-        if not self.logo_download_task or self.logo_download_task.done():
-            self.logo_download_task = asyncio.run_coroutine_threadsafe(
-                self.logo_downloader_worker(), self.loop
-            )
+        self.logo_download_tasks = [task for task in self.logo_download_tasks if not task.done()]
+        for _ in range(self.logo_workers - len(self.logo_download_tasks)):
+            future = self.runtime.submit('logos', self.logo_downloader_worker())
+            if future is None:
+                break
+            self.logo_download_tasks.append(future)
 
     async def logo_downloader_worker(self):
+        queue = self.logo_download_queue
         while True:
             try:
-                channel_id, logo_url, channel_name = await self.logo_download_queue.get()
-                if logo_url:
-                    logo_path = await self.download_logo(logo_url, channel_name)
-                    if logo_path and channel_id in self.channel_cards:
-                        # Actualizar la imagen en el thread principal
-                        Clock.schedule_once(
-                            lambda dt, cid=channel_id, path=logo_path: self.update_channel_logo(cid, path)
-                        )
-                self.logo_download_queue.task_done()
+                channel_id, logo_url = await queue.get()
+                task = asyncio.ensure_future(self.download_logo(logo_url))
+                queue.started(channel_id, task)
+                try:
+                    # wait() no propaga la cancelación del trabajo al worker
+                    await asyncio.wait((task,))
+                finally:
+                    if not task.done():
+                        task.cancel()
+                    queue.finished(channel_id, task)
+                if task.cancelled():
+                    continue
+                logo_path = task.result()
+                if logo_path and channel_id in self.channel_cards:
+                    # Actualizar la imagen en el thread principal
+                    self.update_channel_logo(channel_id, logo_path)
+            except asyncio.CancelledError:
+                raise
             except Exception as e:
-                print(f"Error in logo downloader worker: {e}")
+                log.exception("Error in logo downloader worker: %s", e)
+
+    def schedule_logo_downloads(self, *args):
+        """Hand the logo queue every logo still wanted around the viewport"""
+        try:
+            store = self.current_playlist
+            cache = self.logo_cache
+            first, last = self.channel_list.visible_range()
+            start = max(first - self.logo_prefetch_rows, 0)
+            end = min(last + 1 + self.logo_prefetch_rows, self.list_length())
+            
+            jobs = []
+            for position in range(start, end):
+                row = self.position_row(position)
+                if row is None:
+                    continue
+                logo_url = store.logo(row)
+                if logo_url and cache.is_stale(logo_url):
+                    priority = VISIBLE if first <= position <= last else PREFETCH
+                    jobs.append((row, logo_url, priority))
+            jobs.sort(key=lambda job: job[2])
+            self.runtime.call_soon(self.logo_download_queue.schedule, jobs)
+        except Exception as e:
+            log.exception("Error al programar logos: %s", e)
 
     @mainthread
     def update_channel_logo(self, channel_id, logo_path):
         if channel_id in self.channel_cards:
             card = self.channel_cards[channel_id]
+            self.show_card_logo(card, logo_path)
+
+    def show_card_logo(self, card, logo_path):
+        """Show the card's logo from the texture LRU, decoding it off-thread if needed"""
+        logo_url = card.logo_url
+        if not logo_url or not logo_path:
+            card.image.update_source("default_channel.png")
+            return
+        if not self.thumbnails.available:
             card.image.update_source(logo_path)
+            return
+        
+        texture = self.thumbnails.get(logo_url)
+        if texture is not None:
+            card.image.update_texture(texture)
+            return
+        card.image.update_source("default_channel.png")
+        self.thumbnails.request(
+            logo_url, logo_path, lambda texture: self.apply_logo_texture(logo_url, texture)
+        )
+
+    def apply_logo_texture(self, logo_url, texture):
+        for card in self.channel_cards.values():
+            if card.logo_url == logo_url:
+                card.image.update_texture(texture)
+
+    def make_logo_texture(self, width, height, pixels):
+        texture = Texture.create(size=(width, height), colorfmt='rgba')
+        texture.blit_buffer(pixels, colorfmt='rgba', bufferfmt='ubyte')
+        return texture
+
+    def make_atlas_page(self, width, height):
+        return Texture.create(size=(width, height), colorfmt='rgba')
+
+    def on_logo_evicted(self, logo_url, texture):
+        """An atlas cell is about to hold another logo: cards showing it must let go"""
+        if self.thumbnails.atlas is None:
+            return
+        for card in self.channel_cards.values():
+            if card.logo_url == logo_url and card.image.texture is texture:
+                card.image.update_source("default_channel.png")
+
+    def toggle_logo_atlas(self, *args):
+        """Switch between one texture per logo and the shared logo atlas"""
+        thumbnails = self.thumbnails
+        if not thumbnails.available:
+            self.status_bar.text = 'El atlas de logos necesita Pillow'
+            return
+        thumbnails.use_atlas(self.logo_atlas if thumbnails.atlas is None else None)
+        # La ventana reciente de frames pasa a medir sólo el modo nuevo
+        self.frame_timer.clear_recent()
+        for card in list(self.channel_cards.values()):
+            logo_path = self.logo_cache.lookup(card.logo_url, touch=False) if card.logo_url else None
+            self.show_card_logo(card, logo_path)
+        self.status_bar.text = 'Atlas de logos activado' if thumbnails.atlas else 'Atlas de logos desactivado'
+
+    def logo_gl_textures(self):
+        atlas = self.thumbnails.atlas
+        if atlas is None:
+            return len(self.thumbnails)
+        # Los logos que no cupieron en el atlas tienen textura propia
+        return len(atlas.pages) + len(self.thumbnails) - len(atlas)
 
     def build(self):
         self.theme_cls.primary_palette = "DeepPurple"
@@ -209,8 +622,56 @@ class PyM3U(MDApp):
             font_style="H6"
         )
         
+        url_button = MDIconButton(
+            icon="web",
+            on_release=self.open_url_dialog,
+            theme_text_color="Custom",
+            text_color=[1, 1, 1, 1]
+        )
+        
+        probe_button = MDIconButton(
+            icon="heart-pulse",
+            on_release=self.check_streams,
+            theme_text_color="Custom",
+            text_color=[1, 1, 1, 1]
+        )
+        
+        health_button = MDIconButton(
+            icon="filter-variant",
+            on_release=self.cycle_health_mode,
+            theme_text_color="Custom",
+            text_color=[1, 1, 1, 1]
+        )
+        
+        self.group_button = MDIconButton(
+            icon="format-list-group",
+            on_release=self.toggle_grouped,
+            theme_text_color="Custom",
+            text_color=[1, 1, 1, 1]
+        )
+        
+        self.sort_button = MDIconButton(
+            icon=SORT_ICONS[self.sort_order],
+            on_release=self.cycle_sort_order,
+            theme_text_color="Custom",
+            text_color=[1, 1, 1, 1]
+        )
+        
+        self.watch_button = MDIconButton(
+            icon="eye-off-outline",
+            on_release=self.toggle_watch,
+            theme_text_color="Custom",
+            text_color=[1, 1, 1, 1]
+        )
+        
         top_bar.add_widget(open_button)
+        top_bar.add_widget(url_button)
         top_bar.add_widget(title)
+        top_bar.add_widget(probe_button)
+        top_bar.add_widget(health_button)
+        top_bar.add_widget(self.sort_button)
+        top_bar.add_widget(self.group_button)
+        top_bar.add_widget(self.watch_button)
         
         # Barra de búsqueda
         search_container = MDBoxLayout(
@@ -232,21 +693,18 @@ class PyM3U(MDApp):
         
         search_container.add_widget(self.search_field)
         
-        # ScrollView con lazy loading
-        self.scroll = LazyScrollView(
-            self.load_more_channels,
+        # Lista virtualizada: sólo existen las tarjetas visibles
+        self.channel_list = ChannelListView(
+            bind_row=self.bind_channel_card,
+            on_row_release=self.play_channel,
+            bind_header=self.bind_group_header,
+            on_header_release=self.toggle_group,
             do_scroll_x=False,
             do_scroll_y=True,
             effect_cls='ScrollEffect',
             bar_width=dp(10)
         )
-        
-        self.channels_list = MDList(
-            spacing=dp(5),
-            padding=(dp(5), dp(5))
-        )
-        
-        self.scroll.add_widget(self.channels_list)
+        self.channel_list.bind(scroll_y=lambda *args: self.logo_schedule_trigger())
         
         # Controles de reproducción
         controls = MDBoxLayout(
@@ -287,55 +745,392 @@ class PyM3U(MDApp):
         
         main_layout.add_widget(top_bar)
         main_layout.add_widget(search_container)  # Add search container
-        main_layout.add_widget(self.scroll)
+        main_layout.add_widget(self.channel_list)
         main_layout.add_widget(controls)
         main_layout.add_widget(self.status_bar)
         
         screen.add_widget(main_layout)
         
+        # Panel de métricas sobre la lista, oculto hasta pulsar F12
+        self.metrics_overlay = MDLabel(
+            text="",
+            size_hint=(None, None),
+            size=(dp(360), dp(170)),
+            text_size=(dp(344), dp(160)),
+            pos_hint={'right': 1, 'top': 1},
+            halign="left",
+            valign="top",
+            font_style="Caption",
+            theme_text_color="Custom",
+            text_color=[1, 1, 1, 1],
+            md_bg_color=[0, 0, 0, 0.7],
+            opacity=0
+        )
+        screen.add_widget(self.metrics_overlay)
+        Window.bind(on_key_down=self.on_key_down)
+        
+        # El programa en emisión cambia aunque no se mueva la lista
+        Clock.schedule_interval(self.refresh_guide, GUIDE_REFRESH)
+        # Duración de cada frame para las métricas
+        Clock.schedule_interval(self.record_frame, 0)
+        # Los últimos accesos a logos se guardan en el bucle, no sólo al cerrar
+        Clock.schedule_interval(self.flush_logo_cache, LOGO_FLUSH_INTERVAL)
+        
         return screen
     
     def on_search_text_change(self, instance, value):
-        """Filter channels based on search text"""
-        Clock.schedule_once(lambda dt: self.filter_channels(value), 0.5)
+        """Filter channels based on search text (debounced)"""
+        self.search_scheduler.request(value)
 
     def filter_channels(self, search_text):
-        """Apply filter to channels and update the display"""
+        """Apply filter to channels right away, superseding pending searches"""
+        self.search_scheduler.submit(search_text)
+
+    def run_search(self, search_text, is_cancelled):
+        """Worker thread: query the index, or scan if it is not built yet"""
+        store = self.current_playlist
+        terms, group, tvg_id = parse_query(search_text)
+        if not (terms or group or tvg_id):
+            return SearchState(store, '', None, None, None, len(store))
+        
+        # Si la consulta amplía la anterior, se busca sólo dentro de sus resultados.
+        # Se copian porque la vista activa crece mientras la lista se carga
+        key = normalize(terms)
+        within = None
+        last = self.last_search
+        if last and last.store is store and (last.group, last.tvg_id) == (group, tvg_id) \
+                and last.key in key:
+            within = array('I', last.rows)
+        count = len(store)
+        
+        index = self.search_index
+        with self.search_timer.time():
+            if index is not None and index.store is store:
+                rows = index.search(key, within, group, tvg_id, is_cancelled)
+                if index.indexed < count:
+                    # Filas de una recarga que el índice aún no tiene
+                    matches = row_matcher(store, key, group, tvg_id)
+                    rows.extend(filter(matches, range(index.indexed, count)))
+            else:
+                # Sin índice (p. ej. aún cargando): sólo las filas ya publicadas
+                matches = row_matcher(store, key, group, tvg_id)
+                rows = array('I', filter(matches, within if within is not None else range(count)))
+        return SearchState(store, key, group, tvg_id, rows, count)
+
+    def show_search_results(self, search_text, search):
+        started = time.perf_counter()
         try:
-            # Clear current display
-            self.channels_list.clear_widgets()
-            self.channel_cards.clear()
-            self.current_load_index = 0
-            
-            # Filter playlist
-            search_text = search_text.lower()
-            self.filtered_playlist = [
-                channel for channel in self.current_playlist
-                if search_text in channel.get('name', '').lower()
-            ]
-            
-            # Update status
-            if search_text:
-                self.status_bar.text = f'Encontrados {len(self.filtered_playlist)} canales'
+            store, rows = search.store, search.rows
+            if store is not self.current_playlist:
+                return
+            if rows is None:
+                self.last_search = None
+                rows = store.all_rows()
+                self.show_channels(rows, f'Mostrando {len(rows)} canales')
             else:
-                self.status_bar.text = f'Mostrando {len(self.current_playlist)} canales'
+                if search.count < len(store):
+                    # Filas que llegaron mientras se buscaba
+                    matches = row_matcher(store, search.key, search.group, search.tvg_id)
+                    rows.extend(filter(matches, range(search.count, len(store))))
+                    if store.retired:
+                        # La lista se recargó entre tanto
+                        rows = array('I', [row for row in rows if row not in store.retired])
+                        search = search._replace(rows=rows)
+                self.last_search = search
+                self.show_channels(rows, f'Encontrados {len(rows)} canales')
+        except Exception as e:
+            log.exception("Error al filtrar canales: %s", e)
+            self.status_bar.text = f'Error al filtrar: {str(e)}'
+        self.render_timer.observe(time.perf_counter() - started)
+
+    def show_channels(self, rows, status):
+        """Replace the displayed channels with a view of the playlist"""
+        self.channel_cards.clear()
+        self.filtered_playlist = self.apply_health_mode(self.sorted_view(rows))
+        self.current_index = self.playing_position(self.filtered_playlist)
+        self.status_bar.text = status
+        self.show_list()
+
+    def playing_position(self, view):
+        """Position of the channel playing in view, or 0 if it is not in it"""
+        if self.playing_row is None:
+            return 0
+        try:
+            return view.index(self.playing_row)
+        except ValueError:
+            return 0
+
+    def show_list(self, keep_scroll=False):
+        """Fill the list from the active view, flat or grouped"""
+        if self.grouped and self.group_index is not None:
+            groups = self.group_index.partition(self.filtered_playlist)
+            self.group_layout = GroupedLayout(self.group_index, groups, self.expanded_groups)
+            self.channel_list.show_data(self.group_layout.data(HEADER_ROW, CHANNEL_ROW), keep_scroll)
+        else:
+            self.group_layout = None
+            self.channel_list.show_data([CHANNEL_ROW] * len(self.filtered_playlist), keep_scroll)
+        self.logo_schedule_trigger()
+
+    def list_length(self):
+        layout = self.group_layout
+        return len(layout) if layout is not None else len(self.filtered_playlist)
+
+    def position_row(self, position):
+        """Playlist row at a list position, or None for a group header"""
+        if self.group_layout is not None:
+            return self.group_layout.entry(position)[1]
+        return self.filtered_playlist[position]
+
+    def show_view(self, status):
+        """Show the current search results (or the whole playlist) again"""
+        search = self.last_search
+        rows = search.rows if search is not None else self.current_playlist.all_rows()
+        self.show_channels(rows, status)
+
+    def apply_health_mode(self, rows):
+        """Hide dead channels or move them to the end; always a copy unless showing all"""
+        if self.health_mode == 'all':
+            return rows
+        store = self.current_playlist
+        is_dead = self.stream_probes.is_dead
+        alive = array('I')
+        dead = array('I')
+        for row in rows:
+            (dead if is_dead(store.url(row)) else alive).append(row)
+        if self.health_mode == 'dead_last':
+            alive.extend(dead)
+        return alive
+
+    def append_channels(self, store, start):
+        """Show rows appended to the playlist from start on, honouring search and health mode"""
+        search = self.last_search
+        view = self.filtered_playlist
+        rows = range(start, len(store))
+        if search is not None:
+            matches = row_matcher(store, search.key, search.group, search.tvg_id)
+            rows = array('I', filter(matches, rows))
+            # Los resultados guardados deben seguir conteniendo todo lo que coincide
+            if search.rows is not view:
+                search.rows.extend(rows)
+        if self.health_mode == 'hide_dead':
+            is_dead = self.stream_probes.is_dead
+            rows = array('I', (row for row in rows if not is_dead(store.url(row))))
+        
+        # La vista completa sigue siendo un range mientras no se oculte nada
+        self.filtered_playlist = store.extend_view(view, start, rows)
+        if not rows:
+            return
+        if self.group_layout is not None:
+            # Los recuentos de las cabeceras cambian: se rehace la disposición
+            self.show_list(keep_scroll=True)
+        else:
+            self.channel_list.append_rows(len(rows))
+            self.logo_schedule_trigger()
+
+    def bind_channel_card(self, card, index):
+        """Bind a recycled card to the channel at position index of the active view"""
+        try:
+            if self.channel_cards.get(card.channel_id) is card:
+                del self.channel_cards[card.channel_id]
             
-            # Start loading filtered results
-            self.start_channel_loading()
+            store = self.current_playlist
+            row = self.position_row(index)
+            logo_url = store.logo(row)
+            logo_path = self.logo_cache.lookup(logo_url) if logo_url else None
+            url = store.url(row)
+            name = store.display_name(row)
+            guide = ''
+            if self.epg is not None:
+                guide = format_now_next(*self.epg.now_next(store.tvg_id(row), name))
+            card.show_channel(row, name, url, logo_url, self.stream_probes.is_dead(url), guide)
+            self.channel_cards[row] = card
+            self.show_card_logo(card, logo_path)
             
+            # La cola de logos se recalcula a partir de lo que queda en pantalla
+            if logo_url and (not logo_path or self.logo_cache.is_stale(logo_url)):
+                self.logo_schedule_trigger()
         except Exception as e:
-            print(f"Error al filtrar canales: {str(e)}")
-            self.status_bar.text = f'Error al filtrar: {str(e)}'
+            log.exception("Error al mostrar canal: %s", e)
+
+    def bind_group_header(self, header, index):
+        layout = self.group_layout
+        if layout is None:
+            return
+        group_id = layout.entry(index)[0]
+        header.show_group(group_id, *layout.header(group_id))
+
+    def toggle_group(self, group_id):
+        """Expand or collapse a group; only expanded groups get cards and logos"""
+        if self.group_layout is None:
+            return
+        self.group_layout.toggle(group_id)
+        self.channel_cards.clear()
+        self.channel_list.show_data(self.group_layout.data(HEADER_ROW, CHANNEL_ROW), keep_scroll=True)
+        self.logo_schedule_trigger()
+
+    def toggle_grouped(self, *args):
+        self.grouped = not self.grouped
+        self.group_button.icon = "format-list-bulleted" if self.grouped else "format-list-group"
+        if self.grouped and self.group_index is None and len(self.current_playlist):
+            self.status_bar.text = 'Agrupando canales...'
+        self.channel_cards.clear()
+        self.show_list()
+
+    def build_group_index(self, store):
+        try:
+            index = GroupIndex.build(store)
+        except Exception as e:
+            log.exception("Error al agrupar canales: %s", e)
+            return
+        self.on_group_index_ready(index)
+
+    @mainthread
+    def on_group_index_ready(self, index):
+        if index.store is not self.current_playlist:
+            return
+        if index.count != len(index.store):
+            # La lista se recargó mientras se agrupaba
+            threading.Thread(target=self.build_group_index, args=(index.store,), daemon=True).start()
+            return
+        self.group_index = index
+        if self.grouped:
+            self.status_bar.text = f'{len(index.order)} grupos, {index.count} canales'
+            self.channel_cards.clear()
+            self.show_list()
+
+    def cycle_sort_order(self, *args):
+        self.sort_order = ORDERS[(ORDERS.index(self.sort_order) + 1) % len(ORDERS)]
+        self.sort_button.icon = SORT_ICONS[self.sort_order]
+        status = f'Orden: {ORDER_NAMES[self.sort_order]}'
+        if self.sort_order != 'file' and self.sort_index is None and len(self.current_playlist):
+            # Se aplica en cuanto el índice de orden esté listo
+            self.status_bar.text = f'{status} (ordenando...)'
+            return
+        self.resort_view(status)
+
+    def sorted_view(self, rows):
+        """Rows in the active order: the prebuilt permutation or its intersection with rows"""
+        index = self.sort_index
+        if index is None or index.store is not self.current_playlist:
+            return rows
+        return index.sort(rows, self.sort_order)
+
+    def resort_view(self, status, keep_scroll=False):
+        """Show the active view in the current order; the channel playing keeps its place"""
+        started = time.perf_counter()
+        search = self.last_search
+        rows = search.rows if search is not None else self.current_playlist.all_rows()
+        self.filtered_playlist = self.apply_health_mode(self.sorted_view(rows))
+        self.current_index = self.playing_position(self.filtered_playlist)
+        self.channel_cards.clear()
+        self.status_bar.text = status
+        self.show_list(keep_scroll)
+        self.sort_timer.observe(time.perf_counter() - started)
+
+    def build_sort_index(self, store):
+        try:
+            index = SortIndex.build(store)
+        except Exception as e:
+            log.exception("Error al ordenar canales: %s", e)
+            return
+        self.on_sort_index_ready(index)
+
+    @mainthread
+    def on_sort_index_ready(self, index):
+        if index.store is not self.current_playlist:
+            return
+        if not index.is_current():
+            # La lista se recargó mientras se ordenaba
+            threading.Thread(target=self.build_sort_index, args=(index.store,), daemon=True).start()
+            return
+        self.sort_index = index
+        if self.sort_order != 'file':
+            self.resort_view(f'Orden: {ORDER_NAMES[self.sort_order]}', keep_scroll=True)
+
+    def build_search_index(self, store):
+        try:
+            index = SearchIndex.build(store)
+        except Exception as e:
+            log.exception("Error al indexar canales: %s", e)
+            return
+        self.on_search_index_ready(index)
+
+    @mainthread
+    def on_search_index_ready(self, index):
+        if index.store is self.current_playlist:
+            # Filas que una recarga añadió mientras se indexaba; en el hilo de
+            # búsqueda, para no modificar el índice mientras se consulta
+            self.search_index = index
+            self.search_scheduler.call(index.update)
 
-    def load_more_channels(self, *args):
-        """Modified to work with filtered results"""
-        if not self.is_loading:
-            playlist_to_use = self.filtered_playlist if self.search_field.text else self.current_playlist
-            if self.current_load_index < len(playlist_to_use):
-                self.start_channel_loading()
+    def check_streams(self, *args):
+        """Probe every channel URL without a fresh result on the asyncio loop"""
+        store = self.current_playlist
+        if not len(store):
+            return
+        future = self.runtime.submit('probes', self.run_stream_probes(store))
+        if future is None:
+            self.status_bar.text = 'Ya se están comprobando los canales'
+            return
+        self.probe_future = future
+        self.status_bar.text = 'Comprobando canales...'
+
+    async def run_stream_probes(self, store):
+        cache = self.stream_probes
+        # Recorrer toda la columna de URLs lleva su tiempo: ni en la UI ni en el bucle
+        urls = await asyncio.to_thread(cache.stale, store.urls)
+        if not urls:
+            self.on_probes_up_to_date(store)
+            return
+        self.on_probe_progress(store, 0, len(urls), 0)
+        done = 0
+        dead = 0
+        
+        def on_result(result):
+            nonlocal done, dead
+            done += 1
+            dead += result.dead
+            cache.put(result)
+            if not done % 200:
+                cache.flush()
+                self.on_probe_progress(store, done, len(urls), dead)
+        
+        try:
+            await self.stream_prober.probe_all(urls, on_result)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            log.warning("Error al comprobar canales: %s", e)
+        finally:
+            cache.flush()
+        self.on_probes_done(store, done, dead)
+
+    @mainthread
+    def on_probe_progress(self, store, done, total, dead):
+        if store is self.current_playlist:
+            self.status_bar.text = f'Comprobados {done}/{total} canales, {dead} caídos'
+            # Volver a pintar las tarjetas visibles con su estado
+            self.channel_list.refresh_from_data()
+
+    @mainthread
+    def on_probes_up_to_date(self, store):
+        if store is self.current_playlist:
+            self.show_view('Todos los canales están comprobados')
+
+    @mainthread
+    def on_probes_done(self, store, done, dead):
+        if store is self.current_playlist:
+            self.show_view(f'Comprobados {done} canales: {dead} caídos')
+
+    def cycle_health_mode(self, *args):
+        modes = HEALTH_MODES
+        self.health_mode = modes[(modes.index(self.health_mode) + 1) % len(modes)]
+        self.show_view(HEALTH_LABELS[self.health_mode])
 
     def open_file_manager(self, *args):
         if not self.file_manager:
+            # Se importa al abrirlo por primera vez: no hace falta para arrancar
+            from kivymd.uix.filemanager import MDFileManager
             self.file_manager = MDFileManager(
                 exit_manager=self.exit_file_manager,
                 select_path=self.select_m3u_file,
@@ -345,268 +1140,545 @@ class PyM3U(MDApp):
     def exit_file_manager(self, *args):
         self.file_manager.close()
 
-    async def download_logo(self, logo_url, channel_name):
+    def open_url_dialog(self, *args):
+        if not self.url_dialog:
+            from kivymd.uix.dialog import MDDialog
+            self.url_field = MDTextField(hint_text="http://proveedor/lista.m3u")
+            content = MDBoxLayout(orientation='vertical', size_hint_y=None, height=dp(60))
+            content.add_widget(self.url_field)
+            self.url_dialog = MDDialog(
+                title="Abrir lista desde URL",
+                type="custom",
+                content_cls=content,
+                buttons=[
+                    MDFlatButton(text="CANCELAR", on_release=lambda *a: self.url_dialog.dismiss()),
+                    MDFlatButton(text="ABRIR", on_release=self.select_m3u_url),
+                ]
+            )
+        self.url_dialog.open()
+
+    def select_m3u_url(self, *args):
+        self.url_dialog.dismiss()
+        url = self.url_field.text.strip()
+        if url:
+            self.load_playlist(url)
+
+    async def download_logo(self, logo_url):
         if not logo_url:
             return None
             
         try:
-            # Sanitizar el nombre del canal para el archivo
-            safe_name = "".join([c for c in channel_name if c.isalnum() or c in (' ', '-', '_')]).rstrip()
-            filename = os.path.join(self.cache_dir, f"{safe_name}.png")
-            
-            # Si ya existe el logo en caché, retornarlo
-            if os.path.exists(filename):
-                return filename
-            
-            # Sanitizar la URL del logo
-            logo_url = logo_url.strip()
-            if not logo_url.startswith(('http://', 'https://')):
-                return None
-                
-            async with aiohttp.ClientSession() as session:
-                try:
-                    # Aumentar el timeout y agregar headers
-                    headers = {
-                        'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
-                    }
-                    async with session.get(logo_url, timeout=aiohttp.ClientTimeout(total=10), headers=headers, ssl=False) as response:
-                        if response.status == 200:
-                            content = await response.read()
-                            # Verificar que el contenido sea una imagen
-                            if content.startswith(b'\x89PNG') or content.startswith(b'\xFF\xD8\xFF') or content.startswith(b'GIF8'):
-                                with open(filename, 'wb') as f:
-                                    f.write(content)
-                                return filename
-                        return None
-                except (aiohttp.ClientError, asyncio.TimeoutError) as e:
-                    print(f"Error downloading logo from {logo_url}: {str(e)}")
-                    return None
-                        
+            return await self.logo_fetcher.fetch_cached(self.logo_cache, logo_url, self.logo_timer)
         except Exception as e:
-            print(f"Error processing logo for {channel_name}: {str(e)}")
+            log.warning("Error processing logo %s: %s", logo_url, e)
             return None
 
     def parse_m3u_line(self, line):
         info = {}
         try:
-            # Optimización del parsing con una sola pasada de regex
-            patterns = {
-                'logo': r'tvg-logo="([^"]+)"',
-                'name': r'tvg-name="([^"]+)"',
-                'group': r'group-title="([^"]+)"',
-                'id': r'tvg-id="([^"]+)"'
-            }
-            
-            for key, pattern in patterns.items():
-                match = re.search(pattern, line)
-                if match:
-                    info[key] = match.group(1)
-            
-            # Fallback para nombre si no se encontró con tvg-name
-            if 'name' not in info:
-                name_match = re.search(r',([^,]+)$', line)
-                if name_match:
-                    info['name'] = name_match.group(1).strip()
-                    
+            info = m3u_parser.parse_extinf(line)
         except Exception as e:
-            print(f"Error parsing M3U line: {str(e)}")
+            log.warning("Error parsing M3U line: %s", e)
             
         return info
     
-    async def load_channel_batch(self):
-        if self.is_loading:
-            return
-            
-        self.is_loading = True
+    def select_m3u_file(self, path):
+        log.debug("Archivo seleccionado: %s", path)
+        self.file_manager.close()
         try:
-            # Use filtered playlist if search is active
-            playlist_to_use = self.filtered_playlist if self.search_field.text else self.current_playlist
-            
-            batch_end = min(
-                self.current_load_index + self.visible_batch_size + self.preload_batch_size,
-                len(playlist_to_use)
-            )
-            
-            channels_to_add = []
-            for i in range(self.current_load_index, batch_end):
-                channel = playlist_to_use[i]
-                channel_id = f"channel_{i}"
-                name = channel.get('name', f'Canal {i+1}')
-                url = channel.get('url', '')
-                logo_url = channel.get('logo', '')
-                
-                channels_to_add.append((channel_id, name, url, logo_url))
+            self.load_playlist(path)
+        except Exception as e:
+            log.warning("Error en select_m3u_file: %s", e)
+            self.status_bar.text = f'Error al seleccionar archivo: {str(e)}'
+
+
+    def load_playlist(self, filepath):
+        try:
+            self.load_generation += 1
+            self.load_started = time.perf_counter()
+            self.stop_watching()
+            self.playlist_path = None
+            if self.probe_future is not None:
+                self.probe_future.cancel()
+            if self.load_future is not None:
+                self.load_future.cancel()
+            self.current_playlist = ChannelStore()
+            self.filtered_playlist = range(0)
+            self.search_scheduler.cancel()
+            self.search_index = None
+            self.last_search = None
+            self.group_index = None
+            self.group_layout = None
+            self.expanded_groups = set()
+            self.sort_index = None
+            self.current_index = 0
+            self.playing_row = None
+            self.channel_cards.clear()
+            self.channel_list.show_rows(0)
             
-            Clock.schedule_once(
-                lambda dt: self.add_channel_batch(channels_to_add)
-            )
+            if is_url(filepath):
+                # Lista remota: se parsea en el bucle asyncio según llegan los bytes
+                self.load_future = self.runtime.submit(
+                    'loading',
+                    self.download_playlist(self.load_generation, filepath, self.current_playlist)
+                )
+                self.status_bar.text = (
+                    'Descargando lista...' if self.load_future is not None
+                    else 'Demasiadas descargas pendientes, inténtelo de nuevo'
+                )
+                return
             
-            self.current_load_index = batch_end
+            if not os.path.exists(filepath) or not filepath.lower().endswith('.m3u'):
+                self.status_bar.text = 'Error: Archivo no válido'
+                return
+            # Estado del fichero que se va a mostrar, para vigilarlo después
+            self.playlist_path = filepath
+            self.playlist_signature = file_signature(filepath)
             
+            # Se reabre desde la instantánea o se parsea en segundo plano y se muestra por tandas
+            self.status_bar.text = 'Cargando lista...'
+            parse = self.parse_playlist
+            if parallel_parser.should_parallelize(filepath):
+                # Listas enormes: por tramos en varios procesos
+                self.current_playlist = ChannelStore.packed()
+                parse = self.parse_playlist_parallel
+            threading.Thread(
+                target=self.open_playlist_file,
+                args=(self.load_generation, filepath, self.current_playlist, self.playlist_signature, parse),
+                daemon=True
+            ).start()
+                
+        except Exception as e:
+            log.warning("Error al cargar playlist: %s", e)
+            self.status_bar.text = f'Error al cargar playlist: {str(e)}'
+
+    def open_playlist_file(self, generation, filepath, store, signature, parse):
+        """Worker thread: reopen the playlist from its snapshot if it did not change, else parse it"""
+        snapshots = self.playlist_snapshots
+        try:
+            # Puede tener que leer el fichero entero para comparar su contenido
+            snapshot = snapshots.load(filepath, signature)
+        except Exception as e:
+            log.warning("Error al leer la instantánea de la lista: %s", e)
+            snapshot = None
+        if snapshot is not None:
+            self.snapshot_hits.inc()
+            self.on_snapshot_loaded(generation, snapshot)
+            return
+        self.snapshot_misses.inc()
+        if generation == self.load_generation:
+            parse(generation, filepath, store, signature)
+
+    def parse_playlist(self, generation, filepath, store, signature=None):
+        """Worker thread: parse the file and hand channels to the UI in chunks"""
+        try:
+            started = time.perf_counter()
+            total = os.path.getsize(filepath)
+            parser = m3u_parser.M3UParser()
+            # Se calcula el resumen de los bytes según se parsean, sin leer el fichero dos veces
+            with open_hashed(filepath) as f:
+                # Tandas de FIRST_CHUNK y luego LOAD_CHUNK canales
+                for chunk in m3u_parser.iter_batches(m3u_parser.iter_channels(f, parser=parser)):
+                    if generation != self.load_generation:
+                        return
+                    self.publish_channels(generation, store, chunk, f.tell() * 100 // max(total, 1))
+                digest = f.raw.hexdigest()
+        except Exception as e:
+            log.warning("Error al cargar playlist: %s", e)
+            self.on_playlist_error(generation, e)
+            return
+        store.header = parser.header
+        if parser.lines:
+            self.parse_timer.observe((time.perf_counter() - started) * 10000 / parser.lines)
+        save = None
+        if signature is not None:
+            save = partial(self.playlist_snapshots.save, filepath, store, signature, digest)
+        self.publish_channels(generation, store, [], done=True, save=save)
+
+    def parse_playlist_parallel(self, generation, filepath, store, signature=None):
+        """Worker thread: parse byte ranges in a process pool, publishing them in file order"""
+        chunks = parallel_parser.iter_chunks(filepath)
+        try:
+            for chunk, percent in chunks:
+                if generation != self.load_generation:
+                    return
+                self.publish_channels(generation, store, chunk, percent)
         except Exception as e:
-            print(f"Error en load_channel_batch: {e}")
+            log.warning("Error al cargar playlist: %s", e)
+            self.on_playlist_error(generation, e)
+            return
         finally:
-            self.is_loading = False
-    
-    def add_channel_batch(self, channels):
+            chunks.close()
+        save = None
+        if signature is not None:
+            # Los tramos se leen en otros procesos: el resumen se calcula al guardar
+            save = partial(self.save_parsed_snapshot, filepath, store, signature)
+        self.publish_channels(generation, store, [], done=True, save=save)
+
+    def save_parsed_snapshot(self, filepath, store, signature):
+        """Snapshot thread: hash the file after the parse and save it only if it is the one parsed"""
+        digest = file_digest(filepath)
+        if file_signature(filepath) != signature:
+            log.info("%s cambió durante la carga; no se guarda su instantánea", filepath)
+            return
+        self.playlist_snapshots.save(filepath, store, signature, digest)
+
+    async def download_playlist(self, generation, url, store, revalidate=True):
+        """Event loop: stream a remote playlist into the store, or reopen it after a 304"""
+        snapshots = self.playlist_snapshots
+        
+        def on_channels(channels, received, total):
+            if generation != self.load_generation:
+                return False
+            percent = received * 100 // total if total else None
+            self.publish_channels(generation, store, channels, percent)
+        
         try:
-            for channel_id, name, url, logo_url in channels:
-                card = ChannelCard(
-                    channel_id=channel_id,
-                    name=name,
-                    url=url,
-                    on_release_callback=self.play_stream
-                )
-                
-                self.channels_list.add_widget(card)
-                self.channel_cards[channel_id] = card
-                
-                # Agregar logo a la cola de descarga
-                asyncio.run_coroutine_threadsafe(
-                    self.logo_download_queue.put((channel_id, logo_url, name)),
-                    self.loop
+            validators = snapshots.validators(url) if revalidate else None
+            response = await self.playlist_fetcher.fetch(url, validators, on_channels)
+            if response.not_modified:
+                snapshot = snapshots.load(url)
+                if snapshot is None:
+                    # Instantánea perdida: se descarga entera sin validadores
+                    await self.download_playlist(generation, url, store, revalidate=False)
+                else:
+                    self.on_snapshot_loaded(generation, snapshot)
+                return
+            if generation == self.load_generation:
+                store.header = response.header
+                self.publish_channels(
+                    generation, store, [], done=True,
+                    save=partial(
+                        snapshots.save_remote, url, store, response.etag, response.last_modified
+                    )
                 )
-                
         except Exception as e:
-            print(f"Error al agregar lote de canales: {str(e)}")
+            log.warning("Error al descargar playlist %s: %s", url, e)
+            self.on_playlist_error(generation, e)
 
-    def add_channel_item(self, name, url, logo_path):
+    @mainthread
+    def publish_channels(self, generation, store, chunk, percent=None, done=False, save=None):
+        """Append a parsed chunk to the playlist being loaded; done marks the last one"""
+        if generation != self.load_generation:
+            return
         try:
-            # Card mejorada para cada canal
-            card = MDCard(
-                orientation='horizontal',
-                size_hint_y=None,
-                height=80,
-                padding=10,
-                spacing=10,
-                ripple_behavior=True,
-                radius=[10,],
-                elevation=2
-            )
-            
-            # Imagen del canal
-            image = ImageLeftWidget(
-                source=logo_path if logo_path and os.path.exists(logo_path) else "default_channel.png",
-                size_hint=(None, None),
-                size=(60, 60)
-            )
-            
-            # Contenedor de texto
-            text_container = MDBoxLayout(
-                orientation='vertical',
-                padding=(10, 0)
-            )
-            
-            # Nombre del canal (sin el prefijo CUL |)
-            display_name = name.split('|')[-1].strip() if '|' in name else name
-            
-            # Nombre del canal
-            channel_name = MDLabel(
-                text=display_name,
-                theme_text_color="Primary",
-                font_style="Subtitle1",
-                bold=True
-            )
-            
-            # URL del canal
-            channel_url = MDLabel(
-                text=url[:50] + "..." if len(url) > 50 else url,
-                theme_text_color="Secondary",
-                font_style="Caption"
-            )
-            
-            text_container.add_widget(channel_name)
-            text_container.add_widget(channel_url)
-            
-            card.add_widget(image)
-            card.add_widget(text_container)
-            
-            # Agregar evento de clic
-            card.bind(on_release=lambda x: self.play_stream(url))
-            
-            # Agregar la card a la lista
-            self.channels_list.add_widget(card)
+            start = len(store)
+            if isinstance(chunk, PackedChannels):
+                store.extend_packed(chunk)
+            else:
+                store.extend(chunk)
+            if start == 0 and len(store):
+                self.start_logo_downloader()
+            # Las filas nuevas se añaden sin mover el scroll ni perder la búsqueda
+            self.append_channels(store, start)
             
+            if done:
+                self.finish_loading(store, save)
+            elif percent is not None:
+                self.status_bar.text = f'Cargando... {len(store)} canales ({percent}%)'
+            else:
+                self.status_bar.text = f'Cargando... {len(store)} canales'
         except Exception as e:
-            print(f"Error al agregar canal: {str(e)}")
+            log.warning("Error al cargar playlist: %s", e)
+            self.status_bar.text = f'Error al cargar playlist: {str(e)}'
 
-    def select_m3u_file(self, path):
-        print(f"Archivo seleccionado: {path}")  # Debug
-        self.file_manager.close()
+    @mainthread
+    def on_playlist_error(self, generation, error):
+        if generation == self.load_generation:
+            self.status_bar.text = f'Error al cargar playlist: {str(error)}'
+
+    @mainthread
+    def on_snapshot_loaded(self, generation, snapshot):
+        if generation == self.load_generation:
+            self.show_snapshot(snapshot)
+
+    def show_snapshot(self, snapshot):
+        """Show a playlist reopened from its snapshot"""
+        self.current_playlist = snapshot
+        self.start_logo_downloader()
+        self.show_channels(snapshot.all_rows(), '')
+        self.finish_loading(snapshot)
+
+    def finish_loading(self, store, save=None):
+        """The whole playlist is in the store: index it and, if save is given, snapshot it"""
+        if not len(store):
+            self.status_bar.text = 'No se encontraron canales en la lista'
+            return
+        self.status_bar.text = f'Cargados {len(store)} canales'
+        if self.load_started is not None:
+            self.load_timer.observe(time.perf_counter() - self.load_started)
+            self.load_started = None
+        if save is not None:
+            threading.Thread(target=self.save_playlist_snapshot, args=(save,), daemon=True).start()
+        threading.Thread(target=self.build_search_index, args=(store,), daemon=True).start()
+        threading.Thread(target=self.build_group_index, args=(store,), daemon=True).start()
+        threading.Thread(target=self.build_sort_index, args=(store,), daemon=True).start()
+        self.load_epg(store)
+        if self.watching:
+            self.start_watching(store)
+
+    def load_epg(self, store):
+        """Show the playlist's guide from its index at once; refresh it if it is old"""
+        url = guide_url(store.header)
+        if url != self.epg_url:
+            if self.epg_future is not None:
+                self.epg_future.cancel()
+            self.epg_url = url
+            self.epg = self.epg_guides.load(url) if url else None
+        if url is None or not self.epg_guides.is_stale(url):
+            return
+        if self.epg_future is None or self.epg_future.done():
+            self.epg_future = self.runtime.submit('epg', self.update_epg(url))
+
+    async def update_epg(self, url):
+        """Event loop: revalidate the guide and rebuild its index in a worker thread"""
+        guides = self.epg_guides
         try:
-            self.load_playlist(path)
+            path = guides.download_path(url)
+            response = await self.playlist_fetcher.download(url, path, guides.validators(url))
+            if response.not_modified:
+                guides.touch(url)
+                return
+            index = await asyncio.get_running_loop().run_in_executor(
+                None, guides.build, url, path, response.etag, response.last_modified
+            )
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
-            print(f"Error en select_m3u_file: {str(e)}")  # Debug
-            self.status_bar.text = f'Error al seleccionar archivo: {str(e)}'
+            log.warning("Error al actualizar la guía %s: %s", url, e)
+            return
+        self.on_epg_ready(url, index)
+
+    @mainthread
+    def on_epg_ready(self, url, index):
+        if url == self.epg_url:
+            self.epg = index
+            self.channel_list.refresh_from_data()
 
+    def flush_logo_cache(self, *args):
+        self.runtime.call_soon(self.save_logo_accesses)
 
-    def start_channel_loading(self):
+    def save_logo_accesses(self):
+        """Event loop: write the LRU order gathered since the last flush"""
         try:
-            future = asyncio.run_coroutine_threadsafe(self.load_channel_batch(), self.loop)
-            future.add_done_callback(self.on_batch_complete)
+            self.logo_cache.flush()
         except Exception as e:
-            print(f"Error en start_channel_loading: {str(e)}")
-            self.status_bar.text = f'Error al cargar canales: {str(e)}'
+            log.warning("Error al guardar la caché de logos: %s", e)
 
-    def on_batch_complete(self, future):
-            try:
-                future.result()  # Obtener el resultado o la excepción si ocurrió
-            except Exception as e:
-                print(f"Error en batch loading: {str(e)}")
+    def refresh_guide(self, *args):
+        if self.epg is not None:
+            self.channel_list.refresh_from_data()
 
-    def load_playlist(self, filepath):
+    def toggle_watch(self, *args):
+        self.watching = not self.watching
+        self.watch_button.icon = "eye-outline" if self.watching else "eye-off-outline"
+        if not self.watching:
+            self.stop_watching()
+            self.status_bar.text = 'Lista sin vigilar'
+        elif self.playlist_path is None:
+            self.status_bar.text = 'Sólo se vigilan las listas locales'
+        else:
+            self.status_bar.text = 'Vigilando cambios en la lista'
+            if len(self.current_playlist):
+                self.start_watching(self.current_playlist)
+
+    def start_watching(self, store):
+        """Hash the loaded file in a worker thread, then watch it for changes"""
+        self.stop_watching()
+        if self.playlist_path is None:
+            return
+        threading.Thread(
+            target=self.prepare_watch,
+            args=(self.watch_generation, store, self.playlist_path, self.playlist_signature),
+            daemon=True
+        ).start()
+
+    def prepare_watch(self, token, store, path, signature):
         try:
-            self.channels_list.clear_widgets()
-            self.current_playlist = []
-            self.current_load_index = 0
-            self.channel_cards.clear()
-            
-            if not os.path.exists(filepath) or not filepath.lower().endswith('.m3u'):
-                self.status_bar.text = 'Error: Archivo no válido'
-                return
-            
-            # Cargar toda la playlist en memoria
-            current_info = {}
-            with open(filepath, 'r', encoding='utf-8') as f:
-                for line in f:
-                    line = line.strip()
-                    if line.startswith('#EXTINF:'):
-                        current_info = self.parse_m3u_line(line)
-                    elif line and not line.startswith('#'):
-                        if current_info:
-                            current_info['url'] = line
-                            self.current_playlist.append(current_info)
-                            current_info = {}
-            
-            if len(self.current_playlist) > 0:
-                self.status_bar.text = f'Cargados {len(self.current_playlist)} canales'
-                self.start_logo_downloader()
-                # Cargar solo el primer lote de canales
-                Clock.schedule_once(lambda dt: self.start_channel_loading(), 0)
+            if file_signature(path) == signature:
+                baseline = PlaylistBaseline.from_file(path, store)
             else:
-                self.status_bar.text = 'No se encontraron canales en el archivo'
-                
+                # Cambió después de cargarse: la primera recarga lo compara todo
+                baseline = PlaylistBaseline(store, array('q'), array('I'))
+        except OSError as e:
+            log.warning("Error al vigilar %s: %s", path, e)
+            return
+        watcher = PlaylistWatcher(path, partial(self.reload_watched, token, baseline), signature=signature)
+        self.on_watch_ready(token, watcher)
+
+    @mainthread
+    def on_watch_ready(self, token, watcher):
+        if token == self.watch_generation and self.watching:
+            self.watcher = watcher.start()
+
+    def stop_watching(self):
+        # Invalida también lo que esté preparándose o recargándose
+        self.watch_generation += 1
+        if self.watcher is not None:
+            self.watcher.stop()
+            self.watcher = None
+
+    def reload_watched(self, token, baseline, path):
+        """Watcher thread: diff the changed file against what is shown"""
+        if token != self.watch_generation:
+            return
+        with open(path, 'rb') as f:
+            diff = baseline.diff(f.read())
+        if diff is None:
+            return
+        applied = threading.Event()
+        self.apply_playlist_diff(token, baseline, diff, applied)
+        # La siguiente comparación parte de lo ya aplicado
+        applied.wait()
+
+    @mainthread
+    def apply_playlist_diff(self, token, baseline, diff, applied):
+        """Apply a reload diff to the store, the indexes and the visible cards"""
+        try:
+            store = baseline.store
+            if token != self.watch_generation or store is not self.current_playlist:
+                return
+            replaced, added = baseline.apply(diff)
+            if self.search_index is not None:
+                self.search_scheduler.call(self.search_index.update)
+            if self.group_index is not None:
+                self.group_index.apply_changes(replaced, added, diff.removed)
+            if self.sort_index is not None:
+                # Hasta tenerlo, las filas nuevas se muestran al final del orden
+                threading.Thread(target=self.build_sort_index, args=(store,), daemon=True).start()
+            self.show_reloaded(store, replaced, added, diff.removed)
+            self.status_bar.text = (
+                f'Lista actualizada: {len(added)} nuevos, {len(replaced)} cambiados, '
+                f'{len(diff.removed)} quitados'
+            )
+            self.load_epg(store)
         except Exception as e:
-            print(f"Error al cargar playlist: {str(e)}")
-            self.status_bar.text = f'Error al cargar playlist: {str(e)}'
+            log.exception("Error al recargar la lista: %s", e)
+        finally:
+            applied.set()
+
+    def show_reloaded(self, store, replaced, added, removed):
+        """Patch the active view after a reload; only the cards on screen are rebound"""
+        search = self.last_search
+        if search is None:
+            rows = store.all_rows()
+        else:
+            matches = row_matcher(store, search.key, search.group, search.tvg_id)
+            removed = set(removed)
+            previous = set(search.rows) if replaced else ()
+            rows = array('I')
+            for row in search.rows:
+                new = replaced.get(row)
+                if new is None:
+                    if row not in removed:
+                        rows.append(row)
+                elif matches(new):
+                    rows.append(new)
+            # Canales que empiezan a coincidir tras cambiar
+            rows.extend(new for old, new in replaced.items() if old not in previous and matches(new))
+            rows.extend(filter(matches, added))
+            self.last_search = search._replace(rows=rows, count=len(store))
+        if self.playing_row in replaced:
+            # El canal en reproducción cambió: se sigue su versión nueva
+            self.playing_row = replaced[self.playing_row]
+        self.filtered_playlist = self.apply_health_mode(self.sorted_view(rows))
+        self.current_index = self.playing_position(self.filtered_playlist)
+        self.channel_cards.clear()
+        self.show_list(keep_scroll=True)
+
+    def record_frame(self, dt):
+        self.frame_timer.observe(dt)
+
+    def on_key_down(self, window, key, scancode, codepoint, modifiers):
+        if key == KEY_METRICS_OVERLAY:
+            self.toggle_metrics_overlay()
+            return True
+        if key == KEY_METRICS_DUMP:
+            self.dump_metrics()
+            return True
+        if key == KEY_LOGO_ATLAS:
+            self.toggle_logo_atlas()
+            return True
+        return False
+
+    def toggle_metrics_overlay(self, *args):
+        if self.overlay_event is None:
+            self.metrics_overlay.opacity = 1
+            self.update_metrics_overlay()
+            self.overlay_event = Clock.schedule_interval(self.update_metrics_overlay, 0.5)
+        else:
+            self.overlay_event.cancel()
+            self.overlay_event = None
+            self.metrics_overlay.opacity = 0
+
+    def update_metrics_overlay(self, *args):
+        """Summarize the recent metrics in the overlay"""
+        metrics = self.metrics
+        
+        def ms(value):
+            return '-' if value is None else f'{value * 1000:.1f} ms'
+        
+        def rate(prefix):
+            hits = metrics.value(f'{prefix}_hits_total', 0)
+            misses = metrics.value(f'{prefix}_misses_total', 0)
+            return f'{hits * 100 // (hits + misses)}%' if hits + misses else '-'
+        
+        parse = self.parse_timer.last
+        self.metrics_overlay.text = '\n'.join((
+            f'Frame p50 {ms(self.frame_timer.recent_quantile(0.5))}  '
+            f'p95 {ms(self.frame_timer.recent_quantile(0.95))}  {Clock.get_fps():.0f} fps',
+            f'Bucle asyncio {ms(self.runtime.lag)}  p95 {ms(metrics.value("asyncio_loop_lag_p95_seconds"))}  '
+            f'{metrics.value("asyncio_tasks", 0)} tareas',
+            f'Búsqueda p95 {ms(self.search_timer.recent_quantile(0.95))}  '
+            f'pintado p95 {ms(self.render_timer.recent_quantile(0.95))}',
+            f'Logos: cola {len(self.logo_download_queue)}  descarga p95 {ms(self.logo_timer.recent_quantile(0.95))}  '
+            f'{metrics.value("logo_fetch_bytes_total", 0) // 1024} KB',
+            f'Aciertos caché logos {rate("logo_cache")}  texturas {rate("thumbnail")}  '
+            f'atlas {"sí" if self.thumbnails.atlas else "no"} ({self.logo_gl_textures()} texturas GPU)',
+            f'Tarjetas {metrics.value("widgets_alive", 0)}  canales {metrics.value("channels", 0)}  '
+            f'parseo {"-" if parse is None else f"{parse:.2f} s"}/10k líneas',
+        ))
+
+    def dump_metrics(self, *args):
+        """Write the metrics to cache/ as JSON and Prometheus text"""
+        try:
+            for name in ('metrics.json', 'metrics.prom'):
+                self.metrics.dump(os.path.join(self.cache_dir, name))
+        except OSError as e:
+            log.warning("Error al guardar las métricas: %s", e)
+            return
+        if self.root is not None:
+            self.status_bar.text = f'Métricas guardadas en {self.cache_dir}'
+
+    def save_playlist_snapshot(self, save):
+        try:
+            save()
+        except Exception as e:
+            log.warning("Error al guardar la instantánea de la lista: %s", e)
 
     def on_stop(self):
             # Limpiar recursos al cerrar la aplicación
-            if self.loop and self.loop.is_running():
-                self.loop.call_soon_threadsafe(self.loop.stop)
-            if hasattr(self, 'loop_thread'):
-                self.loop_thread.join(timeout=1)
+            self.load_generation += 1
+            self.stop_watching()
+            self.search_scheduler.shutdown()
+            self.thumbnails.shutdown()
+            # Cancela logos, descargas, comprobaciones y guía, espera a que
+            # terminen y cierra las sesiones HTTP antes de parar el bucle
+            self.runtime.shutdown(timeout=1, cleanup=self.close_sessions)
+            self.logo_cache.close()
+            self.stream_probes.close()
+            self.player.close()
+            self.dump_metrics()
+            self.log_listener.stop()
 
-    def play_stream(self, url):
+    async def close_sessions(self):
+        await asyncio.gather(
+            self.logo_fetcher.close(), self.playlist_fetcher.close(), self.stream_prober.close()
+        )
+
+    def play_stream(self, url, options=()):
         try:
-            if self.player:
-                self.player.stop()
-            
-            instance = vlc.Instance()
-            self.player = instance.media_player_new()
-            media = instance.media_new(url)
-            self.player.set_media(media)
-            self.player.play()
+            self.player.play(url, options)
             
             self.play_button.icon = "pause"
             self.status_bar.text = f'Reproduciendo: {url}'
@@ -614,31 +1686,57 @@ class PyM3U(MDApp):
         except Exception as e:
             self.status_bar.text = f'Error al reproducir: {str(e)}'
 
+    @mainthread
+    def on_zap(self, url, latency, preloaded):
+        # Llega desde un hilo de libVLC cuando el canal empieza a reproducirse
+        if url == self.player.current_url:
+            self.status_bar.text = f'Reproduciendo: {url} ({latency * 1000:.0f} ms)'
+
     def play_pause(self, instance):
-        if self.player:
+        if self.player.current_url:
             if self.player.is_playing():
                 self.player.pause()
                 self.play_button.icon = "play"
             else:
-                self.player.play()
+                self.player.resume()
                 self.play_button.icon = "pause"
 
+    def play_channel(self, row):
+        """Play a channel by row and remember its position in the active view"""
+        try:
+            self.current_index = self.filtered_playlist.index(row)
+        except ValueError:
+            pass
+        self.play_row(row)
+
+    def play_row(self, row):
+        store = self.current_playlist
+        self.playing_row = row
+        self.play_stream(store.url(row), store.vlcopts.get(row, ()))
+        self.preload_neighbours()
+
+    def preload_neighbours(self):
+        """Pre-parse the channels next_track and prev_track would switch to"""
+        try:
+            store = self.current_playlist
+            rows = self.filtered_playlist
+            neighbours = [
+                rows[position] for position in (self.current_index + 1, self.current_index - 1)
+                if 0 <= position < len(rows)
+            ]
+            self.player.preload((store.url(row), store.vlcopts.get(row, ())) for row in neighbours)
+        except Exception as e:
+            log.warning("Error al preabrir canales: %s", e)
+
     def prev_track(self, instance):
         if self.current_index > 0:
             self.current_index -= 1
-            self.play_stream(self.current_playlist[self.current_index]['url'])
+            self.play_row(self.filtered_playlist[self.current_index])
 
     def next_track(self, instance):
-        if self.current_index < len(self.current_playlist) - 1:
+        if self.current_index < len(self.filtered_playlist) - 1:
             self.current_index += 1
-            self.play_stream(self.current_playlist[self.current_index]['url'])
+            self.play_row(self.filtered_playlist[self.current_index])
 
 if __name__ == '__main__':
-    def run_loop(loop):
-        asyncio.set_event_loop(loop)
-        loop.run_forever()
-
-    loop = asyncio.new_event_loop()
-    threading.Thread(target=run_loop, args=(loop,), daemon=True).start()
-    
     PyM3U().run()
\ No newline at end of file
@@ -0,0 +1,376 @@
+"""Headless batch processing of M3U playlists.
+
+Runs without kivy, kivymd or vlc, on the same parser as the app::
+
+    python pym3u_cli.py lista1.m3u lista2.m3u.gz http://proveedor/lista.m3u \\
+        --group 'Deportes|Noticias' --name '^ES' --dedupe url -o salida.m3u
+
+Sources are streamed and merged in the order given; channels are filtered
+by group/name regular expressions, deduplicated by URL and/or tvg-id and
+written as M3U, JSON, JSON Lines or CSV.  Memory stays bounded whatever the
+input size: only the dedupe keys (8 bytes of hash each) are kept.
+
+With ``--jobs N`` each input file is parsed and filtered in its own worker
+process; the results are merged back in input order.  Throughput is
+reported on stderr in channels per second.
+"""
+import argparse
+import csv
+import gzip
+import hashlib
+import json
+import os
+import pickle
+import re
+import sys
+import tempfile
+import time
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
+
+import m3u_parser
+
+FORMATS = ('m3u', 'json', 'jsonl', 'csv')
+CSV_FIELDS = ('name', 'url', 'group', 'id', 'logo')
+DEDUPE_KEYS = {'url': 'url', 'tvg-id': 'id'}
+# Registros por bloque en los ficheros intermedios de los workers
+SPOOL_BATCH = 1000
+
+
+def open_source(source):
+    """Binary stream for a path, ``.gz`` file, http(s) URL or ``-`` (stdin)."""
+    if source == '-':
+        return sys.stdin.buffer
+    if m3u_parser.is_url(source):
+        request = urllib.request.Request(source, headers={'User-Agent': 'pym3u'})
+        response = urllib.request.urlopen(request, timeout=60)
+        if source.lower().endswith('.gz'):
+            return gzip.GzipFile(fileobj=response)
+        return response
+    if source.lower().endswith('.gz'):
+        return gzip.open(source, 'rb')
+    return open(source, 'rb')
+
+
+class ChannelFilter:
+    """Keep channels whose group/name match (and do not match the exclusions)."""
+
+    def __init__(self, group=None, name=None, exclude_group=None, exclude_name=None,
+                 ignore_case=False):
+        flags = re.IGNORECASE if ignore_case else 0
+        compile_ = lambda pattern: re.compile(pattern, flags) if pattern else None
+        self.group = compile_(group)
+        self.name = compile_(name)
+        self.exclude_group = compile_(exclude_group)
+        self.exclude_name = compile_(exclude_name)
+
+    def __bool__(self):
+        return any((self.group, self.name, self.exclude_group, self.exclude_name))
+
+    def __call__(self, channel):
+        group = channel.get('group', '')
+        name = channel.get('name', '')
+        if self.group is not None and not self.group.search(group):
+            return False
+        if self.name is not None and not self.name.search(name):
+            return False
+        if self.exclude_group is not None and self.exclude_group.search(group):
+            return False
+        if self.exclude_name is not None and self.exclude_name.search(name):
+            return False
+        return True
+
+
+class Deduper:
+    """Remember channels already seen by one or more keys (``url``, ``tvg-id``)."""
+
+    def __init__(self, keys):
+        self.fields = [DEDUPE_KEYS[key] for key in keys]
+        self._seen = [set() for _ in self.fields]
+
+    def __bool__(self):
+        return bool(self.fields)
+
+    def __call__(self, channel):
+        """True the first time a channel is seen; channels without the key always pass."""
+        digests = []
+        for field, seen in zip(self.fields, self._seen):
+            value = channel.get(field, '').strip()
+            if not value:
+                digests.append(None)
+                continue
+            digest = hashlib.blake2b(value.encode('utf-8'), digest_size=8).digest()
+            if digest in seen:
+                return False
+            digests.append(digest)
+        for digest, seen in zip(digests, self._seen):
+            if digest is not None:
+                seen.add(digest)
+        return True
+
+
+class M3UWriter:
+    def __init__(self, out):
+        self.out = out
+        self.started = False
+
+    def header(self, attrs):
+        if not self.started:
+            self.started = True
+            extra = ''.join(f' {key}="{value}"' for key, value in attrs.items())
+            self.out.write(f'#EXTM3U{extra}\n')
+
+    def write(self, channel):
+        self.header({})
+        self.out.write(m3u_parser.format_channel(channel))
+        self.out.write('\n')
+
+    def close(self):
+        self.header({})
+
+
+class JSONWriter:
+    """A JSON array written one element at a time."""
+
+    def __init__(self, out):
+        self.out = out
+        self.first = True
+
+    def header(self, attrs):
+        pass
+
+    def write(self, channel):
+        self.out.write('[\n' if self.first else ',\n')
+        self.first = False
+        json.dump(channel, self.out, ensure_ascii=False)
+
+    def close(self):
+        self.out.write('[]\n' if self.first else '\n]\n')
+
+
+class JSONLinesWriter:
+    def __init__(self, out):
+        self.out = out
+
+    def header(self, attrs):
+        pass
+
+    def write(self, channel):
+        json.dump(channel, self.out, ensure_ascii=False)
+        self.out.write('\n')
+
+    def close(self):
+        pass
+
+
+class CSVWriter:
+    def __init__(self, out):
+        self.writer = csv.writer(out)
+        self.writer.writerow(CSV_FIELDS)
+
+    def header(self, attrs):
+        pass
+
+    def write(self, channel):
+        self.writer.writerow([channel.get(field, '') for field in CSV_FIELDS])
+
+    def close(self):
+        pass
+
+
+WRITERS = {'m3u': M3UWriter, 'json': JSONWriter, 'jsonl': JSONLinesWriter, 'csv': CSVWriter}
+
+
+class SourceStats:
+    __slots__ = ('source', 'read', 'kept', 'seconds')
+
+    def __init__(self, source, read=0, kept=0, seconds=0.0):
+        self.source = source
+        self.read = read
+        self.kept = kept
+        self.seconds = seconds
+
+    def report(self):
+        rate = self.read / self.seconds if self.seconds else 0
+        return (f'{self.source}: {self.read} canales leídos, {self.kept} conservados '
+                f'en {self.seconds:.2f}s ({rate:,.0f} canales/s)')
+
+
+def read_channels(source, options, parser):
+    stream = open_source(source)
+    try:
+        yield from m3u_parser.iter_channels(stream, keep_attrs=options.keep_attrs, parser=parser)
+    finally:
+        if stream is not sys.stdin.buffer:
+            stream.close()
+
+
+def filtered_channels(source, options, channel_filter, deduper, stats, parser=None):
+    """Channels of one source that pass the filter and the dedupe."""
+    started = time.perf_counter()
+    try:
+        for channel in read_channels(source, options, parser):
+            stats.read += 1
+            if channel_filter and not channel_filter(channel):
+                continue
+            if deduper and not deduper(channel):
+                continue
+            stats.kept += 1
+            yield channel
+    finally:
+        stats.seconds = time.perf_counter() - started
+
+
+def make_filter(options):
+    return ChannelFilter(options.group, options.name, options.exclude_group,
+                         options.exclude_name, options.ignore_case)
+
+
+def spool_source(source, options):
+    """Worker process: filter one source into a temporary pickle file."""
+    stats = SourceStats(source)
+    parser = m3u_parser.M3UParser(keep_attrs=options.keep_attrs)
+    # Dedupe local: las repeticiones dentro del mismo fichero no cruzan el proceso.
+    # Sólo con una clave: con varias, un canal que la pasada global descartaría
+    # (por otra clave vista en un fichero anterior) dejaría aquí sus claves
+    # marcadas y haría caer canales que en serie se escriben
+    local_deduper = Deduper(options.dedupe) if len(options.dedupe) == 1 else None
+    channels = filtered_channels(source, options, make_filter(options),
+                                 local_deduper, stats, parser)
+    fd, path = tempfile.mkstemp(prefix='pym3u-', suffix='.spool')
+    with os.fdopen(fd, 'wb') as f:
+        batch = []
+        for channel in channels:
+            batch.append(channel)
+            if len(batch) == SPOOL_BATCH:
+                pickle.dump(batch, f, pickle.HIGHEST_PROTOCOL)
+                batch = []
+        if batch:
+            pickle.dump(batch, f, pickle.HIGHEST_PROTOCOL)
+    return path, parser.header, stats
+
+
+def read_spool(path):
+    try:
+        with open(path, 'rb') as f:
+            while True:
+                try:
+                    yield from pickle.load(f)
+                except EOFError:
+                    return
+    finally:
+        os.remove(path)
+
+
+def process_serial(options, writer, deduper):
+    channel_filter = make_filter(options)
+    all_stats = []
+    for source in options.sources:
+        stats = SourceStats(source)
+        parser = m3u_parser.M3UParser(keep_attrs=options.keep_attrs)
+        for channel in filtered_channels(source, options, channel_filter, deduper, stats, parser):
+            writer.header(parser.header)
+            writer.write(channel)
+        all_stats.append(stats)
+        report(options, stats)
+    return all_stats
+
+
+def process_parallel(options, writer, deduper):
+    all_stats = []
+    futures = []
+    try:
+        with ProcessPoolExecutor(max_workers=options.jobs) as pool:
+            futures = [pool.submit(spool_source, source, options) for source in options.sources]
+            # Se consumen en el orden de entrada para que la fusión sea estable
+            for future in futures:
+                path, header, stats = future.result()
+                writer.header(header)
+                kept = 0
+                for channel in read_spool(path):
+                    if deduper and not deduper(channel):
+                        continue
+                    kept += 1
+                    writer.write(channel)
+                stats.kept = kept
+                all_stats.append(stats)
+                report(options, stats)
+    finally:
+        # Tras un error quedan ficheros intermedios sin leer
+        for future in futures:
+            if not future.cancelled() and future.exception() is None:
+                path = future.result()[0]
+                if os.path.exists(path):
+                    os.remove(path)
+    return all_stats
+
+
+def report(options, stats):
+    if not options.quiet:
+        print(stats.report(), file=sys.stderr)
+
+
+def output_format(options):
+    if options.format:
+        return options.format
+    if options.output:
+        ext = os.path.splitext(options.output)[1].lstrip('.').lower()
+        if ext == 'm3u8':
+            return 'm3u'
+        if ext in FORMATS:
+            return ext
+    return 'm3u'
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description='Procesa listas M3U sin interfaz: filtra, elimina duplicados, fusiona y exporta.'
+    )
+    parser.add_argument('sources', nargs='+', help="ficheros .m3u/.m3u.gz, URLs http(s) o '-'")
+    parser.add_argument('-o', '--output', help='fichero de salida (por defecto, stdout)')
+    parser.add_argument('-f', '--format', choices=FORMATS, help='por defecto, según la extensión')
+    parser.add_argument('--group', help='regex que debe cumplir group-title')
+    parser.add_argument('--name', help='regex que debe cumplir el nombre')
+    parser.add_argument('--exclude-group', help='descartar los grupos que cumplan esta regex')
+    parser.add_argument('--exclude-name', help='descartar los nombres que cumplan esta regex')
+    parser.add_argument('-i', '--ignore-case', action='store_true')
+    parser.add_argument('--dedupe', action='append', choices=sorted(DEDUPE_KEYS), default=[],
+                        help='eliminar duplicados por esta clave (se puede repetir)')
+    parser.add_argument('-j', '--jobs', type=int, default=1,
+                        help='procesos para leer varios ficheros en paralelo')
+    parser.add_argument('-q', '--quiet', action='store_true', help='sin estadísticas por fuente')
+    return parser
+
+
+def main(argv=None):
+    options = build_parser().parse_args(argv)
+    fmt = output_format(options)
+    # Los atributos originales sólo hacen falta para reescribir M3U o volcar JSON
+    options.keep_attrs = fmt in ('m3u', 'json', 'jsonl')
+    deduper = Deduper(options.dedupe)
+
+    if options.output:
+        out = open(options.output, 'w', encoding='utf-8', newline='' if fmt == 'csv' else None)
+    else:
+        out = sys.stdout
+    started = time.perf_counter()
+    try:
+        writer = WRITERS[fmt](out)
+        parallel = options.jobs > 1 and len(options.sources) > 1 and '-' not in options.sources
+        process = process_parallel if parallel else process_serial
+        all_stats = process(options, writer, deduper)
+        writer.close()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    elapsed = time.perf_counter() - started
+
+    read = sum(stats.read for stats in all_stats)
+    kept = sum(stats.kept for stats in all_stats)
+    print(f'Total: {read} canales leídos, {kept} escritos en {elapsed:.2f}s '
+          f'({read / elapsed if elapsed else 0:,.0f} canales/s)', file=sys.stderr)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,196 @@
+"""Trigram search index over channel names.
+
+Built once per playlist (normally on a worker thread) and queried from a
+worker thread as well.  ``update`` must not run while a search does: the
+app runs both on the search worker.  A query of three or more characters only verifies
+the rows of its rarest trigram; shorter queries fall back to scanning the
+candidate rows.  ``search`` accepts the previous result set as ``within`` so
+narrowing a query while typing never touches the whole playlist again.
+
+Queries understand two optional facets, ``group:`` and ``id:``, e.g.
+``group:Deportes espn`` or ``group:"Cine Clásico"`` or ``id:canal1.es``.
+"""
+import re
+import unicodedata
+from array import array
+
+from channel_store import StringColumn
+
+# Cada cuántas filas se comprueba si la búsqueda quedó obsoleta
+CANCEL_CHECK_EVERY = 4096
+
+FACET_RE = re.compile(r'\b(group|id):(?:"([^"]*)"|(\S+))')
+
+
+class SearchCancelled(Exception):
+    """Raised by ``SearchIndex.search`` when ``is_cancelled()`` turns true."""
+
+
+def normalize(text):
+    """Casefold and strip accents so 'Fútbol' matches 'futbol'."""
+    text = text.casefold()
+    if text.isascii():
+        return text
+    text = unicodedata.normalize('NFKD', text)
+    return ''.join(c for c in text if not unicodedata.combining(c))
+
+
+def parse_query(text):
+    """Split raw search text into ``(terms, group, tvg_id)``."""
+    facets = {}
+
+    def take(match):
+        facets[match.group(1)] = match.group(2) if match.group(2) is not None else match.group(3)
+        return ' '
+    terms = FACET_RE.sub(take, text)
+    return ' '.join(terms.split()), facets.get('group'), facets.get('id')
+
+
+def row_matcher(store, key, group=None, tvg_id=None):
+    """Return a ``row -> bool`` predicate for a parsed, normalized query.
+
+    Checks rows directly against the store; used for rows no index covers
+    yet, such as those of a playlist that is still loading.
+    """
+    wanted_group = normalize(group) if group else None
+
+    def matches(row):
+        if key and key not in normalize(store.name(row)):
+            return False
+        if wanted_group is not None and normalize(store.group(row)) != wanted_group:
+            return False
+        return not tvg_id or store.tvg_id(row) == tvg_id
+    return matches
+
+
+class SearchIndex:
+    """Trigram postings plus group/tvg-id facets for a ``ChannelStore``."""
+
+    def __init__(self, store):
+        self.store = store
+        self.indexed = 0
+        self._normalized = StringColumn()
+        self._postings = {}
+        self._group_rows = {}
+        self._id_rows = {}
+
+    @classmethod
+    def build(cls, store):
+        index = cls(store)
+        index.update()
+        return index
+
+    def update(self):
+        """Index rows appended to the store since the last call."""
+        store = self.store
+        postings = self._postings
+        group_rows = self._group_rows
+        id_rows = self._id_rows
+        normalized = self._normalized
+        group_ids = store.groups.ids()
+
+        for row in range(self.indexed, len(store)):
+            name = normalize(store.name(row))
+            normalized.append(name)
+            for gram in {name[i:i + 3] for i in range(len(name) - 2)}:
+                posting = postings.get(gram)
+                if posting is None:
+                    posting = postings[gram] = array('I')
+                posting.append(row)
+
+            group_id = group_ids[row]
+            rows = group_rows.get(group_id)
+            if rows is None:
+                rows = group_rows[group_id] = array('I')
+            rows.append(row)
+
+            tvg_id = store.tvg_id(row)
+            if tvg_id:
+                rows = id_rows.get(tvg_id)
+                if rows is None:
+                    rows = id_rows[tvg_id] = array('I')
+                rows.append(row)
+        self.indexed = len(store)
+
+    def group_rows(self, group):
+        """Rows whose group title matches ``group`` (case/accent-insensitive)."""
+        wanted = normalize(group)
+        values = self.store.groups.values
+        matches = [
+            rows for group_id, rows in self._group_rows.items()
+            if normalize(values[group_id]) == wanted
+        ]
+        if len(matches) == 1:
+            return matches[0]
+        return array('I', sorted(row for rows in matches for row in rows))
+
+    def search(self, query, within=None, group=None, tvg_id=None, is_cancelled=None):
+        """Return an ``array('I')`` of matching rows.
+
+        ``within`` restricts the search to an earlier result; it must be a
+        superset of the answer, e.g. the result of a shorter query that is
+        contained in this one.  Rows come back in the order of the smallest
+        candidate set, which is ascending unless ``within`` was reordered.
+        """
+        rows = self._search(query, within, group, tvg_id, is_cancelled)
+        retired = self.store.retired
+        if retired:
+            # Versiones anteriores de canales que cambiaron al recargar la lista
+            rows = array('I', [row for row in rows if row not in retired])
+        return rows
+
+    def _search(self, query, within, group, tvg_id, is_cancelled):
+        text = normalize(query.strip())
+        filters = []
+        if tvg_id:
+            filters.append(self._id_rows.get(tvg_id, array('I')))
+        if group:
+            filters.append(self.group_rows(group))
+
+        # ``within`` sólo acota los candidatos: la comprobación del texto ya es exacta
+        sources = list(filters)
+        if within is not None:
+            sources.append(within)
+        if len(text) >= 3:
+            postings = self._postings
+            for gram in {text[i:i + 3] for i in range(len(text) - 2)}:
+                posting = postings.get(gram)
+                if posting is None:
+                    return array('I')
+                sources.append(posting)
+        if not sources:
+            if not text:
+                return array('I', range(self.indexed))
+            # Sin trigramas ni facetas: búsqueda directa sobre los segmentos
+            candidates = self._normalized.find_rows(text)
+            return self._collect(candidates, text, (), query, is_cancelled, verify=False)
+
+        candidates = min(sources, key=len)
+        if not len(candidates):
+            return array('I')
+        if text and len(candidates) * 2 > self.indexed:
+            # Candidatos demasiado amplios: sale más barato recorrer los segmentos
+            candidates = self._normalized.find_rows(text)
+            checks = [set(rows) for rows in filters]
+            return self._collect(candidates, text, checks, query, is_cancelled, verify=False)
+
+        # Las facetas que no aportan los candidatos se comprueban por pertenencia
+        checks = [set(rows) for rows in filters if rows is not candidates]
+        if not text and not checks:
+            return array('I', candidates)
+
+        return self._collect(candidates, text, checks, query, is_cancelled)
+
+    def _collect(self, candidates, text, checks, query, is_cancelled, verify=True):
+        normalized = self._normalized
+        result = array('I')
+        append = result.append
+        for count, row in enumerate(candidates):
+            if is_cancelled is not None and not count % CANCEL_CHECK_EVERY and is_cancelled():
+                raise SearchCancelled(query)
+            if verify and text and text not in normalized[row]:
+                continue
+            if checks and not all(row in rows for rows in checks):
+                continue
+            append(row)
+        return result
@@ -0,0 +1,124 @@
+"""Debounced, cancellable search pipeline.
+
+Keystrokes call ``request``; only the text that stays unchanged for
+``delay`` seconds is searched.  Every request bumps a generation counter:
+the search running in the background sees it through ``is_cancelled`` and
+gives up early, and a result that arrives for an old generation is dropped
+instead of being rendered.
+
+Searches run one at a time on a single worker thread.  Anything else that
+touches what they read, such as ``SearchIndex.update``, goes through
+``call`` so it runs on that thread between searches instead of alongside
+one.
+
+The scheduler knows nothing about kivy.  The app passes ``call_later`` (a
+function returning an object with ``cancel()``, such as
+``Clock.schedule_once``) and ``deliver`` (runs a callable on the UI thread).
+"""
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from search_index import SearchCancelled
+
+log = logging.getLogger(__name__)
+
+
+class SearchScheduler:
+    """Run at most one live search at a time and render only the newest."""
+
+    COUNTERS = ('requested', 'debounced', 'started', 'cancelled', 'stale', 'rendered', 'failed')
+
+    def __init__(self, search, render, call_later, deliver, delay=0.3, executor=None):
+        # search(text, is_cancelled) corre en el worker; render(text, result) en la UI
+        self.search = search
+        self.render = render
+        self.call_later = call_later
+        self.deliver = deliver
+        self.delay = delay
+        self.executor = executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix='search')
+        self.generation = 0
+        self._timer = None
+        self._future = None
+        self._lock = threading.Lock()
+        self.counters = dict.fromkeys(self.COUNTERS, 0)
+
+    def _count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def stats(self):
+        with self._lock:
+            return dict(self.counters)
+
+    def request(self, text):
+        """Debounced entry point for every keystroke."""
+        self._count('requested')
+        generation = self._supersede()
+        self._timer = self.call_later(self.delay, lambda *args: self._start(generation, text))
+
+    def submit(self, text):
+        """Search right away, superseding anything pending or running."""
+        self._count('requested')
+        self._start(self._supersede(), text)
+
+    def call(self, fn, *args):
+        """Run ``fn(*args)`` on the search worker, after the searches already submitted."""
+        return self.executor.submit(self._call, fn, *args)
+
+    def cancel(self):
+        """Drop the pending and running searches without starting a new one."""
+        self._supersede()
+
+    def shutdown(self):
+        self.cancel()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def _supersede(self):
+        self.generation += 1
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+            self._count('debounced')
+        if self._future is not None:
+            if self._future.cancel():
+                self._count('cancelled')
+            self._future = None
+        return self.generation
+
+    def _start(self, generation, text):
+        if generation != self.generation:
+            return
+        self._timer = None
+        self._count('started')
+        self._future = self.executor.submit(self._run, generation, text)
+
+    def _run(self, generation, text):
+        is_cancelled = lambda: generation != self.generation
+        try:
+            result = self.search(text, is_cancelled)
+        except SearchCancelled:
+            self._count('cancelled')
+            return
+        except Exception as e:
+            self._count('failed')
+            log.exception("Error en la búsqueda: %s", e)
+            return
+        if is_cancelled():
+            self._count('cancelled')
+            return
+        self.deliver(lambda: self._render(generation, text, result))
+
+    def _call(self, fn, *args):
+        try:
+            fn(*args)
+        except Exception as e:
+            log.exception("Error en el hilo de búsqueda: %s", e)
+
+    def _render(self, generation, text, result):
+        if generation != self.generation:
+            self._count('stale')
+            return
+        self._future = None
+        self._count('rendered')
+        self.render(text, result)
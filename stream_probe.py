@@ -0,0 +1,349 @@
+"""Bulk stream health checks.
+
+``StreamProber`` checks channel URLs concurrently on an asyncio loop: a
+``HEAD`` request first, a ranged ``GET`` of the first KiB when the server
+refuses ``HEAD``, and for HLS a fetch of the manifest (plus its first
+variant for master playlists).  Concurrency is capped globally and per
+host, and each host is also rate limited so a provider serving thousands
+of channels is not hammered.
+
+Results go into a ``ProbeCache``: an SQLite table next to the logo cache,
+read in one query at startup, whose entries expire after ``ttl`` seconds.
+
+Runs headless as well::
+
+    python -m stream_probe lista.m3u [--concurrency 64] [--json salida.json]
+"""
+import asyncio
+import json
+import logging
+import os
+import sqlite3
+import sys
+import time
+from collections import namedtuple
+from urllib.parse import urljoin, urlsplit
+
+import m3u_parser
+from logo_fetcher import USER_AGENT
+
+log = logging.getLogger(__name__)
+
+ALIVE = 'alive'
+DEAD = 'dead'
+UNKNOWN = 'unknown'
+
+HLS_TYPES = (
+    'application/vnd.apple.mpegurl',
+    'application/x-mpegurl',
+    'audio/mpegurl',
+    'audio/x-mpegurl',
+)
+
+# Servidores que no aceptan HEAD pero sí GET
+HEAD_REFUSED = frozenset((400, 403, 405, 406, 501))
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS probes (
+    url TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    status INTEGER,
+    detail TEXT,
+    latency REAL,
+    checked REAL NOT NULL
+)
+'''
+
+
+class ProbeResult(namedtuple('ProbeResult', 'url state status detail latency checked')):
+    """Outcome of one check; ``status`` is the HTTP status or ``None``."""
+
+    @property
+    def dead(self):
+        return self.state == DEAD
+
+
+def is_hls(url, content_type=''):
+    return urlsplit(url).path.lower().endswith('.m3u8') or content_type.lower() in HLS_TYPES
+
+
+class HostLimit:
+    """Per-host concurrency cap plus a minimum interval between requests."""
+
+    __slots__ = ('semaphore', 'interval', 'next_at')
+
+    def __init__(self, concurrency, rate):
+        self.semaphore = asyncio.Semaphore(concurrency)
+        self.interval = 1 / rate if rate else 0
+        self.next_at = 0
+
+    async def __aenter__(self):
+        await self.semaphore.acquire()
+        try:
+            now = asyncio.get_running_loop().time()
+            wait = self.next_at - now
+            self.next_at = max(now, self.next_at) + self.interval
+            if wait > 0:
+                await asyncio.sleep(wait)
+        except BaseException:
+            self.semaphore.release()
+            raise
+        return self
+
+    async def __aexit__(self, *exc):
+        self.semaphore.release()
+
+
+class StreamProber:
+    """Check stream URLs over one pooled session with global and per-host limits."""
+
+    def __init__(self, concurrency=32, per_host=2, host_rate=4.0, timeout=8,
+                 max_manifest=256 * 1024):
+        self.concurrency = concurrency
+        self.per_host = per_host
+        self.host_rate = host_rate
+        self.timeout = timeout
+        self.max_manifest = max_manifest
+        self._session = None
+        self._hosts = {}
+        self.stats = {'probed': 0, 'alive': 0, 'dead': 0, 'unknown': 0}
+
+    def session(self):
+        if self._session is None or self._session.closed:
+            # aiohttp no se importa hasta la primera comprobación
+            import aiohttp
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.concurrency, ttl_dns_cache=300, ssl=False),
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                headers={'User-Agent': USER_AGENT}
+            )
+        return self._session
+
+    async def close(self):
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+    def _host_limit(self, host):
+        limit = self._hosts.get(host)
+        if limit is None:
+            limit = self._hosts[host] = HostLimit(self.per_host, self.host_rate)
+        return limit
+
+    async def probe(self, url):
+        """Check one URL and return a ``ProbeResult``."""
+        import aiohttp
+        url = url.strip()
+        started = time.perf_counter()
+        if not m3u_parser.is_url(url):
+            # rtmp://, udp://... no se pueden comprobar por HTTP
+            state, status, detail = UNKNOWN, None, 'scheme'
+        else:
+            try:
+                async with self._host_limit(urlsplit(url).hostname):
+                    started = time.perf_counter()
+                    state, status, detail = await self._check(url)
+            except asyncio.TimeoutError:
+                state, status, detail = DEAD, None, 'timeout'
+            except (aiohttp.ClientError, ValueError) as e:
+                state, status, detail = DEAD, None, type(e).__name__
+            except Exception as e:
+                # Un fallo inesperado no dice nada del canal ni debe parar a los demás
+                log.warning("Error al comprobar %s: %r", url, e)
+                state, status, detail = UNKNOWN, None, type(e).__name__
+        self.stats['probed'] += 1
+        self.stats[state] += 1
+        return ProbeResult(url, state, status, detail, time.perf_counter() - started, time.time())
+
+    async def _check(self, url):
+        if is_hls(url):
+            return await self._check_manifest(url)
+        async with self.session().head(url, allow_redirects=True) as response:
+            status = response.status
+            content_type = response.content_type
+        if status in HEAD_REFUSED:
+            return await self._check_range(url)
+        if status >= 400:
+            return DEAD, status, 'http'
+        if is_hls(url, content_type):
+            return await self._check_manifest(url)
+        return ALIVE, status, content_type
+
+    async def _check_range(self, url):
+        headers = {'Range': 'bytes=0-1023'}
+        async with self.session().get(url, headers=headers, allow_redirects=True) as response:
+            if response.status >= 400:
+                return DEAD, response.status, 'http'
+            head = await response.content.read(1024)
+            content_type = response.content_type
+            status = response.status
+        if is_hls(url, content_type) or head.lstrip(b'\xef\xbb\xbf').startswith(b'#EXTM3U'):
+            return await self._check_manifest(url)
+        if not head:
+            return DEAD, status, 'empty'
+        return ALIVE, status, content_type
+
+    async def _check_manifest(self, url, nested=False):
+        async with self.session().get(url, allow_redirects=True) as response:
+            status = response.status
+            if status >= 400:
+                return DEAD, status, 'http'
+            body = await response.content.read(self.max_manifest)
+            base = str(response.url)
+        text = body.decode('utf-8', 'replace').lstrip('\ufeff')
+        if not text.startswith('#EXTM3U'):
+            return DEAD, status, 'not a playlist'
+
+        lines = (line.strip() for line in text.splitlines())
+        uris = [line for line in lines if line and line[0] != '#']
+        if '#EXT-X-STREAM-INF' in text:
+            # Lista maestra: se comprueba también la primera variante
+            if not uris:
+                return DEAD, status, 'no variants'
+            if nested:
+                return ALIVE, status, 'hls'
+            return await self._check_manifest(urljoin(base, uris[0]), nested=True)
+        if not uris:
+            return DEAD, status, 'no segments'
+        return ALIVE, status, 'hls'
+
+    async def probe_all(self, urls, on_result=None):
+        """Probe every distinct URL and return ``{url: ProbeResult}``.
+
+        A fixed pool of ``concurrency`` workers pulls from the URL list, so
+        memory stays flat however long the playlist is.  ``on_result`` is
+        called with each result as it completes.  If a worker fails (e.g.
+        in ``on_result``) the others are cancelled and the error raised.
+        """
+        pending = iter(dict.fromkeys(url.strip() for url in urls if url and url.strip()))
+        results = {}
+
+        async def worker():
+            for url in pending:
+                result = await self.probe(url)
+                results[url] = result
+                if on_result is not None:
+                    on_result(result)
+
+        workers = [asyncio.ensure_future(worker()) for _ in range(self.concurrency)]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for task in workers:
+                task.cancel()
+        return results
+
+
+class ProbeCache:
+    """Persisted probe results with a time-to-live."""
+
+    def __init__(self, path, ttl=6 * 3600):
+        self.ttl = ttl
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute(SCHEMA)
+        self.entries = {
+            row[0]: ProbeResult(*row)
+            for row in self.db.execute('SELECT url, state, status, detail, latency, checked FROM probes')
+        }
+        self._dirty = {}
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, url):
+        """The cached result for ``url`` if it has not expired."""
+        result = self.entries.get(url.strip())
+        if result is None or time.time() - result.checked > self.ttl:
+            return None
+        return result
+
+    def state(self, url):
+        result = self.get(url)
+        return result.state if result is not None else UNKNOWN
+
+    def is_dead(self, url):
+        result = self.entries.get(url.strip())
+        return result is not None and result.state == DEAD and time.time() - result.checked <= self.ttl
+
+    def stale(self, urls):
+        """The distinct URLs among ``urls`` with no fresh result."""
+        return [url for url in dict.fromkeys(url.strip() for url in urls if url) if self.get(url) is None]
+
+    def put(self, result):
+        self.entries[result.url] = result
+        self._dirty[result.url] = result
+
+    def flush(self):
+        dirty, self._dirty = self._dirty, {}
+        if dirty:
+            self.db.executemany('INSERT OR REPLACE INTO probes VALUES (?, ?, ?, ?, ?, ?)', dirty.values())
+            self.db.commit()
+
+    def close(self):
+        self.flush()
+        self.db.close()
+
+
+async def run(args):
+    urls = [channel['url'] for channel in m3u_parser.iter_channels(args.playlist)]
+    cache = ProbeCache(args.cache, ttl=args.ttl) if args.cache else None
+    todo = cache.stale(urls) if cache is not None else list(dict.fromkeys(urls))
+    prober = StreamProber(args.concurrency, args.per_host, args.rate, args.timeout)
+    started = time.perf_counter()
+    done = 0
+
+    def on_result(result):
+        nonlocal done
+        done += 1
+        if cache is not None:
+            cache.put(result)
+            if not done % 500:
+                cache.flush()
+        if args.verbose or (result.dead and not args.quiet):
+            print(f'{result.state:7} {result.status or "-":>4} {result.detail or "":16} {result.url}')
+
+    try:
+        results = await prober.probe_all(todo, on_result)
+    finally:
+        await prober.close()
+        if cache is not None:
+            cache.close()
+    elapsed = time.perf_counter() - started
+
+    stats = prober.stats
+    print(f'{len(urls)} canales, {len(todo)} URLs comprobadas en {elapsed:.1f}s  '
+          f'vivas {stats[ALIVE]}  caídas {stats[DEAD]}  desconocidas {stats[UNKNOWN]}',
+          file=sys.stderr)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump({
+                'stats': stats,
+                'seconds': elapsed,
+                'results': [result._asdict() for result in results.values()],
+            }, f, indent=2, ensure_ascii=False)
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(description='Comprueba qué canales de una lista M3U responden.')
+    parser.add_argument('playlist')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--per-host', type=int, default=2)
+    parser.add_argument('--rate', type=float, default=4.0, help='peticiones por segundo y servidor')
+    parser.add_argument('--timeout', type=float, default=8)
+    parser.add_argument('--ttl', type=float, default=6 * 3600)
+    parser.add_argument('--cache', default=os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                                        'cache', 'probes.sqlite'),
+                        help="caché de resultados; '' para no usarla")
+    parser.add_argument('--json', help='guardar resumen y resultados en este fichero')
+    parser.add_argument('-v', '--verbose', action='store_true', help='mostrar todas las URLs')
+    parser.add_argument('-q', '--quiet', action='store_true', help='sólo el resumen')
+    args = parser.parse_args(argv)
+    if os.name == 'nt':
+        asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
+    asyncio.run(run(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+import asyncio
+import threading
+import time
+
+from async_runtime import AsyncRuntime
+
+
+def test_slot_is_released_once_the_cancelled_task_unwinds():
+    runtime = AsyncRuntime({'work': (1, 1)}).start()
+    started = threading.Event()
+    unwinding = threading.Event()
+    release = threading.Event()
+
+    async def work():
+        started.set()
+        try:
+            await asyncio.sleep(60)
+        finally:
+            unwinding.set()
+            # Limpieza lenta tras la cancelación
+            await asyncio.get_running_loop().run_in_executor(None, release.wait, 5)
+
+    try:
+        future = runtime.submit('work', work())
+        assert started.wait(5)
+        future.cancel()
+        assert unwinding.wait(5)
+        assert runtime.submit('work', asyncio.sleep(0)) is None
+        release.set()
+        deadline = time.monotonic() + 5
+        while runtime.groups['work'].stats()['cancelled'] == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        second = runtime.submit('work', asyncio.sleep(0))
+        assert second is not None
+        second.result(5)
+        assert runtime.groups['work'].stats()['completed'] == 1
+    finally:
+        release.set()
+        runtime.shutdown(timeout=1)
+
+
+def test_stats_come_from_the_loop_thread():
+    runtime = AsyncRuntime(lag_interval=0.01).start()
+    try:
+        time.sleep(0.1)
+        stats = runtime.stats()
+        assert stats['tasks'] >= 1
+        assert stats['loop_lag']['max'] >= 0.0
+    finally:
+        runtime.shutdown(timeout=1)
@@ -0,0 +1,35 @@
+import pym3u_cli
+
+FIRST = '''#EXTM3U
+#EXTINF:-1 tvg-id="a",A
+http://example.com/1
+'''
+# B repite la URL de A (la pasada global lo descarta) y C repite el tvg-id de B
+SECOND = '''#EXTM3U
+#EXTINF:-1 tvg-id="b",B
+http://example.com/1
+#EXTINF:-1 tvg-id="b",C
+http://example.com/3
+#EXTINF:-1 tvg-id="a",D
+http://example.com/4
+#EXTINF:-1 tvg-id="e",E
+http://example.com/4
+'''
+
+
+def run(tmp_path, jobs):
+    sources = []
+    for name, text in (('first.m3u', FIRST), ('second.m3u', SECOND)):
+        path = tmp_path / name
+        path.write_text(text, encoding='utf-8')
+        sources.append(str(path))
+    out = tmp_path / f'out-{jobs}.m3u'
+    pym3u_cli.main([*sources, '--dedupe', 'url', '--dedupe', 'tvg-id',
+                    '--jobs', str(jobs), '-q', '-o', str(out)])
+    return out.read_text(encoding='utf-8')
+
+
+def test_parallel_output_matches_serial_with_overlapping_keys(tmp_path):
+    serial = run(tmp_path, 1)
+    assert 'http://example.com/3' in serial
+    assert run(tmp_path, 2) == serial
@@ -0,0 +1,38 @@
+import logging
+
+from log_setup import configure_logging
+
+
+class ListHandler(logging.Handler):
+    def __init__(self):
+        super().__init__()
+        self.records = []
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+def test_existing_root_handler_is_throttled():
+    root = logging.getLogger()
+    saved_handlers = list(root.handlers)
+    saved_level = root.level
+    for handler in saved_handlers:
+        root.removeHandler(handler)
+    existing = ListHandler()
+    root.addHandler(existing)
+    try:
+        listener = configure_logging(burst=3, period=60)
+        try:
+            assert existing not in root.handlers
+            log = logging.getLogger('pym3u.test')
+            for _ in range(1000):
+                log.error('Error al descargar %s', 'http://example.com/logo.png')
+        finally:
+            listener.stop()
+        assert len(existing.records) == 3
+    finally:
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        for handler in saved_handlers:
+            root.addHandler(handler)
+        root.setLevel(saved_level)
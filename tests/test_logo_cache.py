@@ -0,0 +1,19 @@
+import sqlite3
+
+from logo_cache import LogoCache
+
+PNG = b'\x89PNG' + b'\0' * 100
+
+
+def test_flush_persists_access_order_without_close(tmp_path):
+    cache = LogoCache(str(tmp_path))
+    cache.store('http://example.com/a.png', PNG)
+    cache.store('http://example.com/b.png', PNG)
+    cache.lookup('http://example.com/a.png')
+    cache.flush()
+    # Como tras un cierre brusco: se lee la base sin close()
+    db = sqlite3.connect(str(tmp_path / 'logos.sqlite'))
+    order = [url for url, in db.execute('SELECT url FROM logos ORDER BY last_access')]
+    db.close()
+    cache.close()
+    assert order == ['http://example.com/b.png', 'http://example.com/a.png']
@@ -0,0 +1,21 @@
+from array import array
+
+from channel_store import ChannelStore
+from m3u_parser import FIRST_CHUNK, LOAD_CHUNK, iter_batches
+
+
+def test_batches_start_small_and_keep_every_channel():
+    channels = [{'name': f'Canal {i}', 'url': f'http://example.com/{i}'} for i in range(FIRST_CHUNK + LOAD_CHUNK + 7)]
+    batches = list(iter_batches(channels))
+    assert [len(batch) for batch in batches] == [FIRST_CHUNK, LOAD_CHUNK, 7]
+    assert [channel for batch in batches for channel in batch] == channels
+    assert list(iter_batches([])) == []
+
+
+def test_extend_view_stays_a_range_until_a_row_is_left_out():
+    store = ChannelStore({'name': f'Canal {i}', 'url': f'http://example.com/{i}'} for i in range(3))
+    view = store.extend_view(range(0), 0, range(3))
+    assert view == range(3)
+    store.extend([{'name': 'Canal 3', 'url': 'http://example.com/3'}, {'name': 'Canal 4', 'url': 'http://example.com/4'}])
+    view = store.extend_view(view, 3, array('I', [4]))
+    assert view == array('I', [0, 1, 2, 4])
@@ -0,0 +1,24 @@
+import m3u_parser
+from channel_store import ChannelStore
+from parallel_parser import iter_chunks
+
+PLAYLIST = '﻿#EXTM3U\r\n' + ''.join(
+    f'#EXTINF:-1 tvg-id="c{i}" group-title="G{i % 7}",Canal {i}\r\n'
+    + ('#EXTVLCOPT:http-user-agent=x\r\n' if i % 5 == 0 else '')
+    + f'http://example.com/{i}.m3u8\r\n'
+    for i in range(3000)
+)
+
+
+def test_worker_processes_match_the_serial_parser(tmp_path):
+    path = tmp_path / 'lista.m3u'
+    path.write_text(PLAYLIST, encoding='utf-8')
+    serial = ChannelStore(m3u_parser.iter_channels(str(path)))
+    store = ChannelStore.packed()
+    chunks = 0
+    for chunk, _ in iter_chunks(str(path), workers=3, first=4096, size=16 * 1024):
+        store.extend_packed(chunk)
+        chunks += 1
+    assert chunks > 3
+    assert len(store) == len(serial)
+    assert [store.get(row) for row in range(len(store))] == [serial.get(row) for row in range(len(serial))]
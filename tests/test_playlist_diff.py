@@ -0,0 +1,40 @@
+import io
+from array import array
+
+import m3u_parser
+from channel_store import ChannelStore
+from playlist_diff import PlaylistBaseline, iter_entries
+
+
+def entry(name, url):
+    return f'#EXTINF:-1,{name}\n{url}\n'
+
+
+def baseline(text):
+    store = ChannelStore(m3u_parser.iter_channels(io.StringIO(text)))
+    hashes = array('q', map(hash, iter_entries(text.encode('utf-8'))))
+    return PlaylistBaseline(store, hashes, array('I', store.all_rows()))
+
+
+def test_duplicate_entries_map_to_distinct_rows():
+    filler = ''.join(entry(f'Canal {i}', f'http://example.com/{i}') for i in range(50))
+    dup = entry('Repetido', 'http://example.com/dup')
+    old = '#EXTM3U\n' + dup + filler + dup + dup
+    new = '#EXTM3U\n' + filler + dup + entry('Nuevo', 'http://example.com/new') + dup + dup
+    diff = baseline(old).diff(new.encode('utf-8'))
+    matched = [row for row in diff.order if row != 0xFFFFFFFF]
+    assert len(matched) == len(set(matched)) == 53
+    assert len(diff.added) == 1 and not diff.changed and not diff.removed
+
+
+def test_window_search_skips_rows_already_matched():
+    filler = ''.join(entry(f'Canal {i}', f'http://example.com/{i}') for i in range(5))
+    first = entry('Primero', 'http://example.com/first')
+    dup = entry('Repetido', 'http://example.com/dup')
+    # La primera copia se empareja hacia delante, "Primero" hace volver atrás y
+    # la segunda copia ya no tiene fila anterior libre: es nueva
+    top = '#EXTM3U\n' + entry('Cabecera', 'http://example.com/top')
+    diff = baseline(top + first + filler + dup).diff((top + dup + first + dup + filler).encode('utf-8'))
+    matched = [row for row in diff.order if row != 0xFFFFFFFF]
+    assert len(matched) == len(set(matched)) == 8
+    assert len(diff.added) == 1
@@ -0,0 +1,29 @@
+import threading
+
+from search_scheduler import SearchScheduler
+
+
+def test_call_runs_on_the_search_worker_between_searches():
+    events = []
+    started = threading.Event()
+    release = threading.Event()
+
+    def search(text, is_cancelled):
+        started.set()
+        release.wait(5)
+        events.append(('search', text, threading.current_thread().name))
+        return text
+
+    scheduler = SearchScheduler(search, lambda text, result: None, call_later=None, deliver=lambda fn: None)
+    try:
+        scheduler.submit('canal')
+        started.wait(5)
+        future = scheduler.call(lambda: events.append(('update', threading.current_thread().name)))
+        # No corre mientras la búsqueda sigue en marcha
+        assert not future.done()
+        release.set()
+        future.result(5)
+    finally:
+        scheduler.shutdown()
+    assert [event[0] for event in events] == ['search', 'update']
+    assert events[0][2] == events[1][1]
@@ -0,0 +1,20 @@
+import asyncio
+
+from stream_probe import StreamProber, UNKNOWN
+
+
+def test_unexpected_error_is_unknown_and_does_not_stop_the_others():
+    prober = StreamProber(concurrency=2)
+
+    async def check(url):
+        raise KeyError(url)
+    prober._check = check
+
+    async def probe():
+        try:
+            return await prober.probe_all([f'http://127.0.0.1:9/{i}' for i in range(5)])
+        finally:
+            await prober.close()
+    results = asyncio.run(probe())
+    assert len(results) == 5
+    assert {result.state for result in results.values()} == {UNKNOWN}
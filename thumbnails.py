@@ -0,0 +1,156 @@
+"""Off-thread logo decoding and an in-memory LRU of ready textures.
+
+Decoding a PNG/JPEG and shrinking it to the card size happens on a worker
+thread with Pillow; only the final GL upload runs on the UI thread, through
+the ``make_texture`` callable the app provides.  Finished textures are kept
+in an LRU keyed by logo URL, so scrolling back or re-filtering shows logos
+without touching the disk or the decoder again.
+
+With an ``atlas`` (see ``logo_atlas``) finished logos are copied into
+shared atlas pages instead of getting a texture each, and evicting a logo
+frees its cell for the next one.
+
+Pillow is optional: without it ``ThumbnailCache.available`` is false and the
+app falls back to letting kivy load the file itself.
+"""
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    from PIL import Image
+except ImportError:
+    Image = None
+
+log = logging.getLogger(__name__)
+
+
+def decode_thumbnail(path, size):
+    """Decode ``path`` and fit it in a ``size`` x ``size`` box.
+
+    Returns ``(width, height, rgba_bytes)`` with rows bottom-up, the layout
+    kivy textures expect.
+    """
+    with Image.open(path) as image:
+        # draft() deja que el decodificador JPEG reduzca la imagen por el camino
+        image.draft('RGB', (size, size))
+        image = image.convert('RGBA')
+        image.thumbnail((size, size), Image.BILINEAR)
+        image = image.transpose(Image.FLIP_TOP_BOTTOM)
+        return image.width, image.height, image.tobytes()
+
+
+class ThumbnailCache:
+    """Bounded LRU of logo textures fed by a decoding thread pool."""
+
+    def __init__(self, size, make_texture, deliver, max_entries=300, workers=2, on_evict=None, atlas=None):
+        self.size = size
+        self.make_texture = make_texture
+        self.deliver = deliver
+        self.max_entries = max_entries
+        self.on_evict = on_evict
+        self.atlas = atlas
+        self.available = Image is not None
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='thumbnail')
+        self._textures = OrderedDict()
+        self._pending = {}
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0, 'decoded': 0, 'failed': 0}
+
+    def __len__(self):
+        return len(self._textures)
+
+    def get(self, url):
+        """Return the ready texture for ``url`` or ``None`` (UI thread)."""
+        texture = self._textures.get(url)
+        if texture is None:
+            self.stats['misses'] += 1
+            return None
+        self._textures.move_to_end(url)
+        self.stats['hits'] += 1
+        return texture
+
+    def put(self, url, texture):
+        self._textures[url] = texture
+        self._textures.move_to_end(url)
+        while len(self._textures) > self.max_entries:
+            self._evict_oldest()
+
+    def _evict_oldest(self):
+        old_url, old_texture = self._textures.popitem(last=False)
+        self.stats['evictions'] += 1
+        if self.atlas is not None:
+            self.atlas.release(old_url)
+        if self.on_evict is not None:
+            self.on_evict(old_url, old_texture)
+
+    def use_atlas(self, atlas):
+        """Switch to ``atlas`` (``None`` for a texture per logo), dropping every texture."""
+        self.clear()
+        if self.atlas is not None:
+            self.atlas.clear()
+        self.atlas = atlas
+
+    def request(self, url, path, callback):
+        """Decode ``path`` for ``url`` and call ``callback(texture)`` on the UI thread.
+
+        Requests for a URL already being decoded just add their callback.
+        """
+        texture = self._textures.get(url)
+        if texture is not None:
+            self._textures.move_to_end(url)
+            callback(texture)
+            return
+        with self._lock:
+            callbacks = self._pending.get(url)
+            if callbacks is not None:
+                callbacks.append(callback)
+                return
+            self._pending[url] = [callback]
+        self.executor.submit(self._decode, url, path)
+
+    def _decode(self, url, path):
+        try:
+            decoded = decode_thumbnail(path, self.size)
+        except Exception as e:
+            self.stats['failed'] += 1
+            log.warning("Error al decodificar logo %s: %s", path, e)
+            decoded = None
+        else:
+            self.stats['decoded'] += 1
+        self.deliver(lambda: self._finish(url, decoded))
+
+    def _finish(self, url, decoded):
+        with self._lock:
+            callbacks = self._pending.pop(url, ())
+        if decoded is None:
+            return
+        texture = self.add(url, *decoded)
+        for callback in callbacks:
+            callback(texture)
+
+    def add(self, url, width, height, pixels):
+        """Upload a decoded logo (UI thread), keep it in the LRU and return its texture."""
+        texture = None
+        if self.atlas is not None:
+            # Se libera antes la celda del logo que va a salir del LRU
+            self._textures.pop(url, None)
+            while len(self._textures) >= self.max_entries:
+                self._evict_oldest()
+            texture = self.atlas.add(url, width, height, pixels)
+        if texture is None:
+            texture = self.make_texture(width, height, pixels)
+        self.put(url, texture)
+        return texture
+
+    def clear(self):
+        for url, texture in self._textures.items():
+            if self.atlas is not None:
+                self.atlas.release(url)
+            if self.on_evict is not None:
+                self.on_evict(url, texture)
+        self._textures.clear()
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)